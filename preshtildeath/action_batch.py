@@ -0,0 +1,134 @@
+"""
+PRESHTILDEATH ACTION BATCH
+Records executeAction calls and sends them to Photoshop as one script.
+"""
+import json
+
+import photoshop.api as ps
+
+# executeAction dialog mode ints to their ExtendScript names, no mode is ERROR like executeAction's own default
+DIALOG_MODES = {1: "DialogModes.ALL", 2: "DialogModes.ERROR", 3: "DialogModes.NO"}
+
+
+class ScriptAction:
+    """
+    Stand-in for ActionDescriptor, ActionReference and ActionList while recording.
+    Keeps the put calls so they can be written out as ExtendScript later.
+    """
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.calls = []
+
+    def __getattr__(self, method: str):
+        if not method.startswith("put"):
+            raise AttributeError(f"{method} needs a real {self.kind}, flush the batch first")
+        return lambda *args: self.calls.append((method, args))
+
+    def compile(self, lines: list, names: dict) -> str:
+        """ Append the JS that builds this object to lines, returns its variable name. """
+        if id(self) in names:
+            return names[id(self)]
+        args_js = []
+        for method, args in self.calls:
+            args_js += [(method, [self.arg(method, a, lines, names) for a in args])]
+        name = f"a{len(names)}"
+        names[id(self)] = name
+        lines += [f"var {name} = new {self.kind}();"]
+        lines += [f"{name}.{method}({', '.join(args)});" for method, args in args_js]
+        return name
+
+    @staticmethod
+    def arg(method: str, value, lines: list, names: dict) -> str:
+        if isinstance(value, ScriptAction):
+            return value.compile(lines, names)
+        if method == "putPath" and isinstance(value, str):
+            return f"new File({json.dumps(value)})"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return json.dumps(str(value))
+
+
+class ActionBatch:
+    """
+    Use as a context manager around a run of action helpers:
+        with tools.batch:
+            tools.select_nonblank_pixels(layer)
+            ...
+    Helpers build their descriptors through desc/ref/list and run them through execute,
+    which queues while recording and runs straight away otherwise. Anything that reads
+    Photoshop state back has to flush first, queued steps haven't happened yet.
+    """
+    def __init__(self, app: ps.Application):
+        self.app = app
+        self.queue = None
+        self.depth = 0
+        self.queued = 0  # Actions that went through a batch
+        self.sent = 0  # Scripts they went out in
+
+    @property
+    def recording(self) -> bool:
+        return self.queue is not None
+
+    def __enter__(self):
+        if not self.depth:
+            self.queue = []
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.depth -= 1
+        if self.depth:
+            return
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.queue = None
+
+    def desc(self):
+        return ScriptAction("ActionDescriptor") if self.recording else ps.ActionDescriptor()
+
+    def ref(self):
+        return ScriptAction("ActionReference") if self.recording else ps.ActionReference()
+
+    def list(self):
+        return ScriptAction("ActionList") if self.recording else ps.ActionList()
+
+    def execute(self, event: int, desc=None, mode: int=None):
+        """ Queue the action while recording, otherwise run it. """
+        if not self.recording:
+            if desc is None:
+                desc = ps.ActionDescriptor()
+            if mode is None:
+                return self.app.executeAction(event, desc)
+            return self.app.executeAction(event, desc, mode)
+        self.queue += [(event, desc or self.desc(), mode)]
+        self.queued += 1
+
+    def visible(self, layer, visible: bool=True):
+        """ Show or hide a layer, or a layer ID, through the action queue. """
+        ref = self.ref()
+        ref.putIdentifier(self.app.charIDToTypeID("Lyr "), layer if isinstance(layer, int) else layer.id)
+        lst = self.list()
+        lst.putReference(ref)
+        dsc = self.desc()
+        dsc.putList(self.app.charIDToTypeID("null"), lst)
+        self.execute(self.app.charIDToTypeID("Shw " if visible else "Hd  "), dsc)
+
+    def script(self) -> str:
+        lines, names = [], {}
+        for event, desc, mode in self.queue:
+            name = desc.compile(lines, names)
+            lines += [f"executeAction({event}, {name}, {DIALOG_MODES.get(mode, 'DialogModes.ERROR')});"]
+        return "\n".join(lines)
+
+    def flush(self):
+        """ Send everything queued so far as one script. """
+        if not self.queue:
+            return
+        script = self.script()
+        self.queue = []
+        self.app.doJavaScript(script)
+        self.sent += 1
@@ -0,0 +1,149 @@
+"""
+PRESHTILDEATH ART ARCHIVE
+Moves finished art into the finished folder from a background thread, so a card never waits on the file system.
+Moves queued up while the thread was busy go out together, a folder at a time.
+"""
+import atexit
+import errno
+import hashlib
+import os
+import os.path as path
+import queue
+import shutil
+import threading
+
+import tools
+
+IDLE = 20  # Seconds with no new card that mean the batch is over and gets its report
+
+def checksum(file: str) -> str:
+    digest = hashlib.blake2b()
+    with open(file, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_across(src: str, dst: str):
+    """
+    Move between drives: copy, flush to disk, check it matches, then drop the original.
+    A copy that fails or doesn't match gets deleted, the original stays.
+    """
+    before = checksum(src)
+    try:
+        shutil.copyfile(src, dst)
+        with open(dst, "rb+") as fp:
+            os.fsync(fp.fileno())
+        if checksum(dst) != before:
+            raise OSError(f"Copy of {path.basename(src)} doesn't match the original, left it in place")
+        shutil.copystat(src, dst)
+    except Exception:
+        if path.exists(dst):
+            os.remove(dst)
+        raise
+    os.remove(src)
+
+
+def destination(layout) -> str:
+    """ Finished folder for a card's art, None if the art is already in one. """
+    work_path = path.dirname(layout.filename)
+    if "finished" in work_path:
+        return None
+    if layout.card_class != "NormalLayout":
+        return path.join(work_path, "finished", layout.card_class)
+    return path.join(work_path, "finished")
+
+
+class ArtArchive:
+    """
+    Failures are kept, not raised, and show up in the next report.
+    The report prints once no art has come in for IDLE seconds, the end of a batch,
+    and whatever is still queued when Python exits gets finished and reported first.
+    """
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.RLock()
+        self.failures = []
+        self.moved = 0
+        self.copied = 0
+
+    def add(self, layout) -> bool:
+        """ Queue a card's art, False if there's nothing to move. """
+        folder = destination(layout)
+        if folder is None:
+            return False
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="art_archive", daemon=True)
+            self.thread.start()
+            atexit.register(self.finish)
+        self.jobs.put((layout.filename, folder))
+        return True
+
+    def run(self):
+        while True:
+            try:
+                pending = [self.jobs.get(timeout=IDLE)]
+            except queue.Empty:
+                self.finish_batch()
+                continue
+            while True:
+                try:
+                    pending += [self.jobs.get_nowait()]
+                except queue.Empty:
+                    break
+            by_folder = {}
+            for src, folder in pending:
+                by_folder.setdefault(folder, []).append(src)
+            for folder, files in by_folder.items():
+                for src in files:
+                    self.move(src, folder)
+            for _ in pending:
+                self.jobs.task_done()
+
+    def move(self, src: str, folder: str):
+        dst = None
+        try:
+            dst = tools.names.reserve(path.basename(src), folder)
+            try:
+                os.replace(src, dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                copy_across(src, dst)
+                with self.lock:
+                    self.copied += 1
+            with self.lock:
+                self.moved += 1
+        except Exception as e:
+            if dst:
+                tools.names.release(dst)
+            with self.lock:
+                self.failures += [(src, e)]
+
+    def wait(self):
+        """ Block until everything queued so far is done. """
+        if self.thread is not None:
+            self.jobs.join()
+
+    def report(self) -> str:
+        """ Moves since the last report, and any failures, which then get cleared. """
+        with self.lock:
+            failures, self.failures = self.failures, []
+            lines = [f"Archived {self.moved} art files ({self.copied} across drives), {len(failures)} failed"]
+            self.moved = self.copied = 0
+        lines += [f"  Could not move art file {path.basename(src)}: {e}" for src, e in failures]
+        return "\n".join(lines)
+
+    def finish_batch(self):
+        """ Print the report, if anything was archived or failed since the last one. """
+        with self.lock:
+            if self.moved or self.failures:
+                print(self.report())
+
+    def finish(self):
+        self.wait()
+        self.finish_batch()
+
+
+archive = ArtArchive()
@@ -0,0 +1,72 @@
+"""
+PRESHTILDEATH ART INFO
+Art file headers read once, remembered per process and on disk.
+"""
+import json
+import os
+import os.path as path
+import tempfile
+
+from PIL import Image
+
+CACHE_FILE = path.join(path.dirname(__file__), "assets", "art_info.json")
+CACHE_LIMIT = 5000
+
+
+class ArtInfoCache:
+    """
+    Header info for art files keyed by path, size and mtime, so an edited file
+    gets probed again. Written with temp file and rename; two renderers writing
+    at once can lose an entry, which only costs a probe later.
+    """
+    def __init__(self, file: str=CACHE_FILE):
+        self.file = file
+        self.entries = None
+
+    def load(self):
+        try:
+            with open(self.file, "r") as fp:
+                self.entries = json.load(fp)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        # Oldest first, so trimming keeps the recent sets
+        while len(self.entries) > CACHE_LIMIT:
+            del self.entries[next(iter(self.entries))]
+        os.makedirs(path.dirname(self.file), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=path.dirname(self.file), suffix=".tmp")
+        with os.fdopen(fd, "w") as fp:
+            json.dump(self.entries, fp)
+        os.replace(temp, self.file)
+
+    def get(self, file: str) -> dict:
+        """ width, height, dpi, mode and icc (bool) for an image file. """
+        if self.entries is None:
+            self.load()
+        stat = os.stat(file)
+        key = f"{path.abspath(file)}|{stat.st_size}|{stat.st_mtime_ns}"
+        if key not in self.entries:
+            self.entries[key] = probe(file)
+            self.save()
+        return self.entries[key]
+
+
+def probe(file: str) -> dict:
+    """ Read the header only, Image.open doesn't decode pixels until asked. """
+    with Image.open(file) as im:
+        dpi = im.info.get("dpi", (72, 72))[0] or 72
+        return {
+            "width": im.width,
+            "height": im.height,
+            "dpi": float(dpi),
+            "mode": im.mode,
+            "icc": "icc_profile" in im.info,
+        }
+
+
+cache = ArtInfoCache()
+
+
+def art_info(file: str) -> dict:
+    return cache.get(file)
@@ -0,0 +1,180 @@
+"""
+PRESHTILDEATH BENCHMARK
+Renders a fixed set of representative cards through their templates against the
+Photoshop, Proxyshop and Scryfall stand-ins, and checks each against its stored budget.
+Needs neither Photoshop nor Proxyshop:
+    python plugins/preshtildeath/benchmark.py [card ids] [--update]
+Exits with 1 when a card goes over budget, has no budget yet, has no template snapshot to render
+against, or uses layers its template snapshot doesn't have. --update stores the current numbers as the budgets.
+"""
+import argparse
+import json
+import math
+import os
+import os.path as path
+import shutil
+import sys
+import tempfile
+import time
+
+import fake_photoshop
+import fake_proxyshop
+import fake_scryfall
+
+CARDS_FILE = path.join(path.dirname(__file__), "assets", "bench_cards.json")
+BUDGETS_FILE = path.join(path.dirname(__file__), "assets", "bench_budgets.json")
+# Counts and simulated Photoshop time don't depend on the machine, so these are what budgets hold
+BUDGETED = ("actions", "reads", "photoshop_s")
+
+
+def load_cards(file: str=CARDS_FILE) -> list:
+    with open(file, "r") as fp:
+        cards = json.load(fp)
+    by_id = {card["id"]: card for card in cards}
+    for card in cards:
+        if "scryfall_from" in card:
+            card["scryfall"] = by_id[card["scryfall_from"]]["scryfall"]
+    return cards
+
+
+def make_art(card: dict, folder: str) -> str:
+    """ Gradient art of the card's size, named the way Proxyshop and set_from_filename read it. """
+    from PIL import Image
+    scryfall = card["scryfall"]
+    name = card.get("name", scryfall["name"].split(" // ")[0])
+    file = path.join(folder, f"{name} ({scryfall['artist']}) [{scryfall['set'].upper()}].jpg")
+    width, height = card["art"]
+    gradient = Image.linear_gradient("L").resize((width, height))
+    Image.merge("RGB", (gradient, gradient.rotate(90).resize((width, height)), gradient)).save(file, dpi=(300, 300))
+    return file
+
+
+def run_card(card: dict, folder: str, backend, layouts, templates) -> dict:
+    """ One card through its template, with the stand-in's record for just that card. """
+    art = make_art(card, folder)
+    scryfall = card["scryfall"]
+    file = {
+        "filename": art,
+        "name": card.get("name", scryfall["name"].split(" // ")[0]),
+        "artist": scryfall["artist"],
+        "set": scryfall["set"].upper(),
+        "creator": None,
+    }
+    layout = getattr(layouts, card["layout"])(scryfall, file)
+    backend.reset()
+    backend.missing.clear()
+    wall, cpu = time.perf_counter(), time.process_time()
+    template = getattr(templates, card["template"])(layout)
+    template.do_move_art = False
+    result = template.execute()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    calls = backend.calls
+    return {
+        "ok": result is not False,
+        "actions": sum(n for (kind, _), n in calls.items() if kind == "action") + backend.scripted,
+        "reads": sum(n for (kind, name), n in calls.items() if kind == "property" and not name.endswith("=")),
+        "writes": sum(n for (kind, name), n in calls.items() if kind == "property" and name.endswith("=")),
+        "photoshop_s": round(backend.simulated, 3),
+        # Python's own time plus what Photoshop would have taken
+        "wall_s": round(wall + backend.simulated, 3),
+        "cpu_s": round(cpu, 3),
+        # Layers the template snapshot didn't have, the numbers don't mean much with any of these
+        "missing": sorted("/".join(names) for names in backend.missing),
+    }
+
+
+def over_budget(result: dict, budget: dict) -> list:
+    return [
+        f"{key} {result[key]} > {budget[key]}"
+        for key in BUDGETED if key in budget and result[key] > budget[key]
+    ]
+
+
+def new_budget(result: dict, headroom: float) -> dict:
+    return {
+        "actions": math.ceil(result["actions"] * (1 + headroom)),
+        "reads": math.ceil(result["reads"] * (1 + headroom)),
+        "photoshop_s": round(result["photoshop_s"] * (1 + headroom), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the templates against the Photoshop stand-in.")
+    parser.add_argument("cards", nargs="*", help="Card ids from bench_cards.json, all of them by default.")
+    parser.add_argument("--update", action="store_true", help="Store these results as the budgets.")
+    parser.add_argument("--headroom", type=float, default=0.05, help="Slack given to new budgets.")
+    parser.add_argument("--snapshots", default=fake_photoshop.SNAPSHOT_FOLDER, help="Template layer tree snapshots.")
+    parser.add_argument("--json", help="Also write the results here.")
+    args = parser.parse_args()
+
+    cards = [c for c in load_cards() if not args.cards or c["id"] in args.cards]
+    folder = tempfile.mkdtemp(prefix="preshtildeath_bench_")
+    backend = fake_photoshop.install(snapshots=args.snapshots)
+    fake_proxyshop.install()
+    server = fake_scryfall.FakeScryfall().start()
+    os.environ["SCRYFALL_API"] = os.environ["SCRYFALL_SVGS"] = server.url
+
+    # The plugin binds to photoshop.api and proxyshop on import, so only now
+    from proxyshop.constants import con
+    con.headless = True
+    from proxyshop import layouts
+    import art_info
+    import set_symbols
+    import templates
+
+    # Renders, symbol caches and art info all go to the temp folder, the stand-in's output is grey boxes
+    con.cwd = folder
+    os.makedirs(path.join(folder, "out"), exist_ok=True)
+    set_symbols.SVG_FOLDER = path.join(folder, "Set Symbols")
+    set_symbols.ATLAS_FOLDER = path.join(set_symbols.SVG_FOLDER, "atlas")
+    os.makedirs(set_symbols.ATLAS_FOLDER, exist_ok=True)
+    set_symbols.index = set_symbols.SetIndex(path.join(set_symbols.SVG_FOLDER, "set_svg.json"))
+    art_info.cache = art_info.ArtInfoCache(path.join(folder, "art_info.json"))
+
+    try:
+        budgets = {}
+        if path.exists(BUDGETS_FILE):
+            with open(BUDGETS_FILE, "r") as fp:
+                budgets = json.load(fp)
+        results, failures = {}, []
+        print(f"{'card':<16}{'actions':>9}{'reads':>8}{'writes':>8}{'photoshop':>11}{'wall':>9}{'cpu':>8}")
+        for card in cards:
+            # Made-up layers would be all there is to measure, so don't render it at all
+            stem = path.basename(getattr(templates, card["template"]).template_file_name)
+            if not path.exists(path.join(args.snapshots, f"{stem}.json")):
+                failures += [f"{card['id']}: no {stem} snapshot, take one with fake_photoshop.py snapshot {stem}"]
+                continue
+            result = results[card["id"]] = run_card(card, folder, backend, layouts, templates)
+            print(
+                f"{card['id']:<16}{result['actions']:>9}{result['reads']:>8}{result['writes']:>8}"
+                f"{result['photoshop_s']:>10.2f}s{result['wall_s']:>8.2f}s{result['cpu_s']:>7.2f}s"
+            )
+            if not result["ok"]:
+                failures += [f"{card['id']}: render failed"]
+            elif result["missing"]:
+                failures += [f"{card['id']}: {len(result['missing'])} layers not in the snapshot, e.g. {result['missing'][0]}"]
+            elif args.update:
+                pass
+            elif card["id"] not in budgets:
+                failures += [f"{card['id']}: no budget yet, run with --update"]
+            else:
+                failures += [f"{card['id']}: {problem}" for problem in over_budget(result, budgets[card["id"]])]
+        if args.json:
+            with open(args.json, "w") as fp:
+                json.dump(results, fp, indent=2)
+        if args.update:
+            budgets.update({k: new_budget(r, args.headroom) for k, r in results.items() if r["ok"] and not r["missing"]})
+            with open(BUDGETS_FILE, "w") as fp:
+                json.dump(budgets, fp, indent=2)
+                fp.write("\n")
+            print(f"Budgets saved to {BUDGETS_FILE}")
+        if failures:
+            print("Failed:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+PRESHTILDEATH COM PROFILE
+Opt-in profiler for Photoshop round trips: action manager calls by event and
+property reads and writes by name, each charged to the plugin function that made it.
+"""
+import sys
+import time
+from collections import defaultdict
+
+import photoshop.api as ps
+from photoshop.api._core import Photoshop
+
+# Modules whose app gets swapped for the proxy, and whose functions calls get charged to
+PLUGIN = ("tools", "crt_tools", "templates", "template_docs")
+
+
+def caller() -> str:
+    """ Innermost plugin function on the stack, e.g. tools.fit_text. """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__")
+        if module in PLUGIN:
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "other"
+
+
+class ProfiledApplication:
+    """ Stands in for a module's app, times the action manager calls and passes everything else through. """
+    def __init__(self, app: ps.Application, profiler):
+        object.__setattr__(self, "_app", app)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._app, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._app, name, value)
+
+    def executeAction(self, event: int, *args, **kwargs):
+        return self._profiler.timed("action", event, self._app.executeAction, event, *args, **kwargs)
+
+    def executeActionGet(self, ref, *args, **kwargs):
+        return self._profiler.timed("get", "executeActionGet", self._app.executeActionGet, ref, *args, **kwargs)
+
+    def doJavaScript(self, script: str, *args, **kwargs):
+        return self._profiler.timed("script", "doJavaScript", self._app.doJavaScript, script, *args, **kwargs)
+
+
+class ComProfiler:
+    """
+    Calls inside a timed call aren't counted again, so the times add up to the card's total.
+    Properties are patched on the photoshop.api classes once and only time anything while enabled.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.patched = False
+        self.depth = 0
+        self.apps = {}  # module name: its own app
+        self.calls = defaultdict(lambda: [0, 0.0])  # (kind, name, caller): [calls, seconds]
+        self.names = {}  # event ID: string ID, looked up when reporting
+
+    def timed(self, kind: str, name, fn, *args, **kwargs):
+        if not self.enabled or self.depth:
+            return fn(*args, **kwargs)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.depth -= 1
+            entry = self.calls[(kind, name, caller())]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def timed_property(self, name: str, prop: property) -> property:
+        def fget(obj):
+            return self.timed("read", name, prop.fget, obj)
+
+        def fset(obj, value):
+            return self.timed("write", name, prop.fset, obj, value)
+        return property(fget if prop.fget else None, fset if prop.fset else None, prop.fdel, prop.__doc__)
+
+    def patch_properties(self):
+        classes = {
+            obj for module in list(sys.modules.values())
+            if module and module.__name__.startswith("photoshop.api")
+            for obj in vars(module).values()
+            if isinstance(obj, type) and issubclass(obj, Photoshop)
+        }
+        for cls in classes:
+            for name, attr in list(vars(cls).items()):
+                if isinstance(attr, property):
+                    setattr(cls, name, self.timed_property(f"{cls.__name__}.{name}", attr))
+
+    def enable(self):
+        if not self.patched:
+            self.patched = True
+            self.patch_properties()
+        for name in PLUGIN:
+            module = sys.modules.get(name)
+            if module is None or name in self.apps:
+                continue
+            self.apps[name] = module.app
+            module.app = ProfiledApplication(module.app, self)
+            if hasattr(module, "batch"):
+                module.batch.app = module.app
+        self.enabled = True
+
+    def disable(self):
+        for name, app in self.apps.items():
+            module = sys.modules[name]
+            module.app = app
+            if hasattr(module, "batch"):
+                module.batch.app = app
+        self.apps.clear()
+        self.enabled = False
+
+    def label(self, kind: str, name) -> str:
+        if kind != "action":
+            return name
+        if name not in self.names:
+            try:
+                app = next(iter(self.apps.values()), None) or ps.Application()
+                self.names[name] = app.typeIDToStringID(name) or str(name)
+            except Exception:
+                self.names[name] = str(name)
+        return f"executeAction {self.names[name]}"
+
+    def report(self, top: int=15) -> str:
+        """ Top call sites by time since the last reset. """
+        count = sum(c for c, _ in self.calls.values())
+        seconds = sum(s for _, s in self.calls.values())
+        lines = [f"COM: {count} calls, {seconds:.2f}s, top {min(top, len(self.calls))} call sites:"]
+        worst = sorted(self.calls.items(), key=lambda item: -item[1][1])[:top]
+        for (kind, name, where), (calls, secs) in worst:
+            lines += [f"{secs*1000:9.1f} ms {calls:6d}x  {kind:<6} {self.label(kind, name):<40} {where}"]
+        return "\n".join(lines)
+
+    def reset(self):
+        self.calls.clear()
+
+
+profiler = ComProfiler()
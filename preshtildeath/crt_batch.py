@@ -0,0 +1,137 @@
+"""
+PRESHTILDEATH CRT BATCH
+Applies the offline CRT filter to a folder of Pixel Modular renders, one card per core.
+Renders queued in out/crt_queue get deleted once their filtered copy is written, unless --keep.
+Run from the Proxyshop folder:
+    python plugins/preshtildeath/crt_batch.py [paths...] [-o out/crt] [-j 8]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+import crt_filter
+
+QUEUE_DIR = os.path.join("out", "crt_queue")
+OUT_DIR = os.path.join("out", "crt")
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+def find_cards(paths: list) -> list:
+    """ Expand folders into the image files inside them. """
+    cards = []
+    for p in paths:
+        if os.path.isdir(p):
+            cards += sorted(
+                os.path.join(p, f) for f in os.listdir(p)
+                if os.path.splitext(f)[1].lower() in EXTENSIONS
+            )
+        elif os.path.isfile(p):
+            cards += [p]
+    return cards
+
+
+def to_100dpi(im: Image.Image) -> Image.Image:
+    """
+    Renders from an earlier unfiltered run were blown up 8x with a 100px bleed,
+    shrink those back down to the 100dpi composite. Anything else passes through.
+    """
+    bleed = crt_filter.DPI // 8
+    scale = crt_filter.OUT_SCALE
+    w, h = im.width - bleed*2, im.height - bleed*2
+    dpi = im.info.get("dpi", (0, 0))[0]
+    if round(dpi) < crt_filter.DPI or w % scale or h % scale:
+        return im
+    # Box filter back down, evens out any JPEG noise inside each 8x8 block
+    return im.crop((bleed, bleed, bleed+w, bleed+h)).reduce(scale)
+
+
+def process_card(src_path: str, dst_path: str, max_memory: int=None) -> tuple:
+    """ Worker: filter one card, returns (src_path, seconds, error). """
+    start = time.perf_counter()
+    try:
+        with Image.open(src_path) as im:
+            flat = to_100dpi(im.convert("RGB"))
+        if max_memory and dst_path.lower().endswith(".png"):
+            crt_filter.crt_filter_file(flat, dst_path, max_memory)
+        else:
+            out = crt_filter.crt_filter(flat, max_memory)
+            out.save(dst_path, dpi=(crt_filter.DPI, crt_filter.DPI))
+    except Exception as e:
+        return src_path, time.perf_counter() - start, e
+    return src_path, time.perf_counter() - start, None
+
+
+def in_folder(file: str, folder: str) -> bool:
+    return os.path.normcase(os.path.abspath(os.path.dirname(file))) == os.path.normcase(os.path.abspath(folder))
+
+
+def run_batch(cards: list, out_dir: str, workers: int=None, max_memory: int=None, ext: str="png", queue: str=None) -> dict:
+    """
+    Filter every card across a process pool.
+    queue: Cards straight inside this folder are deleted once filtered, so a rerun doesn't redo them.
+    Returns a summary with the throughput in cards per minute.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    failed = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [
+            pool.submit(
+                process_card,
+                card,
+                os.path.join(out_dir, f"{os.path.splitext(os.path.basename(card))[0]}.{ext}"),
+                max_memory,
+            )
+            for card in cards
+        ]
+        for i, job in enumerate(as_completed(jobs), 1):
+            card, seconds, err = job.result()
+            name = os.path.basename(card)
+            if err:
+                failed += [(card, err)]
+                print(f"[{i}/{len(cards)}] {name} failed: {err}")
+            else:
+                print(f"[{i}/{len(cards)}] {name} ({seconds:.1f}s)")
+                if queue and in_folder(card, queue):
+                    os.remove(card)
+    elapsed = time.perf_counter() - start
+    done = len(cards) - len(failed)
+    return {
+        "cards": done,
+        "failed": failed,
+        "seconds": elapsed,
+        "cards_per_minute": done / elapsed * 60 if elapsed else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the CRT filter to Pixel Modular renders.")
+    parser.add_argument("paths", nargs="*", default=[QUEUE_DIR], help="Files or folders of 100dpi renders.")
+    parser.add_argument("-o", "--out", default=OUT_DIR, help="Output folder.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processes, defaults to one per core.")
+    parser.add_argument("-m", "--max-memory", type=int, default=None, help="Memory cap per card in MB.")
+    parser.add_argument("-e", "--ext", default="png", help="Output file type.")
+    parser.add_argument("--keep", action="store_true", help="Leave queued renders in place once filtered.")
+    args = parser.parse_args()
+
+    cards = find_cards(args.paths)
+    if not cards:
+        print("No renders found.")
+        return
+    summary = run_batch(cards, args.out, args.workers, args.max_memory, args.ext, None if args.keep else QUEUE_DIR)
+    print(
+        f"{summary['cards']} cards in {summary['seconds']:.1f}s, "
+        f"{summary['cards_per_minute']:.1f} cards/min"
+    )
+    if summary["failed"]:
+        print(f"{len(summary['failed'])} failed:")
+        for card, err in summary["failed"]:
+            print(f"    {card}: {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+"""
+PRESHTILDEATH CRT FILTER
+Offline NumPy/Pillow take on the crt_tools.blow_up filter stack.
+"""
+import math
+import os
+import struct
+import tempfile
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+ASSETS = os.path.join(os.path.dirname(__file__), "assets")
+
+SCALE = 9  # Working scale, one source pixel is one 9x9 pattern cell
+OUT_SCALE = 8  # 100dpi -> 800dpi
+PAD = 13  # Source pixels of black bleed, cropped back down to 100px at 800dpi
+DPI = 800
+
+
+def load_pattern(name: str) -> np.ndarray:
+    """ Load one of the assets/*.png patterns as float RGB. """
+    with Image.open(os.path.join(ASSETS, name)) as im:
+        return np.asarray(im.convert("RGB"), dtype=np.float32) / 255
+
+
+def wrap_filter(tile: np.ndarray, func) -> np.ndarray:
+    """ Run a filter on a periodic tile as if it was filled across the whole canvas. """
+    h, w = tile.shape[:2]
+    big = func(np.tile(tile, (3, 3, 1)))
+    return np.ascontiguousarray(big[h:h*2, w:w*2])
+
+
+@lru_cache(maxsize=None)
+def patterns() -> dict:
+    """ Pre-blurred pattern tiles, same treatment the Photoshop layers get before merging. """
+    return {
+        "crt": wrap_filter(
+            load_pattern("crt9x9.png"),
+            lambda a: gaussian_blur(motion_blur(a, 4), 1),
+        ),
+        "rgb": load_pattern("rgb18x9.png"),
+        "scan": load_pattern("scan1x9.png"),
+        "r": wrap_filter(load_pattern("r18x9.png"), lambda a: lens_blur(a, 1)),
+        "g": wrap_filter(load_pattern("g18x9.png"), lambda a: lens_blur(a, 1)),
+        "b": wrap_filter(load_pattern("b18x9.png"), lambda a: lens_blur(a, 1)),
+    }
+
+
+"""
+Filters. Everything works on float32 HxWx3 arrays, edges are extended.
+"""
+
+
+def _axis_slice(ndim: int, axis: int, sl: slice) -> tuple:
+    return tuple(sl if ax == axis else slice(None) for ax in range(ndim))
+
+
+def _pad_axis(a: np.ndarray, axis: int, before: int, after: int) -> np.ndarray:
+    pad = [(0, 0)] * a.ndim
+    pad[axis] = (before, after)
+    return np.pad(a, pad, mode="edge")
+
+
+def box_blur(a: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    """ Running mean of width (2*radius+1) along one axis. """
+    if radius < 1:
+        return a
+    n = a.shape[axis]
+    c = np.cumsum(_pad_axis(a, axis, radius+1, radius), axis=axis, dtype=np.float32)
+    hi = c[_axis_slice(a.ndim, axis, slice(2*radius+1, None))]
+    lo = c[_axis_slice(a.ndim, axis, slice(0, n))]
+    return (hi - lo) / (2*radius+1)
+
+
+def convolve(a: np.ndarray, kernel, axis: int) -> np.ndarray:
+    """ Small 1D convolution along one axis. """
+    r = len(kernel) // 2
+    n = a.shape[axis]
+    p = _pad_axis(a, axis, r, r)
+    out = np.zeros_like(a)
+    for i, k in enumerate(kernel):
+        out += k * p[_axis_slice(a.ndim, axis, slice(i, i+n))]
+    return out
+
+
+def gaussian_blur(a: np.ndarray, sigma: float) -> np.ndarray:
+    if sigma >= 3:
+        # Three box passes are close enough for the big glow blur
+        r = max(round((math.sqrt(4*sigma**2+1)-1)/2), 1)
+        for axis in (0, 1):
+            for _ in range(3):
+                a = box_blur(a, r, axis)
+        return a
+    r = math.ceil(sigma*3)
+    x = np.arange(-r, r+1, dtype=np.float32)
+    kernel = np.exp(-x**2 / (2*sigma**2))
+    kernel /= kernel.sum()
+    return convolve(convolve(a, kernel, 0), kernel, 1)
+
+
+def motion_blur(a: np.ndarray, distance: int) -> np.ndarray:
+    """ Horizontal motion blur, like applyMotionBlur(0, distance). """
+    return box_blur(a, max(distance // 2, 1), 1)
+
+
+def lens_blur(a: np.ndarray, radius: int, bright: float=0, threshold: int=255) -> np.ndarray:
+    """ Rough lens blur, box iris plus specular boost above threshold. """
+    out = box_blur(box_blur(a, radius, 0), radius, 1)
+    if bright and threshold < 255:
+        hot = np.clip(a - threshold/255, 0, None)
+        hot = box_blur(box_blur(hot, radius, 0), radius, 1)
+        out += hot * (bright/100) * (255/(256-threshold))
+    return out
+
+
+def shift(a: np.ndarray, dy: int, dx: int) -> np.ndarray:
+    """ Translate content by (dy, dx), extending the edges. """
+    h, w = a.shape[:2]
+    p = np.pad(a, ((abs(dy), abs(dy)), (abs(dx), abs(dx)), (0, 0)), mode="edge")
+    return p[abs(dy)-dy:abs(dy)-dy+h, abs(dx)-dx:abs(dx)-dx+w]
+
+
+def _rank3(a: np.ndarray, op) -> np.ndarray:
+    for axis in (0, 1):
+        n = a.shape[axis]
+        p = _pad_axis(a, axis, 1, 1)
+        a = op(op(
+            p[_axis_slice(a.ndim, axis, slice(0, n))],
+            p[_axis_slice(a.ndim, axis, slice(1, n+1))]),
+            p[_axis_slice(a.ndim, axis, slice(2, n+2))],
+        )
+    return a
+
+
+def maximum(a: np.ndarray, radius: float) -> np.ndarray:
+    """ applyMaximum, fractional radius blends toward the next step. """
+    return _rank(a, radius, np.maximum)
+
+
+def minimum(a: np.ndarray, radius: float) -> np.ndarray:
+    """ applyMinimum, fractional radius blends toward the next step. """
+    return _rank(a, radius, np.minimum)
+
+
+def _rank(a: np.ndarray, radius: float, op) -> np.ndarray:
+    whole = int(radius)
+    frac = radius - whole
+    for _ in range(whole):
+        a = _rank3(a, op)
+    if frac:
+        a = a + frac * (_rank3(a, op) - a)
+    return a
+
+
+def median(a: np.ndarray) -> np.ndarray:
+    """ Separable 3x3 pseudo-median, like applyMedianNoise(1). """
+    for axis in (0, 1):
+        n = a.shape[axis]
+        p = _pad_axis(a, axis, 1, 1)
+        x = p[_axis_slice(a.ndim, axis, slice(0, n))]
+        y = p[_axis_slice(a.ndim, axis, slice(1, n+1))]
+        z = p[_axis_slice(a.ndim, axis, slice(2, n+2))]
+        a = np.maximum(np.minimum(x, y), np.minimum(np.maximum(x, y), z))
+    return a
+
+
+def chroma_shift(a: np.ndarray, delta: int) -> np.ndarray:
+    """ Smear red left and blue right, like crt_tools.chroma_shift. """
+    out = a.copy()
+    out[..., 0] = shift(motion_blur(a[..., :1], delta), 0, -delta)[..., 0]
+    out[..., 2] = shift(motion_blur(a[..., 2:], delta), 0, delta)[..., 0]
+    return out
+
+
+def unsharp(a: np.ndarray, amount: float, sigma: float, threshold: float) -> np.ndarray:
+    detail = a - gaussian_blur(a, sigma)
+    return a + np.where(np.abs(detail) > threshold, detail * amount, 0)
+
+
+def levels(a: np.ndarray, in_black=0, in_white=255, gamma=1.0, out_black=0, out_white=255) -> np.ndarray:
+    """ Same arguments as ArtLayer.adjustLevels. """
+    a = np.clip((a*255 - in_black) / (in_white - in_black), 0, 1)
+    if gamma != 1:
+        a = a ** (1/gamma)
+    return (a * (out_white - out_black) + out_black) / 255
+
+
+def screen(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return 1 - (1-a) * (1-b)
+
+
+"""
+Windowed layer stack. A box is (top, left, bottom, right) in working scale
+pixels, with the card's top left corner at (0, 0).
+"""
+
+
+def grow(box: tuple, n: int) -> tuple:
+    t, l, b, r = box
+    return t-n, l-n, b+n, r+n
+
+
+def trim(a: np.ndarray, n: int) -> np.ndarray:
+    return a[n:-n, n:-n] if n else a
+
+
+def base_layer(src: np.ndarray, box: tuple) -> np.ndarray:
+    """ Nearest neighbor upscale of the source, black outside the card. """
+    t, l, b, r = box
+    h, w = src.shape[:2]
+    ys = np.arange(t, b) // SCALE
+    xs = np.arange(l, r) // SCALE
+    vy = (ys >= 0) & (ys < h)
+    vx = (xs >= 0) & (xs < w)
+    out = np.zeros((b-t, r-l, 3), dtype=np.float32)
+    out[np.ix_(vy, vx)] = src[np.ix_(ys[vy], xs[vx])]
+    return out
+
+
+def pattern_layer(tile: np.ndarray, box: tuple) -> np.ndarray:
+    """ Pattern fill, phased to the source pixel grid. """
+    t, l, b, r = box
+    ph, pw = tile.shape[:2]
+    return tile[(np.arange(t, b) % ph)[:, None], (np.arange(l, r) % pw)[None, :]]
+
+
+def crt_layer(src: np.ndarray, box: tuple) -> np.ndarray:
+    """ Scanline layer, before the spherize. """
+    halo = 4
+    big = grow(box, halo)
+    a = base_layer(src, big) * pattern_layer(patterns()["crt"], big)
+    a = minimum(motion_blur(a, 2), 1)
+    return trim(a, halo)
+
+
+def crt_final(src: np.ndarray, box: tuple) -> np.ndarray:
+    halo = 5
+    return trim(unsharp(crt_layer(src, grow(box, halo)), 0.4, 1.5, 4/255), halo)
+
+
+def lcd_layer(src: np.ndarray, box: tuple) -> np.ndarray:
+    """ Chroma shifted scanlines under the RGB overlay. """
+    halo = 8
+    big = grow(box, halo)
+    a = chroma_shift(crt_layer(src, big), 1) * pattern_layer(patterns()["rgb"], big)
+    a = maximum(lens_blur(median(a), 2, 30, 216), 1)
+    return trim(a, halo)
+
+
+def rgb_layer(src: np.ndarray, box: tuple) -> np.ndarray:
+    """ Sub-pixel layer, red/green/blue masks screened together. """
+    halo = 8
+    big = grow(box, halo)
+    pats = patterns()
+    scan = base_layer(src, big) * pattern_layer(pats["scan"], big)
+    r, g, b = [maximum(scan * pattern_layer(pats[c], big), 0.6) for c in "rgb"]
+    a = chroma_shift(screen(screen(r, g), b), 1)
+    a = maximum(lens_blur(a, 2, 40, 216), 0.8)
+    return trim(a, halo)
+
+
+MESH = 64  # Remap grid step, the distortion is smooth enough to go bilinear in between
+
+
+def remap(layer, src: np.ndarray, box: tuple, amount: float, scales, geo: dict) -> np.ndarray:
+    """
+    Spherize by amount and resize by scale around the card center.
+    Several scales are averaged together, which doubles as a zoom blur.
+    Only the source area the box actually reads from gets rendered.
+    """
+    t, l, b, r = box
+    cy, cx, rad = geo["cy"], geo["cx"], geo["rad"]
+
+    def exact(y, x, s):
+        dy, dx = y - cy, x - cx
+        rn2 = (dy*dy + dx*dx) / rad**2
+        f = (1 - amount + amount*rn2 if rn2 < 1 else 1) / s
+        return cx + dx*f, cy + dy*f
+
+    def source(y, x, s):
+        # Off-grid points are interpolated from the global grid, so tiles sample exactly like the full image
+        y0, x0 = y // MESH * MESH, x // MESH * MESH
+        fy, fx = (y - y0) / MESH, (x - x0) / MESH
+        if not fy and not fx:
+            return exact(y, x, s)
+        corners = [exact(y0 + j*MESH, x0 + i*MESH, s) for j in (0, 1) for i in (0, 1)]
+        weights = [(1-fy)*(1-fx), (1-fy)*fx, fy*(1-fx), fy*fx]
+        return tuple(sum(w*c[k] for w, c in zip(weights, corners)) for k in (0, 1))
+
+    ys = [t] + list(range((t//MESH+1)*MESH, b, MESH)) + [b]
+    xs = [l] + list(range((l//MESH+1)*MESH, r, MESH)) + [r]
+    grids = [{(y, x): source(y, x, s) for y in ys for x in xs} for s in scales]
+    src_box = (
+        math.floor(min(p[1] for g in grids for p in g.values())) - 1,
+        math.floor(min(p[0] for g in grids for p in g.values())) - 1,
+        math.ceil(max(p[1] for g in grids for p in g.values())) + 1,
+        math.ceil(max(p[0] for g in grids for p in g.values())) + 1,
+    )
+    a = layer(src, src_box)
+    planes = [Image.fromarray(np.ascontiguousarray(a[..., c]), "F") for c in range(a.shape[2])]
+    out = np.zeros((b-t, r-l, a.shape[2]), dtype=np.float32)
+    for grid in grids:
+        def corner(y, x):
+            sx, sy = grid[(y, x)]
+            return sx - src_box[1], sy - src_box[0]
+        mesh = [
+            (
+                (x0-l, y0-t, x1-l, y1-t),
+                corner(y0, x0) + corner(y1, x0) + corner(y1, x1) + corner(y0, x1),
+            )
+            for y0, y1 in zip(ys, ys[1:])
+            for x0, x1 in zip(xs, xs[1:])
+        ]
+        for c, plane in enumerate(planes):
+            out[..., c] += np.asarray(
+                plane.transform((r-l, b-t), Image.MESH, mesh, Image.BILINEAR)
+            )
+    return out / len(grids)
+
+
+def rgb_final(src: np.ndarray, box: tuple, geo: dict) -> np.ndarray:
+    """ Spherized sub-pixel layer with a light zoom blur. """
+    a = remap(rgb_layer, src, box, 0.09, [0.972*(1+z) for z in (-0.002, 0, 0.002)], geo)
+    return levels(a, 22, 255, 1.0, 0, 255)
+
+
+GLOW_HALO = 90  # Covers the glow blur, keeps boxes on the 3px glow grid
+
+
+def glow_layer(rgb: np.ndarray) -> np.ndarray:
+    """ Blurred highlights of the sub-pixel layer, done at a third of the size. """
+    a = maximum(levels(rgb, 30, 250, 0.95, 0, 255), 2)
+    h, w = a.shape[:2]
+    k = 3
+    small = a[:h//k*k, :w//k*k].reshape(h//k, k, w//k, k, 3).mean(axis=(1, 3))
+    small = gaussian_blur(small, 24/k)
+    return np.stack([
+        np.asarray(Image.fromarray(np.ascontiguousarray(small[..., c]), "F").resize((w, h), Image.BILINEAR))
+        for c in range(3)
+    ], axis=-1)
+
+
+def composite(src: np.ndarray, box: tuple, geo: dict) -> np.ndarray:
+    """ Flattened CRT stack for the box, at working scale. """
+    out = remap(crt_final, src, box, 0.085, [0.9705], geo)
+    lcd = remap(lcd_layer, src, box, 0.095, [0.971], geo)
+    out += 0.3 * (lcd - out)
+    glow_box = grow(box, GLOW_HALO)
+    rgb = rgb_final(src, glow_box, geo)
+    out += 0.7 * trim(rgb, GLOW_HALO)
+    np.clip(out, 0, 1, out=out)
+    glow = glow_layer(rgb)
+
+    def glow_crop(_, sb):
+        t, l = sb[0]-glow_box[0], sb[1]-glow_box[1]
+        return glow[t:t+sb[2]-sb[0], l:l+sb[3]-sb[1]]
+
+    out += 0.3 * remap(glow_crop, src, box, 0, [1.008], geo)
+    return np.clip(out, 0, 1, out=out)
+
+
+def geometry(size: tuple) -> dict:
+    """ Spherize circle for a (width, height) source, covers the whole card. """
+    w, h = size[0]*SCALE, size[1]*SCALE
+    return {"cy": h/2, "cx": w/2, "rad": math.hypot(w/2, h/2)}
+
+
+def to_image(a: np.ndarray) -> Image.Image:
+    return Image.fromarray(np.round(np.clip(a, 0, 1) * 255).astype(np.uint8), "RGB")
+
+
+def output_size(size: tuple) -> tuple:
+    """ Final 800dpi size, same as the Photoshop blow_up: 8x plus 100px bleed. """
+    bleed = DPI // 8
+    return size[0]*OUT_SCALE + bleed*2, size[1]*OUT_SCALE + bleed*2
+
+
+"""
+Tiling. Tiles are whole source pixels, so the 9px patterns line up on every
+tile and each one maps onto exactly 8x its size in the output.
+"""
+
+TILE_BYTES = 160  # Peak bytes per working pixel of a tile, halos included
+TILE_HALO = 120  # Working pixels around a tile that get rendered and thrown away
+
+
+def tile_cells(max_memory: int) -> int:
+    """ Side of the largest square tile, in source pixels, that fits in max_memory MB. """
+    side = math.isqrt(int(max_memory * 2**20 / TILE_BYTES)) - TILE_HALO*2
+    return max(side // SCALE - 2, 8)
+
+
+def tiles(size: tuple, cells: int=None):
+    """ Yield (top, left, bottom, right) source pixel boxes covering the card and bleed. """
+    w, h = size
+    cells = cells or max(w, h) + PAD*2
+    for top in range(-PAD, h+PAD, cells):
+        for left in range(-PAD, w+PAD, cells):
+            yield top, left, min(top+cells, h+PAD), min(left+cells, w+PAD)
+
+
+def render_tile(src: np.ndarray, cells: tuple, geo: dict) -> np.ndarray:
+    """ Output pixels for one tile, rendered with an extra source pixel all around for the resample. """
+    top, left, bottom, right = cells
+    box = (top-1)*SCALE, (left-1)*SCALE, (bottom+1)*SCALE, (right+1)*SCALE
+    im = to_image(composite(src, box, geo)).resize(
+        ((right-left+2)*OUT_SCALE, (bottom-top+2)*OUT_SCALE), Image.LANCZOS
+    )
+    return np.asarray(im)[OUT_SCALE:-OUT_SCALE, OUT_SCALE:-OUT_SCALE]
+
+
+def render(image: Image.Image, out: np.ndarray, cells: int=None) -> np.ndarray:
+    """
+    Fill out, an output_size uint8 RGB array, one tile at a time.
+    out can be a np.memmap, only one tile is ever held in memory.
+    """
+    src = np.asarray(image.convert("RGB"), dtype=np.float32) / 255
+    geo = geometry(image.size)
+    crop = PAD*OUT_SCALE - DPI//8
+    h, w = out.shape[:2]
+    for box in tiles(image.size, cells):
+        tile = render_tile(src, box, geo)
+        y = (box[0]+PAD)*OUT_SCALE - crop
+        x = (box[1]+PAD)*OUT_SCALE - crop
+        ty, tx = max(-y, 0), max(-x, 0)
+        y, x = max(y, 0), max(x, 0)
+        th, tw = min(tile.shape[0]-ty, h-y), min(tile.shape[1]-tx, w-x)
+        out[y:y+th, x:x+tw] = tile[ty:ty+th, tx:tx+tw]
+    return out
+
+
+def crt_filter(image: Image.Image, max_memory: int=None) -> Image.Image:
+    """
+    Apply the CRT filter to a flattened 100dpi render.
+    Returns the 800dpi image, same framing as crt_tools.blow_up(filter=True).
+    max_memory: Rough cap in MB on the working set, renders in tiles when given.
+    """
+    w, h = output_size(image.size)
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    render(image, out, tile_cells(max_memory) if max_memory else None)
+    return Image.fromarray(out, "RGB")
+
+
+def crt_filter_file(image: Image.Image, dst_path: str, max_memory: int=512) -> str:
+    """
+    Tiled CRT filter straight to a PNG on disk.
+    The output goes through a memory-mapped buffer, so the full 800dpi image never sits in memory.
+    """
+    w, h = output_size(image.size)
+    fd, raw_path = tempfile.mkstemp(suffix=".raw", dir=os.path.dirname(os.path.abspath(dst_path)))
+    os.close(fd)
+    try:
+        out = np.memmap(raw_path, dtype=np.uint8, mode="w+", shape=(h, w, 3))
+        render(image, out, tile_cells(max_memory))
+        out.flush()
+        write_png(dst_path, out)
+        del out
+    finally:
+        os.remove(raw_path)
+    return dst_path
+
+
+def write_png(path: str, pixels: np.ndarray, dpi: int=DPI, band: int=256):
+    """ Stream an HxWx3 uint8 array to an RGB PNG, a band of rows at a time. """
+    h, w = pixels.shape[:2]
+
+    def chunk(kind: bytes, data: bytes):
+        fp.write(struct.pack(">I", len(data)) + kind + data)
+        fp.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    ppm = round(dpi / 0.0254)
+    comp = zlib.compressobj(6)
+    with open(path, "wb") as fp:
+        fp.write(b"\x89PNG\r\n\x1a\n")
+        chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+        chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+        for y in range(0, h, band):
+            rows = np.asarray(pixels[y:y+band]).reshape(-1, w*3)
+            # Sub filter on every row
+            filtered = np.empty((rows.shape[0], w*3+1), dtype=np.uint8)
+            filtered[:, 0] = 1
+            filtered[:, 1:4] = rows[:, :3]
+            filtered[:, 4:] = rows[:, 3:] - rows[:, :-3]
+            data = comp.compress(filtered.tobytes())
+            if data:
+                chunk(b"IDAT", data)
+        chunk(b"IDAT", comp.flush())
+        chunk(b"IEND", b"")
+
+
+def blow_up(image: Image.Image, filter: bool=True, max_memory: int=None) -> Image.Image:
+    """ Offline crt_tools.blow_up, 100dpi image in, 800dpi image out. """
+    if filter:
+        return crt_filter(image, max_memory)
+    bleed = DPI // 8
+    big = image.convert("RGB").resize(
+        (image.width*OUT_SCALE, image.height*OUT_SCALE), Image.NEAREST
+    )
+    out = Image.new("RGB", output_size(image.size))
+    out.paste(big, (bleed, bleed))
+    return out
+
+
+def process_file(src_path: str, dst_path: str, filter: bool=True, max_memory: int=None) -> str:
+    """
+    Blow up an image file and save it at 800dpi.
+    With max_memory (MB) the filter runs tiled and streams to disk.
+    """
+    with Image.open(src_path) as im:
+        if filter and max_memory:
+            return crt_filter_file(im, dst_path, max_memory)
+        out = blow_up(im, filter)
+    out.save(dst_path, dpi=(DPI, DPI))
+    return dst_path
@@ -1,5 +1,9 @@
 import photoshop.api as ps
 import os
+import tempfile
+
+import crt_filter
+import tools
 
 app = ps.Application()
 cid = app.charIDToTypeID
@@ -53,30 +57,91 @@ def pattern_make(file):
     doc.close(ps.SaveOptions.DoNotSaveChanges)
 
 
+class PatternRegistry:
+    """
+    Session cache of the assets/*.png patterns in Photoshop's preset manager.
+    Asks Photoshop once which ones exist, loads the missing ones in one pass,
+    and keeps the fill descriptors around for reuse.
+    """
+    files = [
+        os.path.join(os.path.dirname(__file__), "assets", f)
+        for f in ("crt9x9.png", "rgb18x9.png", "r18x9.png", "g18x9.png", "b18x9.png", "scan1x9.png")
+    ]
+
+    def __init__(self):
+        self.loaded = None
+        self.fills = {}
+
+    @staticmethod
+    def name(file):
+        return os.path.splitext(os.path.basename(file))[0]
+
+    def existing(self):
+        """ Names of every pattern preset currently in Photoshop. """
+        ref = ps.ActionReference()
+        ref.putEnumerated(cid("capp"), cid("Ordn"), cid("Trgt"))
+        presets = app.executeActionGet(ref).getList(sid("presetManager"))
+        for i in range(presets.count):
+            if presets.getObjectType(i) == cid("PttR"):
+                names = presets.getObjectValue(i).getList(cid("Nm  "))
+                return {names.getString(n) for n in range(names.count)}
+        return set()
+
+    def load(self):
+        """ Make any asset patterns Photoshop doesn't have yet, only the first call talks to Photoshop. """
+        if self.loaded is not None:
+            return self.loaded
+        existing = self.existing()
+        for file in self.files:
+            if self.name(file) not in existing:
+                pattern_make(file)
+        self.loaded = {self.name(f) for f in self.files}
+        return self.loaded
+
+    def fill_desc(self, file, x=0, y=0):
+        """ Paint bucket descriptor for a pattern, built once per pattern and origin. """
+        name = self.name(file)
+        if name not in self.load():
+            pattern_make(file)
+            self.loaded.add(name)
+        key = (name, x, y)
+        if key not in self.fills:
+            desc1 = ps.ActionDescriptor()
+            desc2 = ps.ActionDescriptor()
+            desc2.putUnitDouble(cid("Hrzn"), cid("#Pxl"), x)
+            desc2.putUnitDouble(cid("Vrtc"), cid("#Pxl"), y)
+            desc1.putObject(cid("From"), cid("Pnt "), desc2)
+            desc1.putInteger(cid("Tlrn"), 0)
+            desc1.putEnumerated(cid("Usng"), cid("FlCn"), cid("Ptrn"))
+            desc3 = ps.ActionDescriptor()
+            desc3.putString(cid("Nm  "), name)
+            desc1.putObject(cid("Ptrn"), cid("Ptrn"), desc3)
+            desc1.putBoolean(cid("Cntg"), False)
+            self.fills[key] = desc1
+        return self.fills[key]
+
+    def reset(self):
+        """ Forget everything, the next fill asks Photoshop again. """
+        self.loaded = None
+        self.fills = {}
+
+
+patterns = PatternRegistry()
+
+
 def pattern_fill(layer, file, x=0, y=0):
-    name = os.path.splitext(os.path.basename(file))[0]
+    desc = patterns.fill_desc(file, x, y)
     old_layer = app.activeDocument.activeLayer
     app.activeDocument.activeLayer = layer
     app.currentTool = "bucketTool"
-    desc1 = ps.ActionDescriptor()
-    desc2 = ps.ActionDescriptor()
-    desc2.putUnitDouble(cid("Hrzn"), cid("#Pxl"), x)
-    desc2.putUnitDouble(cid("Vrtc"), cid("#Pxl"), y)
-    desc1.putObject(cid("From"), cid("Pnt "), desc2)
-    desc1.putInteger(cid("Tlrn"), 0)
-    desc1.putEnumerated(cid("Usng"), cid("FlCn"), cid("Ptrn"))
-    desc3 = ps.ActionDescriptor()
-    desc3.putString(cid("Nm  "), name)
-    desc1.putObject(cid("Ptrn"), cid("Ptrn"), desc3)
-    desc1.putBoolean(cid("Cntg"), False)
-    while True:
-        try:
-            app.executeAction(cid("Fl  "), desc1, 3)
-        except:
-            pattern_make(file)
-        else:
-            break
-    app.activeDocument.activeLayer = old_layer
+    try:
+        app.executeAction(cid("Fl  "), desc, 3)
+    except Exception as e:
+        # Pattern went missing mid-session, re-check with Photoshop on the next fill
+        patterns.reset()
+        raise RuntimeError(f"Pattern fill with '{patterns.name(file)}' failed: {e}") from e
+    finally:
+        app.activeDocument.activeLayer = old_layer
 
 
 def channel_select(chan="all"):
@@ -111,7 +176,7 @@ def chroma_shift(layer, delta):
 
 
 def lens_blur(radius: int, bright=0, threshold=255, noise_amount=0, mono=False, depth_mask=None, invert=False):
-    desc = ps.ActionDescriptor()
+    desc = tools.batch.desc()
     desc.putInteger(cid("BkDp"), 0)
     if depth_mask:
         desc.putEnumerated(cid("BkDi"), cid("BtDi"), cid("BeIt"))
@@ -128,7 +193,7 @@ def lens_blur(radius: int, bright=0, threshold=255, noise_amount=0, mono=False,
     desc.putInteger(cid("BkNa"), noise_amount)
     desc.putEnumerated(cid("BkNt"), cid("BtNt"), cid("BeNg"))
     desc.putBoolean(cid("BkNm"), mono)
-    app.executeAction(cid("Bokh"), desc)
+    tools.batch.execute(cid("Bokh"), desc)
 
 
 def img_resize(
@@ -144,7 +209,8 @@ def img_resize(
     w_percent: Percent width.
     h_percent: Percent height.
     resolution: Document resolution.
-    resample: "nearestNeighbor", "bicubicSharper", "bicubicAutomatic" valid strings.
+    resample: "nearestNeighbor", "bicubicSharper", "bicubicAutomatic" valid strings,
+        None to keep the pixels as they are and only change the resolution.
     constraint: Don't remember, I think it locks proportions if scaling by resolution.
     """
     app.activeDocument = doc
@@ -160,11 +226,12 @@ def img_resize(
     dsc.putUnitDouble(cid("Rslt"), cid("#Rsl"), resolution)
     dsc.putBoolean(cid("CnsP"), constraint)
     dsc.putBoolean(sid("scaleStyles"), True)
-    dsc.putEnumerated(cid("Intr"), cid("Intp"), sid(resample))
+    if resample:
+        dsc.putEnumerated(cid("Intr"), cid("Intp"), sid(resample))
     app.executeAction(cid("ImgS"), dsc)
 
 
-def blow_up(filter):
+def blow_up(filter, offline=True, max_memory=None):
 
     doc = app.activeDocument
 
@@ -174,8 +241,12 @@ def blow_up(filter):
         delta = doc.resolution / 8
         doc.crop([-delta, -delta, doc.width + delta, doc.height + delta])
         return doc
+    if offline:
+        return blow_up_offline(doc, max_memory)
     doc.flatten()
     img_resize(doc, 900, 900, 900, "nearestNeighbor")
+    patterns.load()
+    app.activeDocument = doc
     default_colors()
     color_exchange()
 
@@ -316,3 +387,41 @@ def blow_up(filter):
     # l, t, r, b = d, d, original_w+d, original_h+d
     doc.crop([l, t, r, b])
     img_resize(doc, resolution=800, resample="bicubicSharper")
+
+
+def blow_up_offline(doc, max_memory=None):
+    """
+    Hand the flattened 100dpi render to crt_filter, then place the 800dpi result back in.
+    Same framing as the Photoshop filter, without the round trips.
+    max_memory: Working set cap in MB, the filter runs in tiles and streams to disk.
+    """
+    doc.flatten()
+    tmp_path = tempfile.gettempdir()
+    flat_file = os.path.join(tmp_path, f"crt_{doc.id}_100.png")
+    crt_file = os.path.join(tmp_path, f"crt_{doc.id}_800.png")
+    export_png(doc, flat_file)
+    crt_filter.process_file(flat_file, crt_file, max_memory=max_memory)
+
+    # Grow the canvas to the filtered render's size without resampling, it gets covered anyway
+    img_resize(doc, resolution=crt_filter.DPI, resample=None)
+    width, height = doc.width, doc.height
+    pad_w = width * (crt_filter.OUT_SCALE - 1) / 2 + crt_filter.DPI / 8
+    pad_h = height * (crt_filter.OUT_SCALE - 1) / 2 + crt_filter.DPI / 8
+    doc.crop([-pad_w, -pad_h, width + pad_w, height + pad_h])
+    tools.place_image(doc.artLayers[0], crt_file)
+    doc.flatten()
+    for file in (flat_file, crt_file):
+        os.remove(file)
+    return doc
+
+
+def export_png(doc, file):
+    """ Save a PNG copy of the document, leaving it open as is. """
+    doc.saveAs(file, ps.PNGSaveOptions(), True)
+    return file
+
+
+def queue_render(doc, file):
+    """ Flatten and save the 100dpi render for crt_batch.py to filter later. """
+    doc.flatten()
+    return export_png(doc, file)
@@ -0,0 +1,181 @@
+"""
+PRESHTILDEATH DITHER
+NumPy dithering for pixel art: ordered Bayer, blue noise and error diffusion,
+onto fixed retro palettes or one made for the art.
+Run it to time every method on a random art sized image:
+    python plugins/preshtildeath/dither.py [width height]
+"""
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import pixel_art
+
+
+def hex_palette(colors: str) -> np.ndarray:
+    return np.array([[int(c[i:i+2], 16) for i in (0, 2, 4)] for c in colors.split()], np.float32)
+
+
+PALETTES = {
+    # 2C02 colors without the duplicate blacks
+    "nes": hex_palette(
+        "7C7C7C 0000FC 0000BC 4428BC 940084 A80020 A81000 881400 503000 007800 006800 005800 004058 000000 "
+        "BCBCBC 0078F8 0058F8 6844FC D800CC E40058 F83800 E45C10 AC7C00 00B800 00A800 00A844 008888 "
+        "F8F8F8 3CBCFC 6888FC 9878F8 F878F8 F85898 F87858 FCA044 F8B800 B8F818 58D854 58F898 00E8D8 787878 "
+        "FCFCFC A4E4FC B8B8F8 D8B8F8 F8B8F8 F8A4C0 F0D0B0 FCE0A8 F8D878 D8F878 B8F8B8 B8F8D8 00FCFC D8D8D8"
+    ),
+    "gb": hex_palette("0F380F 306230 8BAC0F 9BBC0F"),
+    "pico8": hex_palette(
+        "000000 1D2B53 7E2553 008751 AB5236 5F574F C2C3C7 FFF1E8 "
+        "FF004D FFA300 FFEC27 00E436 29ADFF 83769C FF77A8 FFCCAA"
+    ),
+}
+KERNELS = {
+    # (dy, dx, weight)
+    "floyd": ((0, 1, 7/16), (1, -1, 3/16), (1, 0, 5/16), (1, 1, 1/16)),
+    "atkinson": ((0, 1, 1/8), (0, 2, 1/8), (1, -1, 1/8), (1, 0, 1/8), (1, 1, 1/8), (2, 0, 1/8)),
+}
+METHODS = ("none", "bayer", "bluenoise", *KERNELS)
+
+
+@lru_cache(maxsize=None)
+def bayer(n: int=8) -> np.ndarray:
+    """ n x n Bayer thresholds in [0, 1), n a power of two. """
+    m = np.zeros((1, 1))
+    while len(m) < n:
+        m = np.block([[4*m, 4*m + 2], [4*m + 3, 4*m + 1]])
+    return (m + 0.5) / m.size
+
+
+@lru_cache(maxsize=None)
+def blue_noise(n: int=64, sigma: float=1.5) -> np.ndarray:
+    """
+    n x n blue noise thresholds in [0, 1), made with void and cluster.
+    Takes a moment, so it's made once per process.
+    """
+    # Toroidal gaussian to measure how clustered each spot is
+    d = np.minimum(np.arange(n), n - np.arange(n))
+    g = np.exp(-(d[:, None]**2 + d[None, :]**2) / (2 * sigma**2))
+    fg = np.fft.rfft2(g)
+
+    def energy(pattern):
+        return np.fft.irfft2(np.fft.rfft2(pattern) * fg, s=(n, n))
+
+    rng = np.random.default_rng(0)
+    pattern = np.zeros((n, n), bool)
+    pattern.flat[rng.choice(n*n, n*n // 10, replace=False)] = True
+    # Settle the seed points: move the tightest cluster into the biggest void until it's stable
+    while True:
+        e = energy(pattern)
+        cluster = np.where(pattern, e, -np.inf).argmax()
+        pattern.flat[cluster] = False
+        e = energy(pattern)
+        void = np.where(pattern, np.inf, e).argmin()
+        pattern.flat[void] = True
+        if void == cluster:
+            break
+
+    def shifted(i):
+        return np.roll(np.roll(g, i // n, 0), i % n, 1)
+
+    rank = np.zeros(n*n, np.int32)
+    ones = int(pattern.sum())
+    # Take points out of clusters for the low ranks
+    p, e = pattern.copy(), energy(pattern)
+    for r in range(ones - 1, -1, -1):
+        i = np.where(p.ravel(), e.ravel(), -np.inf).argmax()
+        p.flat[i] = False
+        e -= shifted(i)
+        rank[i] = r
+    # Fill voids for the rest
+    p, e = pattern.copy(), energy(pattern)
+    for r in range(ones, n*n):
+        i = np.where(p.ravel(), np.inf, e.ravel()).argmin()
+        p.flat[i] = True
+        e += shifted(i)
+        rank[i] = r
+    return (rank.reshape(n, n) + 0.5) / (n*n)
+
+
+def spread(palette: np.ndarray) -> float:
+    """ How far apart neighbouring palette colors are, sets the ordered dither strength. """
+    d = np.sqrt(((palette[:, None] - palette[None, :]) ** 2).sum(-1))
+    np.fill_diagonal(d, np.inf)
+    return float(np.median(d.min(1)))
+
+
+def ordered(pixels: np.ndarray, palette: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """ Nudge each pixel by the tiled threshold matrix, then snap to the palette. """
+    h, w = pixels.shape[:2]
+    reps = (-(-h // len(matrix)), -(-w // len(matrix)))
+    offset = (np.tile(matrix, reps)[:h, :w] - 0.5) * spread(palette)
+    nudged = pixels + offset[..., None]
+    return pixel_art.nearest_color(nudged.reshape(-1, 3), palette).reshape(h, w)
+
+
+def diffuse(pixels: np.ndarray, palette: np.ndarray, kernel: tuple) -> np.ndarray:
+    """
+    Error diffusion, vectorized along wavefronts: with x + k*y as the step, every
+    pixel in a step already has all its incoming error. Rows are sheared by k*y
+    so each step is a plain column slice.
+    """
+    h, w = pixels.shape[:2]
+    k = max(1, max(-(-(1 - dx) // dy) for dy, dx, _ in kernel if dy > 0))
+    pad = max(abs(dx) for _, dx, _ in kernel)
+    down = max(dy for dy, _, _ in kernel)
+    steps = w + k * (h - 1)
+    buf = np.zeros((h + down, steps + k * down + pad * 2, 3), np.float32)
+    for y in range(h):
+        buf[y, pad + k*y : pad + k*y + w] = pixels[y]
+    index = np.zeros((h, steps), np.intp)
+    pal_sq = (palette ** 2).sum(1)
+    for t in range(steps):
+        y0, y1 = max(0, -(-(t - w + 1) // k)), min(h - 1, t // k) + 1
+        c = t + pad
+        old = buf[y0:y1, c]
+        nearest = (pal_sq - 2 * old @ palette.T).argmin(1)
+        index[y0:y1, t] = nearest
+        err = old - palette[nearest]
+        for dy, dx, weight in kernel:
+            buf[y0 + dy : y1 + dy, c + dx + k*dy] += err * weight
+    # Shear back
+    return index[np.arange(h)[:, None], np.arange(w)[None, :] + k * np.arange(h)[:, None]]
+
+
+def dither(pixels: np.ndarray, palette: np.ndarray, method: str="bayer") -> np.ndarray:
+    """ Palette index for every pixel of an (h, w, 3) float array. """
+    pixels = pixels.astype(np.float32)
+    palette = palette.astype(np.float32)
+    if method == "bayer":
+        return ordered(pixels, palette, bayer(8))
+    if method == "bluenoise":
+        return ordered(pixels, palette, blue_noise())
+    if method in KERNELS:
+        return diffuse(pixels, palette, KERNELS[method])
+    return pixel_art.nearest_color(pixels.reshape(-1, 3), palette).reshape(pixels.shape[:2])
+
+
+def get_palette(name: str, pixels: np.ndarray=None, colors: int=16) -> np.ndarray:
+    """ A fixed palette by name, or "adaptive" for one made from the art. """
+    if name in PALETTES:
+        return PALETTES[name]
+    return pixel_art.adaptive_palette(pixels, colors)
+
+
+def benchmark(width: int=230, height: int=172, rounds: int=10):
+    pixels = np.random.default_rng(0).random((height, width, 3), np.float32) * 255
+    blue_noise()
+    for pal in ("adaptive", *PALETTES):
+        palette = get_palette(pal, pixels)
+        for method in METHODS:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                dither(pixels, palette, method)
+            ms = (time.perf_counter() - start) / rounds * 1000
+            print(f"{pal:>8} {method:>9}: {ms:6.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:3]))
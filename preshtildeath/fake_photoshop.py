@@ -0,0 +1,1287 @@
+"""
+PRESHTILDEATH FAKE PHOTOSHOP
+Recording stand-in for photoshop.api, so the plugin can run away from a Windows/Photoshop box
+for profiling and regression checks. Template documents come from JSON snapshots of the PSDs'
+layer trees, and every call is counted and charged a simulated latency by call type.
+    import fake_photoshop
+    backend = fake_photoshop.install()  # Before anything imports photoshop.api
+Snapshots get taken on a Photoshop box, with the template open and active:
+    python plugins/preshtildeath/fake_photoshop.py snapshot fullart-modular
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import os.path as path
+import sys
+import time
+import types
+from collections import Counter
+
+SNAPSHOT_FOLDER = path.join(path.dirname(__file__), "assets", "ps_snapshots")
+# Seconds per call, rough numbers from timing the real thing over COM
+LATENCY = {
+    "open": 1.5,  # Template PSDs take seconds to parse
+    "action": 0.004,
+    "get": 0.003,
+    "script": 0.015,
+    "method": 0.003,
+    "property": 0.001,
+    "descriptor": 0.0003,
+    "id": 0.0002,
+}
+# String IDs Photoshop maps onto char IDs, so cid and sid agree like they do for real
+ALIASES = {
+    "null": "null", "layer": "Lyr ", "document": "Dcmn", "name": "Nm  ", "select": "slct",
+    "show": "Shw ", "hide": "Hd  ", "make": "Mk  ", "duplicate": "Dplc", "delete": "Dlt ",
+    "move": "move", "property": "Prpr", "target": "Trgt", "ordinal": "Ordn", "to": "T   ",
+    "snapshotClass": "SnpS", "historyState": "HstS", "currentHistoryState": "CrnH",
+    "itemIndex": "ItmI", "from": "From", "using": "Usng", "placeEvent": "Plc ", "set": "setd",
+    "open": "Opn ", "channel": "Chnl", "selection": "fsel", "mergeLayersNew": "Mrg2",
+    "makeVisible": "MkVs", "get": "getd", "imageSize": "ImgS", "width": "Wdth", "height": "Hght",
+    "resolution": "Rslt", "as": "As  ", "textLayer": "TxLr", "background": "Bckg",
+}
+CHARS = {code: name for name, code in ALIASES.items()}
+# Events that load a layer's transparency into the selection, see tools.select_nonblank_pixels
+SELECT_MODES = {"set": "replace", "Add ": "add", "Sbtr": "subtract", "Intr": "intersect"}
+NORMAL, TEXT = 1, 2  # LayerKind values
+PLACE_INSIDE, PLACE_AT_BEGINNING, PLACE_AT_END, PLACE_BEFORE, PLACE_AFTER = range(5)
+
+backend = None  # The installed Backend
+
+
+class TypeIDs:
+    """ Stable type IDs: char codes pack into 4 bytes like Photoshop's, other string IDs get numbered. """
+    def __init__(self):
+        self.strings = {}
+        self.names = {}
+
+    @staticmethod
+    def char(code: str) -> int:
+        return int.from_bytes(code.ljust(4)[:4].encode("latin-1"), "big")
+
+    def string(self, name: str) -> int:
+        if name in ALIASES:
+            return self.char(ALIASES[name])
+        if name not in self.strings:
+            self.strings[name] = 0x10000 + len(self.strings)
+            self.names[self.strings[name]] = name
+        return self.strings[name]
+
+    def to_char(self, type_id: int) -> str:
+        return type_id.to_bytes(4, "big").decode("latin-1") if type_id >= 0x20202020 else ""
+
+    def to_string(self, type_id: int) -> str:
+        if type_id in self.names:
+            return self.names[type_id]
+        code = self.to_char(type_id)
+        return CHARS.get(code, code)
+
+
+class Enum:
+    """ Photoshop enum namespace, known values as numbers and the rest by name. """
+    def __init__(self, name: str, **values):
+        self._name = name
+        self._values = values
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return self._values.get(item, f"{self._name}.{item}")
+
+
+class Photoshop:
+    """ Base of every stand-in, like photoshop.api._core.Photoshop. """
+
+
+class Fake(Photoshop):
+    """
+    Plain attributes live in _state. Reading or writing one is a property round trip,
+    writes recorded as "name=", and anything the stand-in doesn't model is a method that does nothing.
+    """
+    def __init__(self, **state):
+        object.__setattr__(self, "_state", state)
+
+    def _tick(self, name: str, kind: str="property"):
+        backend.tick(kind, f"{type(self).__name__}.{name}")
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in self._state:
+            self._tick(name)
+            return self._state[name]
+
+        def method(*args, **kwargs):
+            self._tick(name, "method")
+        return method
+
+    def __setattr__(self, name, value):
+        if name.startswith("_") or isinstance(getattr(type(self), name, None), property):
+            return object.__setattr__(self, name, value)
+        self._tick(f"{name}=")
+        self._state[name] = value
+
+
+def field(name: str, readonly: bool=False) -> property:
+    """ Property backed by _name that counts as a round trip. """
+    def fget(self):
+        self._tick(name)
+        return getattr(self, f"_{name}")
+
+    def fset(self, value):
+        self._tick(f"{name}=")
+        setattr(self, f"_{name}", value)
+    return property(fget, None if readonly else fset)
+
+
+"""
+ACTION MANAGER
+"""
+
+
+class ActionDescriptor(Fake):
+    def __init__(self):
+        super().__init__()
+        self._items = {}  # type ID: (kind, value, extra)
+
+    def _put(self, kind: str, key: int, value, extra=None):
+        self._tick(f"put{kind}", "descriptor")
+        self._items[key] = (kind, value, extra)
+
+    def _get(self, kind: str, key: int, default=None):
+        self._tick(f"get{kind}", "descriptor")
+        item = self._items.get(key)
+        return default if item is None else item[1]
+
+    def putBoolean(self, key, value): self._put("Boolean", key, bool(value))
+    def putInteger(self, key, value): self._put("Integer", key, int(value))
+    def putDouble(self, key, value): self._put("Double", key, float(value))
+    def putString(self, key, value): self._put("String", key, str(value))
+    def putPath(self, key, value): self._put("Path", key, str(value))
+    def putClass(self, key, value): self._put("Class", key, value)
+    def putUnitDouble(self, key, unit, value): self._put("UnitDouble", key, float(value), unit)
+    def putEnumerated(self, key, enum_type, value): self._put("Enumerated", key, value, enum_type)
+    def putObject(self, key, cls, value): self._put("Object", key, value, cls)
+    def putReference(self, key, value): self._put("Reference", key, value)
+    def putList(self, key, value): self._put("List", key, value)
+
+    def getBoolean(self, key): return self._get("Boolean", key, False)
+    def getInteger(self, key): return int(self._get("Integer", key, 0))
+    def getDouble(self, key): return float(self._get("Double", key, 0.0))
+    def getString(self, key): return self._get("String", key, "")
+    def getPath(self, key): return self._get("Path", key, "")
+    def getClass(self, key): return self._get("Class", key, 0)
+    def getUnitDoubleValue(self, key): return float(self._get("UnitDouble", key, 0.0))
+    def getEnumerationValue(self, key): return self._get("Enumerated", key, 0)
+    def getObjectValue(self, key): return self._get("Object", key) or ActionDescriptor()
+    def getReference(self, key): return self._get("Reference", key) or ActionReference()
+    def getList(self, key): return self._get("List", key) or ActionList()
+
+    def getUnitDoubleType(self, key):
+        self._tick("getUnitDoubleType", "descriptor")
+        item = self._items.get(key)
+        return item[2] if item else TypeIDs.char("#Pxl")
+
+    def hasKey(self, key) -> bool:
+        self._tick("hasKey", "descriptor")
+        return key in self._items
+
+    def erase(self, key):
+        self._tick("erase", "descriptor")
+        self._items.pop(key, None)
+
+    def getKey(self, index: int) -> int:
+        self._tick("getKey", "descriptor")
+        return list(self._items)[index]
+
+    @property
+    def count(self) -> int:
+        self._tick("count", "descriptor")
+        return len(self._items)
+
+    def _value(self, name: str, default=None):
+        """ Stand-in side read, not a round trip. """
+        item = self._items.get(backend.ids.string(name))
+        return default if item is None else item[1]
+
+
+class ActionReference(Fake):
+    def __init__(self):
+        super().__init__()
+        self._items = []  # (form, class ID, value)
+
+    def _put(self, form: str, cls: int, value=None):
+        self._tick(f"put{form}", "descriptor")
+        self._items += [(form, cls, value)]
+
+    def putIdentifier(self, cls, value): self._put("Identifier", cls, value)
+    def putName(self, cls, value): self._put("Name", cls, value)
+    def putIndex(self, cls, value): self._put("Index", cls, value)
+    def putOffset(self, cls, value): self._put("Offset", cls, value)
+    def putProperty(self, cls, value): self._put("Property", cls, value)
+    def putClass(self, cls): self._put("Class", cls)
+    def putEnumerated(self, cls, enum_type, value): self._put("Enumerated", cls, value)
+
+    def _entries(self):
+        ids = backend.ids
+        return [(form, ids.to_string(cls), value) for form, cls, value in self._items]
+
+
+class ActionList(Fake):
+    def __init__(self):
+        super().__init__()
+        self._items = []  # (kind, value, extra)
+
+    def _put(self, kind: str, value, extra=None):
+        self._tick(f"put{kind}", "descriptor")
+        self._items += [(kind, value, extra)]
+
+    def _get(self, kind: str, index: int, default=None):
+        self._tick(f"get{kind}", "descriptor")
+        return self._items[index][1] if 0 <= index < len(self._items) else default
+
+    def putBoolean(self, value): self._put("Boolean", bool(value))
+    def putInteger(self, value): self._put("Integer", int(value))
+    def putDouble(self, value): self._put("Double", float(value))
+    def putString(self, value): self._put("String", str(value))
+    def putUnitDouble(self, unit, value): self._put("UnitDouble", float(value), unit)
+    def putEnumerated(self, enum_type, value): self._put("Enumerated", value, enum_type)
+    def putObject(self, cls, value): self._put("Object", value, cls)
+    def putReference(self, value): self._put("Reference", value)
+    def putList(self, value): self._put("List", value)
+
+    def getBoolean(self, index): return self._get("Boolean", index, False)
+    def getInteger(self, index): return int(self._get("Integer", index, 0))
+    def getDouble(self, index): return float(self._get("Double", index, 0.0))
+    def getString(self, index): return self._get("String", index, "")
+    def getUnitDoubleValue(self, index): return float(self._get("UnitDouble", index, 0.0))
+    def getObjectValue(self, index): return self._get("Object", index) or ActionDescriptor()
+    def getReference(self, index): return self._get("Reference", index) or ActionReference()
+    def getList(self, index): return self._get("List", index) or ActionList()
+
+    @property
+    def count(self) -> int:
+        self._tick("count", "descriptor")
+        return len(self._items)
+
+
+def make_descriptor(**items) -> ActionDescriptor:
+    """ Stand-in side descriptor, name=(kind, value) or name=(kind, value, extra). """
+    desc = ActionDescriptor()
+    for name, item in items.items():
+        kind, value, *extra = item
+        desc._items[backend.ids.string(name)] = (kind, value, extra[0] if extra else None)
+    return desc
+
+
+def make_list(kind: str, values: list) -> ActionList:
+    lst = ActionList()
+    lst._items = [(kind, value, None) for value in values]
+    return lst
+
+
+def bounds_descriptor(bounds) -> ActionDescriptor:
+    pixels = TypeIDs.char("#Pxl")
+    return make_descriptor(**{side: ("UnitDouble", value, pixels) for side, value in zip(("left", "top", "right", "bottom"), bounds)})
+
+
+"""
+DOCUMENT MODEL
+"""
+
+
+class TextItem(Fake):
+    """
+    Text that lays itself out roughly: characters half an em wide, lines 1.2 em apart.
+    Snapshot text keeps its recorded bounds until something about it changes.
+    """
+    def __init__(self, layer, contents: str="", size: float=12, font: str="", box: float=None, position=(0, 0), fixed=None):
+        super().__init__(justification=None, color=None, baselineShift=0.0, tracking=0, autoKerning=None, antiAliasMethod=None)
+        self._layer = layer
+        self._contents = contents
+        self._size = float(size)
+        self._leading = None
+        self._font = font
+        self._width = box
+        self._position = list(position)
+        self._fixed = list(fixed) if fixed else None
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):
+            object.__setattr__(self, "_fixed", None)
+        super().__setattr__(name, value)
+
+    contents = field("contents")
+    size = field("size")
+    font = field("font")
+    width = field("width")
+    position = field("position")
+
+    @property
+    def leading(self):
+        # Auto leading still reads back as a number
+        self._tick("leading")
+        return self._leading or self._size * 1.2
+
+    @leading.setter
+    def leading(self, value):
+        self._tick("leading=")
+        self._leading = value
+
+    @property
+    def kind(self):
+        self._tick("kind")
+        return "TextType.ParagraphText" if self._width else "TextType.PointText"
+
+    @property
+    def height(self):
+        self._tick("height")
+        left, top, right, bottom = self._bounds()
+        return bottom - top
+
+    def _bounds(self) -> list:
+        if self._fixed:
+            return list(self._fixed)
+        left, top = self._position
+        if not self._contents:
+            return [left, top, left, top]
+        doc = self._layer._doc()
+        scale = (doc._resolution if doc else 72) / 72
+        em = self._size * scale
+        lines = str(self._contents).replace("\n", "\r").split("\r")
+        longest = max(len(line) for line in lines) * em / 2
+        if self._width:
+            per_line = max(1, int(self._width // (em / 2)))
+            count = sum(max(1, math.ceil(len(line) / per_line)) for line in lines)
+            width = min(self._width, longest)
+        else:
+            count, width = len(lines), longest
+        height = count * (self._leading or self._size * 1.2) * scale
+        return [left, top, left + width, top + height]
+
+
+class Layer(Fake):
+    """ What ArtLayer and LayerSet have in common. Layers keep their children top first. """
+    def __init__(self, name: str, layer_id: int=None, parent=None, visible: bool=True, bounds=(0, 0, 0, 0)):
+        super().__init__(opacity=100.0, fillOpacity=100.0, blendMode=None, allLocked=False, isBackgroundLayer=False)
+        self._name = name
+        self._id = layer_id or backend.new_id()
+        self._parent = parent
+        self._visible = visible
+        self._bounds = list(bounds)
+
+    name = field("name")
+    id = field("id", readonly=True)
+    visible = field("visible")
+    parent = field("parent", readonly=True)
+
+    @property
+    def bounds(self):
+        self._tick("bounds")
+        return tuple(self._get_bounds())
+
+    @property
+    def typename(self):
+        self._tick("typename")
+        return type(self).__name__
+
+    def _doc(self):
+        node = self
+        while node is not None and not isinstance(node, Document):
+            node = node._parent
+        return node
+
+    def _path(self) -> tuple:
+        node, names = self, []
+        while isinstance(node, Layer):
+            names.insert(0, node._name)
+            node = node._parent
+        return tuple(names)
+
+    def _detach(self):
+        self._parent._children.remove(self)
+
+    def _place(self, relative, placement):
+        """ Put this layer next to or inside relative, ElementPlacement style. """
+        if placement in (PLACE_INSIDE, PLACE_AT_BEGINNING, PLACE_AT_END) or relative is None:
+            parent = relative if relative is not None else self._doc()
+            index = len(parent._children) if placement == PLACE_AT_END else 0
+        else:
+            parent = relative._parent
+            index = parent._children.index(relative) + (placement == PLACE_AFTER)
+        self._parent = parent
+        parent._children.insert(index, self)
+
+    def _clone(self):
+        """ Copy with fresh IDs, not yet in the tree. """
+        twin = copy.deepcopy(self, {id(self._parent): self._parent, id(backend): backend})
+        for layer in twin._walk():
+            layer._id = backend.new_id()
+        return twin
+
+    def _walk(self):
+        yield self
+
+    def translate(self, dx=0, dy=0):
+        self._tick("translate", "method")
+        self._shift(float(dx), float(dy))
+
+    def resize(self, width=100, height=100, anchor=None):
+        self._tick("resize", "method")
+        left, top, right, bottom = self._get_bounds()
+        self._scale(float(width) / 100, float(height) / 100, (left + right) / 2, (top + bottom) / 2)
+
+    def remove(self):
+        self._tick("remove", "method")
+        doc = self._doc()
+        self._detach()
+        if doc and doc._active is self:
+            doc._active = doc._children[0] if doc._children else None
+
+    def duplicate(self, relativeObject=None, insertionLocation=None):
+        self._tick("duplicate", "method")
+        twin = self._clone()
+        twin._name = f"{self._name} copy"
+        twin._place(relativeObject or self, insertionLocation if relativeObject else PLACE_BEFORE)
+        return twin
+
+    def move(self, relativeObject, insertionLocation):
+        self._tick("move", "method")
+        self._detach()
+        self._place(relativeObject, insertionLocation)
+
+
+class ArtLayer(Layer):
+    def __init__(self, name: str="Layer", layer_id: int=None, parent=None, visible: bool=True, bounds=(0, 0, 0, 0), kind: int=NORMAL, text: dict=None):
+        super().__init__(name, layer_id, parent, visible, bounds)
+        self._kind = kind
+        self._text = TextItem(self, **(text or {})) if kind == TEXT else None
+        self._made_up = False
+
+    @property
+    def kind(self):
+        self._tick("kind")
+        return self._kind
+
+    @kind.setter
+    def kind(self, value):
+        self._tick("kind=")
+        if value == TEXT and self._text is None:
+            self._text = TextItem(self, position=self._bounds[:2])
+        self._kind = value
+
+    @property
+    def textItem(self):
+        self._tick("textItem")
+        if self._text is None and self._made_up:
+            # Made up for a missing snapshot, it might as well be the text layer that was asked for
+            self._kind, self._text = TEXT, TextItem(self, position=self._bounds[:2], box=self._bounds[2] - self._bounds[0])
+        if self._text is None:
+            raise RuntimeError(f"{self._name} is not a text layer")
+        return self._text
+
+    def _get_bounds(self) -> list:
+        return self._text._bounds() if self._text else list(self._bounds)
+
+    def _shift(self, dx, dy):
+        if self._text:
+            self._text._position = [self._text._position[0] + dx, self._text._position[1] + dy]
+            if self._text._fixed:
+                self._text._fixed = [self._text._fixed[0] + dx, self._text._fixed[1] + dy, self._text._fixed[2] + dx, self._text._fixed[3] + dy]
+        self._bounds = [self._bounds[0] + dx, self._bounds[1] + dy, self._bounds[2] + dx, self._bounds[3] + dy]
+
+    def _scale(self, fx, fy, cx, cy):
+        if self._text:
+            text = self._text
+            text._size *= fy
+            text._width = text._width * fx if text._width else None
+            text._position = [cx + (text._position[0] - cx) * fx, cy + (text._position[1] - cy) * fy]
+            text._fixed = None
+        left, top, right, bottom = self._bounds
+        self._bounds = [cx + (left - cx) * fx, cy + (top - cy) * fy, cx + (right - cx) * fx, cy + (bottom - cy) * fy]
+
+    def merge(self):
+        """ Merge down into the layer below. """
+        self._tick("merge", "method")
+        return self._merge_down()
+
+    def _merge_down(self):
+        siblings = self._parent._children
+        below = siblings[siblings.index(self) + 1]
+        below._bounds = union(below._get_bounds(), self._get_bounds())
+        self._detach()
+        return below
+
+    def rasterize(self, target=None):
+        self._tick("rasterize", "method")
+        if self._text:
+            self._bounds, self._text, self._kind = self._text._bounds(), None, NORMAL
+
+
+class LayerSet(Layer):
+    def __init__(self, name: str="Group", layer_id: int=None, parent=None, visible: bool=True, bounds=(0, 0, 0, 0)):
+        super().__init__(name, layer_id, parent, visible, bounds)
+        self._children = []
+
+    @property
+    def artLayers(self):
+        self._tick("artLayers")
+        return Layers(self, ArtLayer)
+
+    @property
+    def layerSets(self):
+        self._tick("layerSets")
+        return Layers(self, LayerSet)
+
+    @property
+    def layers(self):
+        self._tick("layers")
+        return Layers(self, Layer)
+
+    def _walk(self):
+        yield self
+        for child in self._children:
+            yield from child._walk()
+
+    def _get_bounds(self) -> list:
+        boxes = [b for b in (c._get_bounds() for c in self._children) if b[2] > b[0] and b[3] > b[1]]
+        return union(*boxes) if boxes else [0, 0, 0, 0]
+
+    def _shift(self, dx, dy):
+        for child in self._children:
+            child._shift(dx, dy)
+
+    def _scale(self, fx, fy, cx, cy):
+        for child in self._children:
+            child._scale(fx, fy, cx, cy)
+
+    def merge(self):
+        """ Flatten the group into one layer. """
+        self._tick("merge", "method")
+        layer = ArtLayer(self._name, parent=self._parent, visible=self._visible, bounds=self._get_bounds())
+        siblings = self._parent._children
+        siblings[siblings.index(self)] = layer
+        return layer
+
+
+def union(*boxes) -> list:
+    return [min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)]
+
+
+class Layers(Fake):
+    """ artLayers, layerSets or layers of a document or group. """
+    def __init__(self, owner, cls):
+        super().__init__()
+        self._owner = owner
+        self._cls = cls
+
+    def _items(self) -> list:
+        return [c for c in self._owner._children if isinstance(c, self._cls)]
+
+    def getByName(self, name: str):
+        self._tick("getByName", "method")
+        for layer in self._items():
+            if layer._name == name:
+                return layer
+        path_names = (*getattr(self._owner, "_path", lambda: ())(), name)
+        if backend.strict:
+            raise LookupError(f"No layer {'/'.join(path_names)}")
+        # No snapshot had it, make one up so the render can carry on
+        backend.missing.add(path_names)
+        doc = self._owner if isinstance(self._owner, Document) else self._owner._doc()
+        if self._cls is LayerSet:
+            layer = LayerSet(name, parent=self._owner)
+        else:
+            layer = ArtLayer(name, parent=self._owner, bounds=(0, 0, doc._width, doc._height))
+            layer._made_up = True
+        self._owner._children.append(layer)
+        return layer
+
+    def add(self):
+        self._tick("add", "method")
+        cls = LayerSet if self._cls is LayerSet else ArtLayer
+        layer = cls(parent=self._owner)
+        self._owner._children.insert(0, layer)
+        doc = self._owner if isinstance(self._owner, Document) else self._owner._doc()
+        if cls is ArtLayer and doc:
+            doc._active = layer
+        return layer
+
+    @property
+    def length(self) -> int:
+        self._tick("length")
+        return len(self._items())
+
+    def __len__(self):
+        self._tick("length")
+        return len(self._items())
+
+    def __iter__(self):
+        self._tick("__iter__", "method")
+        return iter(self._items())
+
+    def __getitem__(self, index):
+        self._tick("__getitem__", "method")
+        return self._items()[index]
+
+
+class Selection(Fake):
+    def __init__(self, doc):
+        super().__init__()
+        self._doc = doc
+        self._box = None
+
+    @property
+    def bounds(self):
+        self._tick("bounds")
+        if self._box is None:
+            raise RuntimeError("No selection")
+        return tuple(self._box)
+
+    def selectAll(self):
+        self._tick("selectAll", "method")
+        self._box = [0, 0, self._doc._width, self._doc._height]
+
+    def select(self, region, *args, **kwargs):
+        self._tick("select", "method")
+        xs, ys = [p[0] for p in region], [p[1] for p in region]
+        self._box = [min(xs), min(ys), max(xs), max(ys)]
+
+    def deselect(self):
+        self._tick("deselect", "method")
+        self._box = None
+
+
+class Document(Fake):
+    def __init__(self, name: str="Untitled-1", width: float=1500, height: float=2100, resolution: float=300, file: str=None):
+        super().__init__(mode=None, colorProfileName="sRGB IEC61966-2.1", bitsPerChannel=8)
+        self._id = backend.new_doc_id()
+        self._name = name
+        self._fullName = file or name
+        self._width = float(width)
+        self._height = float(height)
+        self._resolution = float(resolution)
+        self._children = []
+        self._active = None
+        self._snapshots = {}
+        self._selection = Selection(self)
+
+    name = field("name", readonly=True)
+    id = field("id", readonly=True)
+    fullName = field("fullName", readonly=True)
+    width = field("width", readonly=True)
+    height = field("height", readonly=True)
+    resolution = field("resolution", readonly=True)
+    selection = field("selection", readonly=True)
+
+    @property
+    def activeLayer(self):
+        self._tick("activeLayer")
+        return self._active
+
+    @activeLayer.setter
+    def activeLayer(self, layer):
+        self._tick("activeLayer=")
+        self._active = layer
+
+    artLayers = LayerSet.artLayers
+    layerSets = LayerSet.layerSets
+    layers = LayerSet.layers
+
+    def _walk(self):
+        for child in self._children:
+            yield from child._walk()
+
+    def _find_id(self, layer_id: int):
+        return next((layer for layer in self._walk() if layer._id == layer_id), None)
+
+    def _find_name(self, name: str):
+        return next((layer for layer in self._walk() if layer._name == name), None)
+
+    def _stack(self) -> list:
+        """ Bottom up stack the way ItemIndex counts it, None for the end marker of each group. """
+        stack = []
+
+        def add(children):
+            for child in reversed(children):
+                if isinstance(child, LayerSet):
+                    stack.append(None)
+                    add(child._children)
+                stack.append(child)
+        add(self._children)
+        return stack
+
+    def _item_index(self, layer) -> int:
+        return self._stack().index(layer) + 1
+
+    def _by_index(self, index: int):
+        stack = self._stack()
+        return stack[index - 1] if 0 < index <= len(stack) else None
+
+    def _copy(self, state: dict) -> dict:
+        return copy.deepcopy(state, {id(self): self, id(backend): backend})
+
+    def _snapshot(self) -> dict:
+        return self._copy({"children": self._children, "active": self._active, "size": (self._width, self._height, self._resolution)})
+
+    def _restore(self, snapshot: dict):
+        state = self._copy(snapshot)
+        self._children, self._active = state["children"], state["active"]
+        self._width, self._height, self._resolution = state["size"]
+
+    def _json(self) -> dict:
+        def item(layer):
+            left, top, right, bottom = layer._get_bounds()
+            entry = {
+                "name": layer._name,
+                "id": layer._id,
+                "type": "layerSection" if isinstance(layer, LayerSet) else "textLayer" if layer._text else "layer",
+                "visible": layer._visible,
+                "bounds": {"top": top, "left": left, "bottom": bottom, "right": right},
+            }
+            if isinstance(layer, LayerSet):
+                entry["layers"] = [item(c) for c in layer._children]
+            elif layer._text:
+                entry["text"] = {"textKey": layer._text._contents}
+            return entry
+        return {
+            "width": self._width, "height": self._height, "resolution": self._resolution,
+            "layers": [item(c) for c in self._children],
+        }
+
+    def close(self, saving=None):
+        self._tick("close", "method")
+        backend.close(self)
+
+    def saveAs(self, file, options=None, asCopy=True, extensionType=None):
+        """ Writes a flat grey image of the right size, for steps that read the render back. """
+        self._tick("saveAs", "method")
+        try:
+            from PIL import Image
+        except ImportError:
+            return
+        dpi = (self._resolution, self._resolution)
+        Image.new("RGB", (int(self._width), int(self._height)), (128, 128, 128)).save(file, dpi=dpi)
+
+    def flatten(self):
+        self._tick("flatten", "method")
+        self._children = [ArtLayer("Background", parent=self, bounds=(0, 0, self._width, self._height))]
+        self._active = self._children[0]
+
+    def crop(self, bounds, angle=None, width=None, height=None):
+        self._tick("crop", "method")
+        left, top, right, bottom = bounds
+        for child in self._children:
+            child._shift(-left, -top)
+        self._width, self._height = right - left, bottom - top
+
+    def resizeImage(self, width=None, height=None, resolution=None, automatic=None):
+        self._tick("resizeImage", "method")
+        fx = width / self._width if width else 1
+        fy = height / self._height if height else fx
+        self._resize(fx, fy, resolution)
+
+    def _resize(self, fx, fy, resolution=None):
+        for child in self._children:
+            child._scale(fx, fy, 0, 0)
+        self._width, self._height = self._width * fx, self._height * fy
+        self._resolution = resolution or self._resolution
+
+    def paste(self, intoSelection=False):
+        self._tick("paste", "method")
+        layer = ArtLayer(parent=self, bounds=(0, 0, self._width, self._height))
+        self._children.insert(0, layer)
+        self._active = layer
+        return layer
+
+
+def load_layers(items: list, parent) -> list:
+    """ Layers from a Photoshop document json snapshot. """
+    layers = []
+    for item in items:
+        b = item.get("bounds", {})
+        bounds = (b.get("left", 0), b.get("top", 0), b.get("right", 0), b.get("bottom", 0))
+        if item.get("type") == "layerSection":
+            layer = LayerSet(item["name"], item.get("id"), parent, item.get("visible", True))
+            layer._children = load_layers(item.get("layers", []), layer)
+        elif item.get("type") == "textLayer":
+            text = item.get("text", {})
+            styles = text.get("textStyleRange") or [{}]
+            size = styles[0].get("textStyle", {}).get("size", 12)
+            layer = ArtLayer(item["name"], item.get("id"), parent, item.get("visible", True), bounds, TEXT, {
+                "contents": text.get("textKey", ""),
+                "size": size.get("_value", 12) if isinstance(size, dict) else size,
+                "box": bounds[2] - bounds[0],
+                "position": bounds[:2],
+                "fixed": bounds,
+            })
+        else:
+            layer = ArtLayer(item["name"], item.get("id"), parent, item.get("visible", True), bounds)
+        backend.next_id = max(backend.next_id, layer._id + 1)
+        layers.append(layer)
+    return layers
+
+
+"""
+APPLICATION
+"""
+
+
+class Documents(Fake):
+    def __iter__(self):
+        self._tick("__iter__", "method")
+        return iter(list(backend.documents))
+
+    def __len__(self):
+        self._tick("length")
+        return len(backend.documents)
+
+    @property
+    def length(self) -> int:
+        self._tick("length")
+        return len(backend.documents)
+
+    def getByName(self, name: str):
+        self._tick("getByName", "method")
+        for doc in backend.documents:
+            if doc._name == name:
+                return doc
+        raise LookupError(f"No document {name}")
+
+    def add(self, width=1500, height=2100, resolution=300, name="Untitled-1", *args, **kwargs):
+        self._tick("add", "method")
+        return backend.add_document(Document(name, width, height, resolution))
+
+
+class Application(Fake):
+    def __init__(self, *args, **kwargs):
+        super().__init__(name="Adobe Photoshop", version="fake")
+        self._preferences = Fake(rulerUnits=None, typeUnits=None, interpolation=None)
+
+    preferences = field("preferences", readonly=True)
+
+    @property
+    def activeDocument(self):
+        self._tick("activeDocument")
+        if backend.active is None:
+            raise RuntimeError("No document open")
+        return backend.active
+
+    @activeDocument.setter
+    def activeDocument(self, doc):
+        self._tick("activeDocument=")
+        backend.active = doc
+
+    @property
+    def documents(self):
+        self._tick("documents")
+        return Documents()
+
+    @property
+    def fonts(self):
+        self._tick("fonts")
+        return Fonts()
+
+    def charIDToTypeID(self, code: str) -> int:
+        backend.tick("id", "charIDToTypeID")
+        return backend.ids.char(code)
+
+    def stringIDToTypeID(self, name: str) -> int:
+        backend.tick("id", "stringIDToTypeID")
+        return backend.ids.string(name)
+
+    def typeIDToStringID(self, type_id: int) -> str:
+        backend.tick("id", "typeIDToStringID")
+        return backend.ids.to_string(type_id)
+
+    def typeIDToCharID(self, type_id: int) -> str:
+        backend.tick("id", "typeIDToCharID")
+        return backend.ids.to_char(type_id)
+
+    def executeAction(self, event: int, descriptor=None, display_dialogs=2):
+        name = backend.ids.to_string(event)
+        backend.tick("action", name)
+        return backend.action(name, descriptor or ActionDescriptor())
+
+    def executeActionGet(self, reference):
+        backend.tick("get", "executeActionGet")
+        return backend.action_get(reference)
+
+    def doJavaScript(self, javascript: str, Arguments=None, ExecutionMode=None):
+        # Batched actions only count, their effects on the document aren't played back
+        backend.tick("script", "doJavaScript")
+        backend.scripted += javascript.count("executeAction(")
+        return ""
+
+    def open(self, document_file_path: str, *args, **kwargs):
+        backend.tick("open", path.basename(document_file_path))
+        return backend.open(document_file_path)
+
+    def load(self, document_file_path: str):
+        return self.open(document_file_path)
+
+
+class Fonts(Fake):
+    def getByName(self, name: str):
+        self._tick("getByName", "method")
+        return Fake(name=name, postScriptName=name, family=name)
+
+    def __iter__(self):
+        return iter(())
+
+
+class SolidColor(Fake):
+    def __init__(self, *args, **kwargs):
+        super().__init__(rgb=Fake(red=0, green=0, blue=0, hexValue="000000"))
+
+
+class SaveOptions(Fake):
+    def __init__(self, *args, **kwargs):
+        super().__init__(quality=12, embedColorProfile=True, interlaced=False, compression=6)
+
+
+"""
+BACKEND
+"""
+
+
+class Backend:
+    """
+    The open documents, the call record and the simulated clock.
+    With sleep the latencies are really waited out, so wall clock tools see them too,
+    otherwise they only add up in simulated.
+    """
+    def __init__(self, snapshots: str=SNAPSHOT_FOLDER, latency: dict=None, sleep: bool=False, strict: bool=False):
+        self.snapshots = snapshots
+        self.latency = {**LATENCY, **(latency or {})}
+        self.sleep = sleep
+        self.strict = strict
+        self.ids = TypeIDs()
+        self.documents = []
+        self.active = None
+        self.next_id = 1
+        self.next_doc = 1
+        self.calls = Counter()  # (kind, name): calls
+        self.log = []  # (kind, name) in order
+        self.simulated = 0.0  # Seconds Photoshop would have taken
+        self.scripted = 0  # Actions that went through doJavaScript
+        self.missing = set()  # Layer paths no snapshot had
+
+    def tick(self, kind: str, name: str):
+        self.calls[(kind, name)] += 1
+        self.log.append((kind, name))
+        seconds = self.latency.get(kind, 0)
+        self.simulated += seconds
+        if self.sleep and seconds:
+            time.sleep(seconds)
+
+    def reset(self):
+        """ Clear the record, keep the documents. """
+        self.calls.clear()
+        self.log.clear()
+        self.simulated = 0.0
+        self.scripted = 0
+
+    def summary(self) -> dict:
+        """ {kind: {"calls": n, "seconds": simulated}} """
+        kinds = {}
+        for (kind, _), count in self.calls.items():
+            entry = kinds.setdefault(kind, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += count
+            entry["seconds"] += count * self.latency.get(kind, 0)
+        return kinds
+
+    def report(self, top: int=10) -> str:
+        lines = [f"Fake Photoshop: {len(self.log)} calls, {self.simulated:.2f}s simulated"]
+        for kind, entry in sorted(self.summary().items(), key=lambda k: -k[1]["seconds"]):
+            lines += [f"{kind:>10}: {entry['calls']:6d} calls {entry['seconds']:8.3f}s"]
+        for (kind, name), count in self.calls.most_common(top):
+            lines += [f"{count:6d}x {kind:<10} {name}"]
+        return "\n".join(lines)
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def new_doc_id(self) -> int:
+        self.next_doc += 1
+        return self.next_doc - 1
+
+    def add_document(self, doc: Document) -> Document:
+        self.documents.append(doc)
+        self.active = doc
+        return doc
+
+    def close(self, doc: Document):
+        if doc in self.documents:
+            self.documents.remove(doc)
+        if self.active is doc:
+            self.active = self.documents[-1] if self.documents else None
+
+    def open(self, file: str, height: float=None) -> Document:
+        """ Snapshot documents for templates, sized blanks for images, blank otherwise. """
+        name = path.basename(file)
+        stem = path.splitext(name)[0]
+        snapshot = path.join(self.snapshots, f"{stem}.json")
+        if path.exists(snapshot):
+            with open(snapshot, "r") as fp:
+                data = json.load(fp)
+            doc = Document(name, data.get("width", 1500), data.get("height", 2100), data.get("resolution", 300), file)
+            doc._children = load_layers(data.get("layers", []), doc)
+        else:
+            width, h, dpi = image_size(file)
+            if height:
+                width, h, dpi = width * height / h, height, 800
+            doc = Document(name, width, h, dpi, file)
+            doc._children = [ArtLayer("Background", parent=doc, bounds=(0, 0, width, h))]
+        doc._active = doc._children[0] if doc._children else None
+        return self.add_document(doc)
+
+    def target_layer(self, ref, doc):
+        if doc is None or not isinstance(ref, ActionReference):
+            return None
+        for form, cls, value in ref._entries():
+            if cls != "layer":
+                continue
+            if form == "Identifier":
+                return doc._find_id(value)
+            if form == "Name":
+                return doc._find_name(value)
+            if form == "Index":
+                return doc._by_index(value)
+            if form == "Enumerated":
+                return doc._active
+        return None
+
+    def action(self, name: str, desc: ActionDescriptor) -> ActionDescriptor:
+        """ Play the actions the plugin reads back from, the rest only get recorded. """
+        doc = self.active
+        target = desc._value("null")
+        refs = target._items if isinstance(target, ActionList) else [("Reference", target, None)]
+        refs = [r[1] for r in refs if isinstance(r[1], ActionReference)]
+        ref = refs[0] if refs else None
+        classes = [cls for form, cls, _ in ref._entries() if form == "Class"] if ref else []
+        layer = self.target_layer(ref, doc)
+
+        if name == "get" and ref and any(form == "Property" and self.ids.to_string(v) == "json" for form, _, v in ref._entries()):
+            doc_id = next((v for form, cls, v in ref._entries() if cls == "document"), None)
+            source = next((d for d in self.documents if d._id == doc_id), doc)
+            return make_descriptor(json=("String", json.dumps(source._json())))
+        if name in ("show", "hide"):
+            for r in refs:
+                found = self.target_layer(r, doc)
+                if found is not None:
+                    found._visible = name == "show"
+        elif name == "select":
+            snapshot = next((v for form, cls, v in ref._entries() if cls == "snapshotClass"), None) if ref else None
+            if snapshot is not None:
+                if snapshot not in doc._snapshots:
+                    raise LookupError(f"No snapshot {snapshot}")
+                doc._restore(doc._snapshots[snapshot])
+            elif layer is not None:
+                doc._active = layer
+                if desc._value("makeVisible"):
+                    layer._visible = True
+        elif name == "make" and "snapshotClass" in classes:
+            doc._snapshots[desc._value("name", "Snapshot 1")] = doc._snapshot()
+        elif name == "make" and "layer" in classes:
+            using = desc._value("using")
+            new = ArtLayer(using._value("name", "Layer") if using else "Layer")
+            below = doc._by_index(desc._value("layerID", 0)) or doc._active
+            new._place(below, PLACE_BEFORE)
+            doc._active = new
+        elif name == "duplicate" and layer is not None:
+            twin = layer._clone()
+            twin._name = desc._value("name", f"{layer._name} copy")
+            twin._place(layer, PLACE_BEFORE)
+            doc._active = twin
+        elif name == "delete" and layer is not None:
+            layer._detach()
+        elif name == "move" and layer is not None:
+            to = self.target_layer(desc._value("to"), doc)
+            if to is not None and to is not layer:
+                layer._detach()
+                layer._place(to, PLACE_INSIDE if isinstance(to, LayerSet) else PLACE_BEFORE)
+        elif name == "placeEvent":
+            file = desc._value("null", "")
+            width, height, _ = image_size(file)
+            scale = desc._value("width", 100) / 100
+            cx, cy = doc._width / 2, doc._height / 2
+            new = ArtLayer(path.splitext(path.basename(file))[0])
+            new._bounds = [cx - width * scale / 2, cy - height * scale / 2, cx + width * scale / 2, cy + height * scale / 2]
+            new._place(doc._active, PLACE_BEFORE)
+            doc._active = new
+        elif name == "mergeLayersNew" and isinstance(doc._active, ArtLayer):
+            doc._active = doc._active._merge_down()
+        elif name == "open":
+            settings = desc._value("as")
+            self.open(desc._value("null", ""), settings._value("height") if settings else None)
+        elif name == "imageSize":
+            percent = desc._value("width")
+            resolution = desc._value("resolution")
+            factor = percent / 100 if percent else (resolution / doc._resolution if resolution else 1)
+            if desc._value("Intr") is None:
+                factor = 1  # Resample off, the pixels stay and only the resolution changes
+            doc._resize(factor, factor, resolution)
+        elif name in SELECT_MODES and self.transparency(desc, doc) is not None:
+            self.select_pixels(name, self.transparency(desc, doc), doc)
+        elif name == "set" and isinstance(layer, ArtLayer) and layer._text:
+            text = desc._value("to")
+            if isinstance(text, ActionDescriptor) and text._value("textKey") is not None:
+                layer._text._contents = text._value("textKey")
+                layer._text._fixed = None
+        return ActionDescriptor()
+
+    def transparency(self, desc: ActionDescriptor, doc):
+        """ The layer whose transparency a selection action loads, if that's what it does. """
+        for key in ("to", "null"):
+            ref = desc._value(key)
+            if not isinstance(ref, ActionReference):
+                continue
+            entries = ref._entries()
+            if any(form == "Enumerated" and cls == "channel" for form, cls, _ in entries):
+                return self.target_layer(ref, doc)
+        return None
+
+    def select_pixels(self, mode: str, layer, doc):
+        """ Layer bounds stand in for its pixels, good enough for the boxes the plugin reads back. """
+        box, current = layer._get_bounds(), doc._selection._box
+        if SELECT_MODES[mode] == "add" and current:
+            box = union(current, box)
+        elif SELECT_MODES[mode] == "intersect":
+            box = [max(box[0], current[0]), max(box[1], current[1]), min(box[2], current[2]), min(box[3], current[3])] if current else None
+            box = box if box and box[0] < box[2] and box[1] < box[3] else None
+        elif SELECT_MODES[mode] == "subtract":
+            box = current
+        doc._selection._box = box
+
+    def action_get(self, ref: ActionReference) -> ActionDescriptor:
+        doc = self.active
+        layer = self.target_layer(ref, doc)
+        if layer is not None:
+            bounds = bounds_descriptor(layer._get_bounds())
+            items = {
+                "name": ("String", layer._name),
+                "layerID": ("Integer", layer._id),
+                "itemIndex": ("Integer", doc._item_index(layer)),
+                "background": ("Boolean", layer._state.get("isBackgroundLayer", False)),
+                "visible": ("Boolean", layer._visible),
+                "bounds": ("Object", bounds),
+                "boundsNoEffects": ("Object", bounds),
+            }
+            if isinstance(layer, ArtLayer) and layer._text:
+                text = layer._text
+                shape = make_descriptor(bounds=("Object", bounds_descriptor(text._bounds())))
+                style = make_descriptor(
+                    **{"from": ("Integer", 0), "to": ("Integer", len(text._contents))},
+                    textStyle=("Object", make_descriptor(size=("UnitDouble", text._size, TypeIDs.char("#Pnt")))),
+                )
+                items["textKey"] = ("Object", make_descriptor(
+                    textKey=("String", text._contents),
+                    textShape=("List", make_list("Object", [shape])),
+                    textStyleRange=("List", make_list("Object", [style])),
+                ))
+            return make_descriptor(**items)
+        if doc is not None and any(cls == "document" for _, cls, _ in ref._entries()):
+            return make_descriptor(
+                title=("String", doc._name),
+                width=("UnitDouble", doc._width, TypeIDs.char("#Pxl")),
+                height=("UnitDouble", doc._height, TypeIDs.char("#Pxl")),
+                resolution=("Double", doc._resolution),
+            )
+        return ActionDescriptor()
+
+
+def image_size(file: str) -> tuple:
+    """ (width, height, dpi) of an image file, a card sized guess if it can't be read. """
+    try:
+        from PIL import Image
+        with Image.open(file) as im:
+            return im.width, im.height, float(im.info.get("dpi", (72, 72))[0] or 72)
+    except Exception:
+        return 1500, 2100, 300
+
+
+def enum_getattr(name: str) -> Enum:
+    """ Any enum the stand-in doesn't list, values by name. """
+    if not name[:1].isupper():
+        raise AttributeError(name)
+    return Enum(name)
+
+
+def install(snapshots: str=SNAPSHOT_FOLDER, latency: dict=None, sleep: bool=False, strict: bool=False) -> Backend:
+    """
+    Register the stand-in as photoshop.api. Has to happen before the plugin modules
+    are imported, they bind to photoshop.api at import.
+    strict: a layer missing from the snapshot is an error instead of being made up.
+    """
+    global backend
+    real = sys.modules.get("photoshop.api")
+    if real is not None and not getattr(real, "FAKE", False):
+        raise RuntimeError("photoshop.api is already imported, install the fake first")
+    backend = Backend(snapshots, latency, sleep, strict)
+    api = types.ModuleType("photoshop.api")
+    api.FAKE = True
+    api.__getattr__ = enum_getattr
+    for cls in (Application, ActionDescriptor, ActionReference, ActionList, ArtLayer, LayerSet, Document, SolidColor, TextItem):
+        setattr(api, cls.__name__, cls)
+    for name in ("PNGSaveOptions", "JPEGSaveOptions", "PhotoshopSaveOptions", "TiffSaveOptions"):
+        setattr(api, name, SaveOptions)
+    api.DialogModes = Enum("DialogModes", AllDialogs=1, DisplayErrorDialogs=2, DisplayNoDialogs=3)
+    api.SaveOptions = Enum("SaveOptions", SaveChanges=1, DoNotSaveChanges=2, PromptToSaveChanges=3)
+    api.LayerKind = Enum("LayerKind", NormalLayer=NORMAL, TextLayer=TEXT)
+    api.ElementPlacement = Enum(
+        "ElementPlacement",
+        PlaceInside=PLACE_INSIDE, PlaceAtBeginning=PLACE_AT_BEGINNING, PlaceAtEnd=PLACE_AT_END,
+        PlaceBefore=PLACE_BEFORE, PlaceAfter=PLACE_AFTER,
+    )
+    package = types.ModuleType("photoshop")
+    package.api = api
+    sys.modules["photoshop"] = package
+    sys.modules["photoshop.api"] = api
+    for module, cls in (("_core", Photoshop), ("_artlayer", ArtLayer), ("_layerSet", LayerSet), ("_document", Document)):
+        sub = types.ModuleType(f"photoshop.api.{module}")
+        setattr(sub, cls.__name__, cls)
+        setattr(api, module, sub)
+        sys.modules[sub.__name__] = sub
+    return backend
+
+
+def snapshot(name: str, folder: str=SNAPSHOT_FOLDER) -> str:
+    """ Save the active document's layer tree for the stand-in, needs the real Photoshop. """
+    import photoshop.api as ps
+    app = ps.Application()
+    doc = app.activeDocument
+    ref = ps.ActionReference()
+    ref.putProperty(app.stringIDToTypeID("property"), app.stringIDToTypeID("json"))
+    ref.putIdentifier(app.stringIDToTypeID("document"), doc.id)
+    dsc = ps.ActionDescriptor()
+    dsc.putReference(app.stringIDToTypeID("null"), ref)
+    for key in ("expandSmartObjects", "getPathData", "imageInfo", "compInfo"):
+        dsc.putBoolean(app.stringIDToTypeID(key), False)
+    dsc.putBoolean(app.stringIDToTypeID("getTextStyles"), True)
+    dsc.putBoolean(app.stringIDToTypeID("layerInfo"), True)
+    result = app.executeAction(app.stringIDToTypeID("get"), dsc, ps.DialogModes.DisplayNoDialogs)
+    tree = json.loads(result.getString(app.stringIDToTypeID("json")))
+    data = {"width": doc.width, "height": doc.height, "resolution": doc.resolution, "layers": tree.get("layers", [])}
+    os.makedirs(folder, exist_ok=True)
+    file = path.join(folder, f"{name}.json")
+    with open(file, "w") as fp:
+        json.dump(data, fp, indent=1)
+    return file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Take layer tree snapshots for the Photoshop stand-in.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    shot = sub.add_parser("snapshot", help="Snapshot the active Photoshop document.")
+    shot.add_argument("name", help="Template file name without .psd, e.g. fullart-modular")
+    shot.add_argument("--folder", default=SNAPSHOT_FOLDER)
+    args = parser.parse_args()
+    print(f"Saved {snapshot(args.name, args.folder)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+PRESHTILDEATH FAKE PROXYSHOP
+Stand-in for the parts of Proxyshop the plugin imports, so the templates can run on top of
+fake_photoshop without a Proxyshop install. It has the same module names (constants, settings,
+helpers, text_layers, templates, layouts, core), but each one only does enough to get a card through
+StarterTemplate.execute. Text gets set with no symbol fonts, the frame logic only knows the common
+cases, and the helpers send the same kind of actions so they still get counted.
+    import fake_photoshop, fake_proxyshop
+    fake_photoshop.install()
+    fake_proxyshop.install()  # Before anything imports proxyshop
+"""
+import os
+import os.path as path
+import re
+import sys
+import traceback
+import types
+
+WUBRG = "WUBRG"
+SYMBOLS = {
+    "{W}": "ow", "{U}": "ou", "{B}": "ob", "{R}": "or", "{G}": "og", "{C}": "oc",
+    "{X}": "ox", "{T}": "ot", "{Q}": "oq", "{S}": "omn", "{E}": "e",
+    **{f"{{{n}}}": f"o{n}" for n in range(21)},
+    **{f"{{{c}/P}}": f"Qp{c.lower()}" for c in WUBRG},
+}
+
+
+class Constants:
+    """ proxyshop.constants.con, fonts and colors at their Proxyshop defaults. """
+    def __init__(self):
+        self.cwd = os.getcwd()
+        self.headless = True
+        self.default_layer = "Layer 1"
+        self.font_name = "Beleren2016-Bold"
+        self.font_rules_text = "PlantinMTPro-Regular"
+        self.font_rules_text_italic = "PlantinMTPro-Italic"
+        self.font_rules_text_bold = "PlantinMTPro-Bold"
+        self.font_mana = "NDPMTG"
+        self.symbols = dict(SYMBOLS)
+        self.clr_primary = {"r": 0, "g": 0, "b": 0}
+        self.clr_secondary = {"r": 255, "g": 255, "b": 255}
+        for c, rgb in zip("cwubrg", ("cac5c0", "fffcd6", "aae0fa", "cbc2bf", "f9aa8f", "9bd3ae")):
+            setattr(self, f"clr_{c}", {k: int(rgb[i:i + 2], 16) for k, i in zip("rgb", (0, 2, 4))})
+            setattr(self, f"clri_{c}", {"r": 0, "g": 0, "b": 0})
+        self.clr_bh = dict(self.clr_b)
+        self.clri_bh = dict(self.clri_b)
+
+
+class Config:
+    """ proxyshop.settings.cfg, every setting is its default unless overridden. """
+    def __init__(self, overrides: dict=None):
+        self.overrides = dict(overrides or {})
+        self.remove_flavor = False
+        self.remove_reminder = False
+
+    def get_setting(self, section: str, key: str, default=None, is_bool: bool=True):
+        return self.overrides.get(key, default)
+
+
+class Console:
+    """ proxyshop.core.console, keeps the messages and only prints them with echo. """
+    def __init__(self, echo: bool=False):
+        self.echo = echo
+        self.messages = []
+
+    def update(self, msg: str="", e: Exception=None):
+        self.messages.append(str(msg))
+        if self.echo:
+            print(msg)
+
+
+"""
+HELPERS
+"""
+
+
+def ps():
+    import photoshop.api
+    return photoshop.api
+
+
+def app():
+    return ps().Application()
+
+
+def run(event: str, dsc=None):
+    """ One action on the active document, char or string ID. """
+    a = app()
+    event_id = a.charIDToTypeID(event) if len(event) == 4 else a.stringIDToTypeID(event)
+    return a.executeAction(event_id, dsc or ps().ActionDescriptor(), ps().DialogModes.DisplayNoDialogs)
+
+
+def getLayer(name: str, group=None):
+    """ Proxyshop's getLayer: a name, then a group name, a path of group names or a LayerSet. """
+    doc = app().activeDocument
+    if group is None:
+        return doc.artLayers.getByName(name)
+    if isinstance(group, str):
+        layer_set = doc.layerSets.getByName(group)
+    elif isinstance(group, (list, tuple)):
+        layer_set = doc
+        for group_name in group:
+            layer_set = layer_set.layerSets.getByName(group_name)
+    else:
+        layer_set = group
+    return layer_set.artLayers.getByName(name)
+
+
+def replace_text(layer, find: str, replace: str):
+    app().activeDocument.activeLayer = layer
+    text = layer.textItem
+    text.contents = text.contents.replace(find, replace)
+
+
+def content_fill_empty_area(layer):
+    app().activeDocument.activeLayer = layer
+    run("selectAllLayers")
+    run("fill")
+
+
+def enable_active_layer_mask():
+    run("setd")
+
+
+def disable_mask(layer):
+    app().activeDocument.activeLayer = layer
+    run("setd")
+
+
+def set_layer_mask(layer):
+    app().activeDocument.activeLayer = layer
+    run("Mk  ")
+
+
+def save_document_jpeg(file_name: str):
+    con = sys.modules["proxyshop.constants"].con
+    file = path.join(con.cwd, "out", f"{file_name}.jpg")
+    app().activeDocument.saveAs(file, ps().JPEGSaveOptions(quality=12), True)
+
+
+"""
+TEXT LAYERS
+"""
+
+
+class TextField:
+    def __init__(self, layer, contents: str="", color=None):
+        self.layer = layer
+        self.contents = contents.replace("\n", "\r") if contents else ""
+        self.color = color
+
+    def execute(self):
+        self.layer.visible = True
+        self.layer.textItem.contents = self.contents
+
+
+class FormattedTextField(TextField):
+    """ Symbols go in as their font characters, with no second pass to color them. """
+    def __init__(self, layer, contents: str="", color=None, flavor: str="", centered: bool=False):
+        super().__init__(layer, contents, color)
+        self.flavor = flavor
+        self.centered = centered
+
+    def execute(self):
+        con = sys.modules["proxyshop.constants"].con
+        self.contents = re.sub(r"{[^}]+}", lambda m: con.symbols.get(m.group(), m.group()), self.contents)
+        super().execute()
+        if self.centered:
+            self.layer.textItem.justification = ps().Justification.Center
+
+
+class ScaledTextField(TextField):
+    """ Steps the font size down until the text clears its reference on the right. """
+    def __init__(self, layer, contents: str="", color=None, reference=None):
+        super().__init__(layer, contents, color)
+        self.reference = reference
+
+    def execute(self):
+        super().execute()
+        if self.reference is None:
+            return
+        ref_left = self.reference.bounds[0]
+        text = self.layer.textItem
+        while text.size > 1 and self.layer.bounds[2] > ref_left > self.layer.bounds[0]:
+            text.size -= 0.2
+
+
+"""
+LAYOUTS
+"""
+
+
+def color_string(colors) -> str:
+    return "".join(c for c in WUBRG if c in colors)
+
+
+def frame_layers(mana_cost: str, type_line: str, colors, color_identity) -> dict:
+    """
+    Simplified select_frame_layers: pinlines, twins, background and colorless,
+    named the way the templates name their color layers.
+    """
+    if "Land" in type_line:
+        identity = color_string(color_identity)
+        pinlines = identity if 0 < len(identity) <= 2 else "Gold" if identity else "Land"
+        twins = pinlines if len(pinlines) == 1 or pinlines == "Gold" else "Land"
+        return {"pinlines": pinlines, "twins": twins, "background": "Land", "is_colorless": False}
+    colors = color_string(colors or re.findall(r"[WUBRG]", mana_cost or ""))
+    if len(colors) == 1:
+        pinlines = twins = background = colors
+    elif len(colors) == 2:
+        pinlines, twins, background = colors, "Gold", "Gold"
+    elif colors:
+        pinlines = twins = background = "Gold"
+    else:
+        pinlines = twins = background = "Artifact" if "Artifact" in type_line else "Colorless"
+    if "Artifact" in type_line:
+        background = "Artifact"
+    return {"pinlines": pinlines, "twins": twins, "background": background, "is_colorless": not colors}
+
+
+class NormalLayout:
+    card_class = "normal"
+
+    def __init__(self, scryfall: dict, file: dict):
+        self.scryfall = scryfall
+        self.file = file
+        self.filename = file["filename"]
+        face = self.face()
+        self.name = face["name"]
+        self.mana_cost = face.get("mana_cost", "")
+        self.type_line = face.get("type_line", "")
+        # Loyalty costs come with a real minus sign
+        self.oracle_text = face.get("oracle_text", "").replace("\u2212", "-")
+        self.flavor_text = face.get("flavor_text", "")
+        self.power = face.get("power")
+        self.toughness = face.get("toughness")
+        self.loyalty = face.get("loyalty")
+        self.artist = file.get("artist") or face.get("artist") or scryfall.get("artist", "")
+        self.set = (file.get("set") or scryfall["set"]).upper()
+        self.rarity = scryfall.get("rarity", "common")
+        self.collector_number = scryfall.get("collector_number", "")
+        self.card_count = None
+        self.color_identity = scryfall.get("color_identity", [])
+        self.is_nyx = "nyxtouched" in scryfall.get("frame_effects", [])
+        self.transform_icon = None
+        frame = frame_layers(self.mana_cost, self.type_line, face.get("colors"), self.color_identity)
+        self.pinlines = frame["pinlines"]
+        self.twins = frame["twins"]
+        self.background = frame["background"]
+        self.is_colorless = frame["is_colorless"]
+
+    def face(self) -> dict:
+        return self.scryfall
+
+
+class PlaneswalkerLayout(NormalLayout):
+    card_class = "planeswalker"
+
+
+class BasicLandLayout(NormalLayout):
+    card_class = "basic"
+
+
+class ModalDoubleFacedLayout(NormalLayout):
+    """ Picks the face the art file is named after. """
+    def __init__(self, scryfall: dict, file: dict):
+        super().__init__(scryfall, file)
+        self.card_class = self.face_class("mdfc")
+        self.transform_icon = "modal_dfc"
+
+    def face(self) -> dict:
+        faces = self.scryfall["card_faces"]
+        self.side = next((i for i, f in enumerate(faces) if f["name"] == self.file["name"]), 0)
+        return {**self.scryfall, **faces[self.side]}
+
+    def face_class(self, kind: str) -> str:
+        """ e.g. mdfc_front, or pw_mdfc_back for a planeswalker face. """
+        prefix = "pw_" if "Planeswalker" in self.type_line else ""
+        return f"{prefix}{kind}_{'front' if self.side == 0 else 'back'}"
+
+
+class TransformLayout(ModalDoubleFacedLayout):
+    def __init__(self, scryfall: dict, file: dict):
+        super().__init__(scryfall, file)
+        self.card_class = self.face_class("tf" if "Planeswalker" in self.type_line else "transform")
+        self.transform_icon = "sunmoondfc"
+
+
+"""
+TEMPLATES
+"""
+
+
+class StarterTemplate:
+    """ The render steps in the order Proxyshop runs them, False back when one of them raises. """
+    template_file_name = "normal"
+    template_suffix = ""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.tx_layers = []
+        self.docref = None
+        self.art_layer = None
+
+    @property
+    def is_creature(self) -> bool:
+        return bool(self.layout.power and self.layout.toughness)
+
+    @property
+    def is_legendary(self) -> bool:
+        return "Legendary" in self.layout.type_line
+
+    @property
+    def is_land(self) -> bool:
+        return "Land" in self.layout.type_line
+
+    @property
+    def is_colorless(self) -> bool:
+        return self.layout.is_colorless
+
+    @property
+    def twins(self) -> str:
+        return self.layout.twins
+
+    @property
+    def pinlines(self) -> str:
+        return self.layout.pinlines
+
+    @property
+    def background(self) -> str:
+        return self.layout.background
+
+    def load_template(self):
+        con = sys.modules["proxyshop.constants"].con
+        app().load(path.join(con.cwd, "templates", f"{self.template_file_name}.psd"))
+        self.docref = app().activeDocument
+
+    def load_artwork(self): pass
+    def collector_info(self): pass
+    def enable_frame_layers(self): pass
+    def basic_text_layers(self): pass
+    def rules_text_and_pt_layers(self): pass
+    def post_text_layers(self): pass
+    def post_execute(self): pass
+
+    def get_file_name(self) -> str:
+        return self.layout.name
+
+    def reset(self):
+        if self.docref is not None:
+            self.docref.close(ps().SaveOptions.DoNotSaveChanges)
+
+    def execute(self) -> bool:
+        console = sys.modules["proxyshop.core"].console
+        try:
+            self.load_template()
+            self.art_layer = getLayer(sys.modules["proxyshop.constants"].con.default_layer)
+            self.load_artwork()
+            self.collector_info()
+            self.enable_frame_layers()
+            self.basic_text_layers()
+            self.rules_text_and_pt_layers()
+            for layer in self.tx_layers:
+                layer.execute()
+            self.post_text_layers()
+            save_document_jpeg(self.get_file_name())
+            self.post_execute()
+        except Exception as e:
+            console.update(f"Render failed: {e}\n{traceback.format_exc()}", e)
+            print(console.messages[-1])
+            self.reset()
+            return False
+        self.reset()
+        return True
+
+
+class NormalTemplate(StarterTemplate):
+    """ Only here for the plugin's M15 subclasses to import, it renders nothing of its own. """
+    template_file_name = "normal"
+
+
+"""
+INSTALL
+"""
+
+
+def install(settings: dict=None, echo: bool=False) -> types.ModuleType:
+    """
+    Register the stand-in as proxyshop. fake_photoshop has to be installed first,
+    and both before the plugin modules get imported.
+    settings: get_setting overrides by key, everything else gets its default.
+    """
+    real = sys.modules.get("proxyshop")
+    if real is not None and not getattr(real, "FAKE", False):
+        raise RuntimeError("proxyshop is already imported, install the fake first")
+    package = types.ModuleType("proxyshop")
+    package.FAKE = True
+    package.__path__ = []
+    members = {
+        "constants": {"con": Constants()},
+        "settings": {"cfg": Config(settings), "Config": Config},
+        "core": {"console": Console(echo)},
+        "helpers": {
+            f.__name__: f for f in (
+                getLayer, replace_text, content_fill_empty_area, enable_active_layer_mask,
+                disable_mask, set_layer_mask, save_document_jpeg,
+            )
+        },
+        "text_layers": {c.__name__: c for c in (TextField, FormattedTextField, ScaledTextField)},
+        "templates": {c.__name__: c for c in (StarterTemplate, NormalTemplate)},
+        "layouts": {
+            c.__name__: c for c in (
+                NormalLayout, PlaneswalkerLayout, BasicLandLayout, ModalDoubleFacedLayout, TransformLayout
+            )
+        },
+    }
+    members["__console__"] = members["core"]
+    sys.modules["proxyshop"] = package
+    for name, attrs in members.items():
+        module = types.ModuleType(f"proxyshop.{name}")
+        module.__dict__.update(attrs)
+        setattr(package, name, module)
+        sys.modules[module.__name__] = module
+    return package
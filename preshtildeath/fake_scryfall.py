@@ -0,0 +1,143 @@
+"""
+PRESHTILDEATH FAKE SCRYFALL
+Local stand-in for the two Scryfall endpoints the plugin uses, for benchmarks and offline runs.
+    python plugins/preshtildeath/fake_scryfall.py [--port 8765] [--latency 0.05] [--fail-every 0]
+then set SCRYFALL_API=http://127.0.0.1:8765 and SCRYFALL_SVGS=http://127.0.0.1:8765 before starting.
+"""
+import argparse
+import hashlib
+import json
+import os.path as path
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set code: icon key, a few real cases where the two differ
+SETS = {
+    "neo": "neo", "dmu": "dmu", "bro": "bro", "one": "one", "mom": "mom",
+    "tneo": "neo", "pneo": "neo", "con": "con", "m21": "m21", "2xm": "2xm",
+    "lea": "lea", "leb": "lea", "2ed": "2ed", "mh2": "mh2", "cmr": "cmr",
+    "mid": "mid", "war": "war", "znr": "znr",
+    "soi": "soi", "khm": "khm", "ltr": "ltr", "mp2": "mp2",
+}
+STARTED = formatdate(time.time(), usegmt=True)
+
+
+def fake_svg(key: str) -> str:
+    """ Deterministic icon with packed arc flags, like the real ones. """
+    seed = int(hashlib.md5(key.encode()).hexdigest()[:6], 16)
+    arcs = " ".join(f"a{10 + (seed >> i) % 20} {10 + (seed >> i) % 20} 0 01{i % 7}.{i} -{i % 5}" for i in range(24))
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">'
+        f'<path d="M16 2{arcs}z"/></svg>'
+    )
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeScryfall/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send(self, status: int, body: bytes=b"", content_type: str="application/json", headers: dict=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.requests += 1
+            count = srv.requests
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.fail_every and count % srv.fail_every == 0:
+            return self.send(503, b'{"object": "error", "status": 503}')
+
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "sets":
+            return self.send(404, b'{"object": "error", "status": 404}')
+        name = parts[1].lower()
+
+        if name.endswith(".svg"):
+            key = name[:-4]
+            if key not in SETS.values():
+                return self.send(404, b"", "text/plain")
+            body = srv.svg(key).encode()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self.send(304, headers={"ETag": etag})
+            return self.send(200, body, "image/svg+xml", {"ETag": etag, "Last-Modified": STARTED})
+
+        if name not in SETS:
+            return self.send(404, b'{"object": "error", "code": "not_found", "status": 404}')
+        host = f"http://{self.headers.get('Host')}"
+        body = json.dumps({
+            "object": "set",
+            "code": name,
+            "icon_svg_uri": f"{host}/sets/{SETS[name]}.svg?{int(time.time())}",
+        }).encode()
+        self.send(200, body)
+
+
+class FakeScryfall(ThreadingHTTPServer):
+    """
+    Serves /sets/<code> and /sets/<key>.svg, with optional per-request latency
+    and a 503 on every nth request to exercise retries. SVGs come from fixtures
+    (the plugin's own SVG cache by default) or are made up on the spot.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int=0, latency: float=0, fail_every: int=0, fixtures: str=None, verbose: bool=False):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fixtures = fixtures
+        self.verbose = verbose
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def svg(self, key: str) -> str:
+        file = path.join(self.fixtures, f"{key.upper()}.svg") if self.fixtures else None
+        if file and path.exists(file):
+            with open(file, "r") as fp:
+                return fp.read()
+        return fake_svg(key)
+
+    def start(self) -> "FakeScryfall":
+        """ Serve from a background thread, for use inside a benchmark. """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Scryfall set endpoints.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds to wait before each response.")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every nth request with a 503.")
+    parser.add_argument(
+        "--fixtures",
+        default=path.join(path.dirname(__file__), "assets", "Set Symbols"),
+        help="Folder of <KEY>.svg files to serve.",
+    )
+    args = parser.parse_args()
+    server = FakeScryfall(args.port, args.latency, args.fail_every, args.fixtures, verbose=True)
+    print(f"Fake Scryfall on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
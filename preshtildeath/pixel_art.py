@@ -0,0 +1,94 @@
+"""
+PRESHTILDEATH PIXEL ART
+Offline art prep for the Pixel Modular template, shrinks and indexes the art before Photoshop sees it.
+"""
+import numpy as np
+from PIL import Image
+
+import dither
+
+
+def area_weights(n_in: int, n_out: int) -> np.ndarray:
+    """ (n_out, n_in) matrix, each output pixel the exact area average of the input pixels it covers. """
+    scale = n_in / n_out
+    edges = np.arange(n_out + 1) * scale
+    px = np.arange(n_in)
+    lo = np.maximum(edges[:-1, None], px[None, :])
+    hi = np.minimum(edges[1:, None], px[None, :] + 1)
+    return (np.clip(hi - lo, 0, None) / scale).astype(np.float32)
+
+
+def area_resize(pixels: np.ndarray, width: int, height: int) -> np.ndarray:
+    """ Area-average resize of an (h, w, c) array, two matrix products instead of a loop. """
+    wy = area_weights(pixels.shape[0], height)
+    wx = area_weights(pixels.shape[1], width)
+    out = np.einsum("yh,hwc->ywc", wy, pixels.astype(np.float32))
+    return np.einsum("ywc,xw->yxc", out, wx)
+
+
+def load_small(file: str, width: int, height: int) -> np.ndarray:
+    """
+    Art as a float RGB array at width x height. JPEGs decode straight to the
+    nearest 1/2, 1/4 or 1/8 scale that's still big enough, so the full size
+    image never gets decoded.
+    """
+    with Image.open(file) as im:
+        if im.format == "JPEG":
+            im.draft("RGB", (width, height))
+        im = im.convert("RGB")
+        # Box filter whole steps first so the float copy stays small
+        factor = int(min(im.width / width, im.height / height))
+        if factor >= 2:
+            im = im.reduce(factor)
+        pixels = np.asarray(im)
+    return area_resize(pixels, width, height)
+
+
+def kmeans(pixels: np.ndarray, palette: np.ndarray, iterations: int=4, sample: int=20000) -> np.ndarray:
+    """ Refine a palette with a few Lloyd steps on a sample of the pixels. """
+    pixels = pixels.reshape(-1, 3)
+    if len(pixels) > sample:
+        pixels = pixels[np.random.default_rng(0).choice(len(pixels), sample, replace=False)]
+    palette = palette.astype(np.float32)
+    for _ in range(iterations):
+        nearest = nearest_color(pixels, palette)
+        sums = np.zeros_like(palette)
+        np.add.at(sums, nearest, pixels)
+        counts = np.bincount(nearest, minlength=len(palette))[:, None]
+        palette = np.where(counts > 0, sums / np.maximum(counts, 1), palette)
+    return palette
+
+
+def nearest_color(pixels: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """ Index of the closest palette color for each pixel, pixels (n, 3). """
+    # |p - c|^2 without the |p|^2 term, it's the same for every color
+    dist = (palette ** 2).sum(1)[None, :] - 2 * pixels @ palette.T
+    return dist.argmin(1)
+
+
+def adaptive_palette(pixels: np.ndarray, colors: int=16, refine: int=4) -> np.ndarray:
+    """ Median cut palette for the art, tightened up with k-means. """
+    im = Image.fromarray(np.clip(pixels + 0.5, 0, 255).astype(np.uint8))
+    median = im.quantize(colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    palette = np.array(median.getpalette()[:colors * 3], np.float32).reshape(-1, 3)
+    return kmeans(pixels, palette, refine) if refine else palette
+
+
+def cover_size(size: tuple, box: tuple) -> tuple:
+    """ Smallest size with the art's aspect that still covers the box. """
+    scale = max(box[0] / size[0], box[1] / size[1])
+    return max(round(size[0] * scale), box[0]), max(round(size[1] * scale), box[1])
+
+
+def prepare_art(file: str, dst: str, size: tuple, palette: str="adaptive", method: str="bayer", colors: int=16, dpi: float=100) -> str:
+    """
+    Shrink the art to size, dither it onto the palette and save an indexed PNG for place_image.
+    palette: "adaptive" or one of dither.PALETTES. method: one of dither.METHODS.
+    """
+    pixels = load_small(file, *size)
+    colors = dither.get_palette(palette, pixels, colors)
+    index = dither.dither(pixels, colors, method)
+    im = Image.fromarray(index.astype(np.uint8), "P")
+    im.putpalette(np.clip(colors + 0.5, 0, 255).astype(np.uint8).flatten().tolist())
+    im.save(dst, dpi=(dpi, dpi))
+    return dst
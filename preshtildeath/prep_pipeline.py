@@ -0,0 +1,143 @@
+"""
+PRESHTILDEATH PREP PIPELINE
+Gets the CPU side of the next few cards ready in a process pool while Photoshop renders the current one.
+Proxyshop still drives the batch, so the lookahead is the rest of the art folder, keyed by art path.
+"""
+import atexit
+import os
+import os.path as path
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import art_info
+import pixel_art
+import scryfall
+import set_symbols
+import symbol_prefetch
+
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".webp")
+PIXEL_DIR = path.join(tempfile.gettempdir(), "preshtildeath_prep")
+
+
+def prep_card(file: str, pixel: dict=None) -> dict:
+    """
+    Worker: everything about one card that doesn't need Photoshop or the card's Scryfall data.
+    pixel: prepare_art settings for the Pixel template (size, palette, method, dpi), if it's rendering.
+    """
+    start = time.perf_counter()
+    # Through the on-disk cache, so a rerun over the same folder doesn't probe it all again
+    prep = {"file": file, "info": art_info.art_info(file)}
+    code = set_symbols.set_from_filename(file)
+    if code:
+        prep["set"] = code
+        try:
+            # Index and SVG cache live on disk, the render process picks them up from there
+            prep["set_key"], _ = symbol_prefetch.fetch_symbol(code, scryfall.client)
+        except Exception as e:
+            prep["set_error"] = str(e)
+    if pixel:
+        info = prep["info"]
+        os.makedirs(PIXEL_DIR, exist_ok=True)
+        dst = path.join(PIXEL_DIR, f"{abs(hash((file, tuple(sorted(pixel.items()))))):x}.png")
+        scale = max(pixel["size"][0] / info["width"], pixel["size"][1] / info["height"])
+        if scale < 0.5:
+            size = pixel_art.cover_size((info["width"], info["height"]), pixel["size"])
+            pixel_art.prepare_art(file, dst, size, pixel["palette"], pixel["method"], dpi=pixel["dpi"])
+            prep["pixel_art"] = dst
+            prep["pixel"] = pixel
+    prep["seconds"] = time.perf_counter() - start
+    return prep
+
+
+class PrepPipeline:
+    """
+    Keeps up to depth cards prepared ahead of the one rendering.
+    Tracks how often a render found its prep ready, and how long it waited when it wasn't.
+    """
+    def __init__(self, depth: int=3, workers: int=None):
+        self.depth = depth
+        self.workers = workers
+        self.pool = None
+        self.jobs = {}
+        self.done = set()
+        self.metrics = {"submitted": 0, "ready": 0, "waited": 0, "missed": 0, "wait_seconds": 0.0, "prep_seconds": 0.0}
+
+    def upcoming(self, current: str) -> list:
+        """ Art files after the current one in its folder, in the order Proxyshop lists them. """
+        folder = path.dirname(current)
+        files = sorted(
+            path.join(folder, f) for f in os.listdir(folder)
+            if path.splitext(f)[1].lower() in EXTENSIONS
+        )
+        files = [f for f in files if path.normcase(f) != path.normcase(current) and f not in self.done]
+        return files
+
+    def schedule(self, current: str, pixel: dict=None):
+        """ Top the queue back up to depth cards past the current one. """
+        if not self.depth:
+            return
+        if self.pool is None:
+            workers = self.workers or max(1, min(self.depth, (os.cpu_count() or 2) - 1))
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(self.shutdown)
+        for file in self.upcoming(current):
+            # Finished preps still count a little, in case Proxyshop takes the cards in another order
+            if sum(not j.done() for j in self.jobs.values()) >= self.depth or len(self.jobs) >= self.depth * 2:
+                break
+            if file not in self.jobs:
+                self.jobs[file] = self.pool.submit(prep_card, file, pixel)
+                self.metrics["submitted"] += 1
+
+    def get(self, file: str, pixel: dict=None) -> dict:
+        """ Prepared inputs for a card, {} if it was never scheduled or the prep failed. """
+        self.done.add(file)
+        job = self.jobs.pop(file, None)
+        if job is None:
+            self.metrics["missed"] += 1
+            return {}
+        if job.done():
+            self.metrics["ready"] += 1
+        else:
+            self.metrics["waited"] += 1
+        start = time.perf_counter()
+        try:
+            prep = job.result()
+        except Exception as e:
+            print(f"Prep failed for {path.basename(file)}: {e}")
+            return {}
+        finally:
+            self.metrics["wait_seconds"] += time.perf_counter() - start
+        self.metrics["prep_seconds"] += prep["seconds"]
+        # Pixel art made for other settings is no use
+        if prep.get("pixel") != pixel:
+            self.discard(prep)
+        return prep
+
+    @staticmethod
+    def discard(prep: dict):
+        """ Delete a prep's pixel art, once it's been placed or it turns out to be no use. """
+        file = prep.pop("pixel_art", None)
+        if file and path.exists(file):
+            os.remove(file)
+
+    def report(self) -> str:
+        m = self.metrics
+        queued = sum(not j.done() for j in self.jobs.values())
+        return (
+            f"Prep: {m['ready']} ready, {m['waited']} waited ({m['wait_seconds']:.1f}s), "
+            f"{m['missed']} missed, {queued} queued, {m['prep_seconds']:.1f}s of prep off the render"
+        )
+
+    def shutdown(self):
+        """ Stop the pool, and delete the pixel art of preps no render picked up. """
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        for job in self.jobs.values():
+            if job.done() and not job.cancelled() and job.exception() is None:
+                self.discard(job.result())
+        self.jobs.clear()
+
+
+pipeline = PrepPipeline(depth=0)
@@ -0,0 +1,46 @@
+"""
+PRESHTILDEATH PW LAYOUT
+Works out where every planeswalker ability band goes before Photoshop is touched,
+so the template only has to fill and move things into place once.
+"""
+GAP = 40  # Band height over the height of its text
+PAD = 20  # Text inset from the top of its band, and the last ability from the bottom of the textbox
+BADGE_INDENT = 100  # Activated abilities give up this much width to the badge, like pw_ability_shift
+DIVIDER_LIFT = 2  # Dividers sit this far over the top of their band
+TOP_MARGIN = 30  # Space left between the first ability and the top of the textbox
+
+
+def text_height(heights: list) -> float:
+    """ Height of all the abilities stacked, as the font size is picked from. """
+    return sum(h + GAP for h in heights) - GAP
+
+
+def size_adjust(size: float, text_h: float, box_h: float) -> float:
+    """ Shrink the rules text the fuller the textbox gets, never below 6.4pt. """
+    return max(round(size - 2 * ((text_h / box_h) ** 2), 1), 6.4)
+
+
+def solve(heights: list, box: list) -> dict:
+    """
+    heights: Rendered text height of each ability, top to bottom.
+    box: Bounds of the textbox reference.
+    Bands stack up from the bottom of the textbox, alternating black and white from the first one.
+    Returns the band bounds, the black ones among them, where each ability's text and divider tops go,
+    where each badge centers, and how far the textbox, typeline and art get stretched (layer_vert_stretch).
+    """
+    left, box_top, right, bottom = box
+    bands = []
+    for h in reversed(heights):
+        top = bottom - h - GAP
+        bands.insert(0, [left, top, right, bottom])
+        bottom = top
+    text_tops = [band[1] + PAD for band in bands]
+    return {
+        "bands": bands,
+        "black": [band for i, band in enumerate(bands) if i % 2 == 0],
+        "span": [left, bands[0][1], right, bands[-1][3]],
+        "text_tops": text_tops,
+        "dividers": [band[1] - DIVIDER_LIFT for band in bands[1:]],
+        "badges": [(band[1] + band[3]) / 2 for band in bands],
+        "stretch": text_tops[0] - box_top - TOP_MARGIN,
+    }
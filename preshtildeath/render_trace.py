@@ -0,0 +1,171 @@
+"""
+PRESHTILDEATH RENDER TRACE
+Per-stage timing for template renders, wall clock and time spent inside Photoshop calls.
+Each batch gets a Chrome trace (open in chrome://tracing or ui.perfetto.dev) and a CSV summary.
+Nothing gets wrapped until a template turns it on, so it costs nothing when off.
+"""
+import csv
+import json
+import os
+import os.path as path
+import threading
+import time
+from functools import wraps
+
+import photoshop.api as ps
+
+import crt_tools
+import tools
+
+STAGES = (
+    "load_artwork",
+    "enable_frame_layers",
+    "basic_text_layers",
+    "rules_text_and_pt_layers",
+    "post_text_layers",
+    "post_execute",
+)
+HELPERS = (
+    (tools, ("get_expansion", "fit_text")),
+    (crt_tools, ("blow_up", "lens_blur")),
+)
+# Application calls that block on Photoshop, counted as COM time
+COM_METHODS = ("executeAction", "executeActionGet", "doJavaScript", "open", "load")
+IDLE = 60  # Seconds between cards that start a new batch
+
+
+class RenderTracer:
+    """
+    Stages nest, so a stage's times include the helpers it called.
+    COM time covers action manager calls, scripts and file opens, plain property reads aren't counted.
+    Helpers that return a dict, like fit_text's size and bounds queries, get it in their event's args.
+    A card after IDLE seconds without one, or from another art folder, starts a new batch and files.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.patched = False
+        self.folder = None
+        self.batch = None
+        self.card = None
+        self.card_start = 0.0
+        self.card_com = 0.0
+        self.card_end = 0.0
+        self.art_folder = None
+        self.events = []
+        self.rows = {}  # (card, stage): [calls, wall seconds, com seconds]
+        self.com = 0.0  # Seconds inside Photoshop calls so far
+        self.origin = time.perf_counter()
+
+    def enable(self, folder: str):
+        self.enabled = True
+        if self.batch is None:
+            self.folder = folder
+            self.batch = time.strftime("%Y%m%d-%H%M%S")
+        if not self.patched:
+            self.patched = True
+            for name in COM_METHODS:
+                method = getattr(ps.Application, name, None)
+                if method is not None:
+                    setattr(ps.Application, name, self.com_timer(method))
+            for module, names in HELPERS:
+                for name in names:
+                    setattr(module, name, self.wrap(name, getattr(module, name)))
+
+    def disable(self):
+        """ Wrappers stay in place but go straight through. """
+        self.enabled = False
+
+    def com_timer(self, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.com += time.perf_counter() - start
+        return timed
+
+    def wrap(self, name: str, fn):
+        @wraps(fn)
+        def staged(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start, com = time.perf_counter(), self.com
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                extra = result if isinstance(result, dict) else None
+                self.record(name, start, time.perf_counter() - start, self.com - com, extra)
+        return staged
+
+    def record(self, name: str, start: float, wall: float, com: float, extra: dict=None):
+        self.events += [{
+            "name": name,
+            "cat": "stage" if name in STAGES else "card" if name == "card" else "helper",
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6),
+            "dur": round(wall * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"card": self.card, "com_ms": round(com * 1000, 3), **(extra or {})},
+        }]
+        row = self.rows.setdefault((self.card, name), [0, 0.0, 0.0])
+        row[0] += 1
+        row[1] += wall
+        row[2] += com
+
+    def start_card(self, template, card: str, folder: str):
+        """ Trace a template instance's lifecycle stages, its post_execute closes the card. """
+        if self.card is not None:
+            self.finish_card()
+        art_folder = path.dirname(template.layout.filename)
+        if self.batch is not None and (time.perf_counter() - self.card_end > IDLE or art_folder != self.art_folder):
+            self.new_batch()
+        self.art_folder = art_folder
+        self.enable(folder)
+        self.card = card
+        self.card_start, self.card_com = time.perf_counter(), self.com
+        # Instance attributes win over the class methods, and super() calls inside stay untraced
+        for name in STAGES:
+            method = getattr(template, name, None)
+            if callable(method):
+                setattr(template, name, self.wrap(name, method))
+        traced = template.post_execute
+
+        def post_execute(*args, **kwargs):
+            try:
+                return traced(*args, **kwargs)
+            finally:
+                self.finish_card()
+        template.post_execute = post_execute
+
+    def finish_card(self):
+        if self.card is None:
+            return
+        self.record("card", self.card_start, time.perf_counter() - self.card_start, self.com - self.card_com)
+        self.card = None
+        self.card_end = time.perf_counter()
+        self.write()
+
+    def new_batch(self):
+        """ Leave the last batch's files as they are, the next card starts fresh ones. """
+        self.batch = None
+        self.events = []
+        self.rows = {}
+
+    def write(self):
+        """ Rewrite the batch's trace and summary, so a batch that dies halfway still leaves both. """
+        os.makedirs(self.folder, exist_ok=True)
+        base = path.join(self.folder, f"trace-{self.batch}")
+        with open(f"{base}.json", "w") as fp:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, fp)
+        with open(f"{base}.csv", "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(["card", "stage", "calls", "wall_ms", "com_ms", "python_ms"])
+            for (card, stage), (calls, wall, com) in self.rows.items():
+                writer.writerow([card, stage, calls, f"{wall*1000:.1f}", f"{com*1000:.1f}", f"{(wall-com)*1000:.1f}"])
+
+
+tracer = RenderTracer()
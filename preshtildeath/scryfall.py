@@ -0,0 +1,111 @@
+"""
+PRESHTILDEATH SCRYFALL
+One pooled, retrying HTTP session for everything the plugin asks Scryfall.
+Point SCRYFALL_API and SCRYFALL_SVGS at fake_scryfall.py to run offline.
+"""
+import json
+import os
+import os.path as path
+import tempfile
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API = os.environ.get("SCRYFALL_API", "https://api.scryfall.com")
+SVGS = os.environ.get("SCRYFALL_SVGS", "https://svgs.scryfall.io")
+
+
+class UnknownSet(LookupError):
+    pass
+
+
+class ScryfallClient:
+    """
+    Keep-alive session with bounded retries and backoff on 429/5xx, a negative cache
+    for set codes Scryfall doesn't know, and conditional requests for SVGs.
+    """
+    def __init__(self, api: str=API, svgs: str=SVGS, retries: int=3, backoff: float=0.5,
+                 timeout: tuple=(3.05, 10), negative_ttl: float=3600, pool: int=8):
+        self.api = api.rstrip("/")
+        self.svgs = svgs.rstrip("/")
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.unknown = {}  # set code: time it stops being unknown
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "preshtildeath-proxyshop-plugin"
+        self.session.headers["Accept"] = "application/json;q=0.9,*/*;q=0.8"
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def get_set(self, set_code: str) -> dict:
+        """ Scryfall set object, raises UnknownSet for codes it 404s on. """
+        set_code = set_code.lower()
+        if self.unknown.get(set_code, 0) > time.monotonic():
+            raise UnknownSet(set_code)
+        r = self.get(f"{self.api}/sets/{set_code}")
+        if r.status_code == 404:
+            self.unknown[set_code] = time.monotonic() + self.negative_ttl
+            raise UnknownSet(set_code)
+        r.raise_for_status()
+        return r.json()
+
+    def icon_key(self, set_code: str) -> tuple:
+        """ (icon key, svg uri) for a set code. """
+        svg_uri = self.get_set(set_code)["icon_svg_uri"]
+        key = path.splitext(path.basename(svg_uri.split("?")[0]))[0].upper()
+        if key == "CON":
+            key = "CONFLUX"
+        return key, svg_uri
+
+    def svg_uri(self, key: str) -> str:
+        # Windows won't take CON as a file name, Scryfall calls it con
+        return f"{self.svgs}/sets/{'con' if key == 'CONFLUX' else key.lower()}.svg"
+
+    def fetch_svg(self, svg_uri: str, file: str, fix=None, refresh: bool=False) -> bool:
+        """
+        Download an SVG to file, run through fix(text) first if given.
+        With refresh, an existing file is only replaced if Scryfall says it changed.
+        Returns whether the file was written.
+        """
+        meta_file = f"{file}.meta"
+        headers = {}
+        if path.exists(file):
+            if not refresh:
+                return False
+            try:
+                with open(meta_file, "r") as fp:
+                    meta = json.load(fp)
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        r = self.get(svg_uri, headers=headers)
+        if r.status_code == 304:
+            return False
+        r.raise_for_status()
+        text = fix(r.text) if fix else r.text
+        meta = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+        for dest, data in ((file, text), (meta_file, json.dumps(meta))):
+            fd, temp = tempfile.mkstemp(dir=path.dirname(dest), suffix=".tmp")
+            with os.fdopen(fd, "w") as fp:
+                fp.write(data)
+            os.replace(temp, dest)
+        return True
+
+
+client = ScryfallClient()
@@ -0,0 +1,237 @@
+"""
+PRESHTILDEATH SET SYMBOLS
+Local cache of set symbol SVGs and the set code to icon mapping.
+"""
+import json
+import os
+import os.path as path
+import re
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+SVG_FOLDER = path.join(path.dirname(__file__), "assets", "Set Symbols")
+ATLAS_FOLDER = path.join(SVG_FOLDER, "atlas")
+NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+PATH_DATA = re.compile(r"(\sd\s*=\s*)([\"'])(.*?)\2", re.DOTALL)
+COMMANDS = set("MmZzLlHhVvCcSsQqTtAa")
+SEPARATORS = set(" \t\r\n,")
+
+
+@contextmanager
+def file_lock(file: str):
+    """ Exclusive lock on file + '.lock', shared between processes. """
+    with open(f"{file}.lock", "a+") as fp:
+        if os.name == "nt":
+            fp.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 tries, keep waiting
+            try:
+                yield
+            finally:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+class SetIndex:
+    """
+    Set code to Scryfall icon key, loaded once per process.
+    The json keeps its original {icon key: [set codes]} shape so it stays hand editable.
+    """
+    def __init__(self, file: str):
+        self.file = file
+        self.sets = {}
+        self.codes = {}
+        self.mtime = None
+        self.loaded = False
+
+    def load(self):
+        self.loaded = True
+        try:
+            self.mtime = os.stat(self.file).st_mtime_ns
+            with open(self.file, "r") as fp:
+                self.sets = json.load(fp)
+        except (OSError, ValueError):
+            self.mtime, self.sets = None, {}
+        self.codes = {code: key for key, codes in self.sets.items() for code in codes}
+
+    def stale(self) -> bool:
+        try:
+            return os.stat(self.file).st_mtime_ns != self.mtime
+        except OSError:
+            return self.mtime is not None
+
+    def get(self, set_code: str) -> str|None:
+        """ Icon key for a set code. Only touches the disk on a miss, in case another process learned it. """
+        set_code = set_code.upper()
+        if not self.loaded or set_code not in self.codes and self.stale():
+            self.load()
+        return self.codes.get(set_code)
+
+    def add(self, set_code: str, key: str):
+        """ Remember a new mapping, merged into whatever is on disk now. """
+        set_code, key = set_code.upper(), key.upper()
+        if self.codes.get(set_code) == key:
+            return
+        os.makedirs(path.dirname(self.file), exist_ok=True)
+        with file_lock(self.file):
+            self.load()
+            if self.codes.get(set_code) != key:
+                self.sets[key] = self.sets.get(key, []) + [set_code]
+                self.codes[set_code] = key
+                self.write()
+
+    def write(self):
+        """ Temp file and rename, so readers never see half a file. """
+        # Format our JSON for readability, keeping the values one line.
+        text = (
+            json.dumps(self.sets)
+            .replace("{", "{\n\t")
+            .replace("], ", "],\n\t")
+            .replace("]}", "]\n}")
+        )
+        fd, temp = tempfile.mkstemp(dir=path.dirname(self.file), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                fp.write(text)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(temp, self.file)
+        except Exception:
+            os.remove(temp)
+            raise
+        self.mtime = os.stat(self.file).st_mtime_ns
+
+
+index = SetIndex(path.join(SVG_FOLDER, "set_svg.json"))
+
+
+def set_from_filename(file: str) -> str|None:
+    """ Set code from a "[SET]" tag in an art file name, the last one wins. """
+    name = path.splitext(path.basename(file))[0]
+    if name.rfind("[") < name.rfind("]"):
+        return name[name.rfind("[")+1 : name.rfind("]")].upper()
+    return None
+
+
+def atlas_paths(key: str, height: int) -> tuple:
+    """ Cached symbol and outline PNGs for an icon key at a height in pixels. """
+    name = f"{key.upper()}_{round(height)}"
+    return (
+        path.join(ATLAS_FOLDER, f"{name}.png"),
+        path.join(ATLAS_FOLDER, f"{name}_outline.png"),
+    )
+
+
+def drop_atlas(key: str):
+    """ Forget an icon's cached PNGs at every height, after its SVG changes. """
+    if not path.isdir(ATLAS_FOLDER):
+        return
+    prefix = f"{key.upper()}_"
+    for f in os.listdir(ATLAS_FOLDER):
+        rest = f[len(prefix):]
+        if f.startswith(prefix) and rest.split("_")[0].split(".")[0].isdigit():
+            os.remove(path.join(ATLAS_FOLDER, f))
+
+
+def make_outline(symbol_png: str, outline_png: str, expand: int=1):
+    """
+    White outline PNG for a rasterized symbol, the offline version of the old
+    magic wand outside, invert, expand and fill.
+    """
+    with Image.open(symbol_png) as im:
+        dpi = im.info.get("dpi", (800, 800))
+        alpha = np.asarray(im.convert("RGBA").getchannel("A")) > 0
+    pad = expand + 1
+    mask = Image.fromarray(np.pad(alpha, pad).astype(np.uint8) * 255).copy()
+    # Everything transparent that touches the edge is outside, holes get filled in
+    ImageDraw.floodfill(mask, (0, 0), 128, thresh=0)
+    solid = np.asarray(mask) != 128
+    for _ in range(expand):
+        grown = solid.copy()
+        grown[1:] |= solid[:-1]
+        grown[:-1] |= solid[1:]
+        grown[:, 1:] |= solid[:, :-1]
+        grown[:, :-1] |= solid[:, 1:]
+        solid = grown
+    white = np.full(solid.shape, 255, np.uint8)
+    outline = Image.fromarray(np.dstack([white, solid.astype(np.uint8) * 255]), "LA")
+    os.makedirs(path.dirname(outline_png), exist_ok=True)
+    outline.save(outline_png, dpi=dpi)
+    return outline_png
+
+
+def normalize_path(d: str) -> str:
+    """
+    Tokenize path data in one pass and write it back one token per space.
+    Arc flags are single characters that Scryfall packs together ("a1 1 0 011 2"),
+    Photoshop wants them separated.
+    """
+    tokens = []
+    i, end = 0, len(d)
+    arc, arg = False, 0
+    while i < end:
+        c = d[i]
+        if c in SEPARATORS:
+            i += 1
+        elif c in COMMANDS:
+            tokens += [c]
+            arc, arg = c in "Aa", 0
+            i += 1
+        elif arc and arg % 7 in (3, 4) and c in "01":
+            tokens += [c]
+            arg += 1
+            i += 1
+        else:
+            num = NUMBER.match(d, i)
+            if not num:
+                raise ValueError(f"Bad path data at {i}: {d[i:i+20]!r}")
+            tokens += [num.group()]
+            arg += 1
+            i = num.end()
+    return " ".join(tokens)
+
+
+def normalize_svg(svg: str) -> str:
+    """ Photoshop-safe copy of a Scryfall set icon. """
+    svg = PATH_DATA.sub(lambda m: f"{m[1]}{m[2]}{normalize_path(m[3])}{m[2]}", svg)
+    return re.sub(r"\s+", " ", svg)
+
+
+def benchmark(files: list, rounds: int=20):
+    """ Time normalize_svg over some SVGs, biggest first. """
+    files = sorted(files, key=path.getsize, reverse=True)
+    for file in files:
+        with open(file, "r") as fp:
+            svg = fp.read()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            normalize_svg(svg)
+        ms = (time.perf_counter() - start) / rounds * 1000
+        print(f"{path.basename(file)}: {len(svg)/1024:.1f} KB, {ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    # python set_symbols.py [svgs...], defaults to the local symbol cache
+    benchmark(sys.argv[1:] or [
+        path.join(SVG_FOLDER, f) for f in os.listdir(SVG_FOLDER) if f.endswith(".svg")
+    ])
@@ -0,0 +1,106 @@
+"""
+PRESHTILDEATH SYMBOL PREFETCH
+Fills set_svg.json and the set symbol SVG cache before a batch renders.
+Run from the Proxyshop folder:
+    python plugins/preshtildeath/symbol_prefetch.py [set codes, art files or folders...] [-j 8] [--refresh]
+"""
+import argparse
+import os
+import os.path as path
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import scryfall
+import set_symbols
+
+ART_DIR = "art"
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".webp")
+
+
+def collect_sets(items: list) -> tuple:
+    """
+    Set codes from a mix of codes, art files and art folders.
+    Returns (codes, art files without a [SET] tag).
+    """
+    codes, untagged = set(), []
+    for item in items:
+        if path.isdir(item):
+            files = [
+                path.join(item, f) for f in os.listdir(item)
+                if path.splitext(f)[1].lower() in EXTENSIONS
+            ]
+        elif path.isfile(item):
+            files = [item]
+        else:
+            codes.add(item.upper())
+            continue
+        for file in files:
+            code = set_symbols.set_from_filename(file)
+            if code:
+                codes.add(code)
+            else:
+                untagged += [file]
+    return sorted(codes), untagged
+
+
+def fetch_symbol(set_code: str, client: scryfall.ScryfallClient, refresh: bool=False) -> tuple:
+    """
+    Resolve one set code and download its icon if it's missing. Returns (key, downloaded).
+    With refresh, icons already here are checked against Scryfall and replaced if they changed.
+    """
+    key = set_symbols.index.get(set_code)
+    if key:
+        svg_uri = client.svg_uri(key)
+    else:
+        key, svg_uri = client.icon_key(set_code)
+        set_symbols.index.add(set_code, key)
+    svg_path = path.join(set_symbols.SVG_FOLDER, f"{key}.svg")
+    downloaded = client.fetch_svg(svg_uri, svg_path, fix=set_symbols.normalize_svg, refresh=refresh)
+    if downloaded and refresh:
+        # Rasterized at the old icon's shape
+        set_symbols.drop_atlas(key)
+    return key, downloaded
+
+
+def prefetch(set_codes: list, workers: int=8, client: scryfall.ScryfallClient=None, refresh: bool=False) -> dict:
+    """ Fetch every set concurrently, the index takes care of its own locking. """
+    client = client or scryfall.client
+    os.makedirs(set_symbols.SVG_FOLDER, exist_ok=True)
+    done, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = {pool.submit(fetch_symbol, code, client, refresh): code for code in set_codes}
+        for job in as_completed(jobs):
+            code = jobs[job]
+            try:
+                done[code] = job.result()
+            except Exception as e:
+                failed[code] = e
+    return {"done": done, "failed": failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download set symbols ahead of a render batch.")
+    parser.add_argument("items", nargs="*", default=[ART_DIR], help="Set codes, art files or art folders.")
+    parser.add_argument("-j", "--workers", type=int, default=8, help="Concurrent downloads.")
+    parser.add_argument("--refresh", action="store_true", help="Check icons already downloaded for changes.")
+    args = parser.parse_args()
+
+    codes, untagged = collect_sets(args.items)
+    if untagged:
+        print(f"{len(untagged)} art files have no [SET] tag, their symbols load at render time.")
+    if not codes:
+        print("No set codes found.")
+        return
+    start = time.perf_counter()
+    result = prefetch(codes, args.workers, refresh=args.refresh)
+    fresh = sum(downloaded for _, downloaded in result["done"].values())
+    print(
+        f"{len(result['done'])} sets ready, {fresh} icons {'downloaded or updated' if args.refresh else 'downloaded'} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    for code, err in sorted(result["failed"].items()):
+        print(f"    {code}: {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+PRESHTILDEATH TEMPLATE DOCS
+Keeps a template PSD open between cards and reverts it to a snapshot taken right
+after it loaded, instead of parsing the PSD again for every card.
+"""
+import os.path as path
+
+import photoshop.api as ps
+from photoshop.api._document import Document
+
+import tools
+
+app = ps.Application()
+cid = app.charIDToTypeID
+sid = app.stringIDToTypeID
+
+SNAPSHOT = "Preshtildeath Template"
+
+
+def make_snapshot(name: str):
+    """ Snapshot the active document's current history state. """
+    ref_null = ps.ActionReference()
+    ref_null.putClass(cid("SnpS"))
+    ref_from = ps.ActionReference()
+    ref_from.putProperty(cid("HstS"), cid("CrnH"))
+    desc_mk = ps.ActionDescriptor()
+    desc_mk.putReference(cid("null"), ref_null)
+    desc_mk.putReference(cid("From"), ref_from)
+    desc_mk.putString(cid("Nm  "), name)
+    desc_mk.putEnumerated(cid("Usng"), cid("HstS"), cid("FllD"))
+    app.executeAction(cid("Mk  "), desc_mk, ps.DialogModes.DisplayNoDialogs)
+
+
+def select_snapshot(name: str):
+    """ Revert the active document to a named snapshot. """
+    ref_null = ps.ActionReference()
+    ref_null.putName(cid("SnpS"), name)
+    desc_slct = ps.ActionDescriptor()
+    desc_slct.putReference(cid("null"), ref_null)
+    app.executeAction(cid("slct"), desc_slct, ps.DialogModes.DisplayNoDialogs)
+
+
+class TemplateDocs:
+    """
+    The open template document for each template file, with the layer tree it had at the snapshot.
+    A revert only counts if the tree reads back the same, otherwise the PSD gets opened fresh.
+    Only one template stays open, a batch that switches templates closes the last one.
+    """
+    def __init__(self):
+        self.kept = {}  # template file: {"id": document ID, "tree": layer tree at the snapshot}
+        self.reused = 0
+        self.loaded = 0
+
+    @staticmethod
+    def key(file: str) -> str:
+        return path.normcase(path.abspath(file))
+
+    @staticmethod
+    def find(doc_id: int) -> Document|None:
+        for doc in app.documents:
+            if doc.id == doc_id:
+                return doc
+        return None
+
+    def holds(self, doc) -> bool:
+        """ Whether a document is one of the kept templates. """
+        try:
+            doc_id = doc.id
+        except Exception:
+            return False
+        return any(entry["id"] == doc_id for entry in self.kept.values())
+
+    def keep(self, file: str, doc):
+        """ Snapshot a freshly opened template and remember its layer tree. """
+        key = self.key(file)
+        for other in [k for k in self.kept if k != key]:
+            self.release(other)
+        self.loaded += 1
+        tools.layers.invalidate(doc)
+        tree = tools.layers.entry(doc)["ids"]
+        if tree is None:
+            # No way to check a revert later, so don't keep it
+            self.kept.pop(key, None)
+            return
+        app.activeDocument = doc
+        make_snapshot(SNAPSHOT)
+        # A copy, the index edits its own map in place as the card adds and renames layers
+        self.kept[key] = {"id": doc.id, "tree": dict(tree)}
+
+    def revert(self, file: str) -> Document|None:
+        """ The kept template rolled back to its snapshot, None if it has to be opened again. """
+        key = self.key(file)
+        entry = self.kept.get(key)
+        if entry is None:
+            return None
+        doc = self.find(entry["id"])
+        if doc is None:
+            # Closed behind our back
+            del self.kept[key]
+            return None
+        try:
+            app.activeDocument = doc
+            select_snapshot(SNAPSHOT)
+        except Exception as e:
+            print(e)
+            self.release(key)
+            return None
+        # Layers from the last card are gone, read the tree again and check it against the snapshot's
+        tools.layers.invalidate(doc)
+        if tools.layers.entry(doc)["ids"] != entry["tree"]:
+            print("Template didn't revert cleanly, opening it again.")
+            self.release(key)
+            return None
+        self.reused += 1
+        return doc
+
+    def release(self, key: str):
+        """ Close a kept template without saving and forget it. """
+        entry = self.kept.pop(key, None)
+        if entry is None:
+            return
+        doc = self.find(entry["id"])
+        if doc is not None:
+            tools.layers.invalidate(doc)
+            doc.close(ps.SaveOptions.DoNotSaveChanges)
+
+    def release_all(self):
+        for key in list(self.kept):
+            self.release(key)
+
+    def report(self) -> str:
+        return f"Template reused {self.reused} times, loaded {self.loaded} times"
+
+
+docs = TemplateDocs()
@@ -3,6 +3,7 @@ PRESHTILDEATH TEMPLATES
 """
 import os
 import re
+import tempfile
 from functools import cached_property
 from typing import Optional
 
@@ -19,10 +20,19 @@ else:
 import photoshop.api as ps
 from photoshop.api._artlayer import ArtLayer
 from photoshop.api._layerSet import LayerSet
-from PIL import Image
 
+import art_archive
+import art_info
+import com_profile
 import tools
 import crt_tools
+import pixel_art
+import prep_pipeline
+import pw_layout
+import render_trace
+import set_symbols
+import template_docs
+import text_layout
 
 app = ps.Application()
 cid = app.charIDToTypeID
@@ -50,15 +60,13 @@ class PWLoyaltyCost(txt_layers.TextField):
         self.layer.link(self.badge)
 
 
-class FullArtModularTemplate(temp.StarterTemplate):
+class ModularTemplateMixin:
     """
-    Created by preshtildeath.
-    Expands the textbox based on how much oracle text a card has.
-    Also expanding this template to service other card types.
+    What the Full Art and Pixel templates share: the prep pipeline, render tracing and COM profiling,
+    reusing the open template between cards, and the reports after each card.
+    Goes before StarterTemplate in the bases.
     """
-
-    template_file_name = "preshtildeath/fullart-modular"
-    template_suffix = "Full Mod"
+    art_prep = None  # prepare_art settings for the prep pipeline, Pixel only
 
     @cached_property
     def do_move_art(self) -> bool:
@@ -69,6 +77,109 @@ class FullArtModularTemplate(temp.StarterTemplate):
             is_bool=True,
         )
 
+    @cached_property
+    def prep_lookahead(self) -> int:
+        return int(cfg.get_setting(
+            section="GENERAL",
+            key="Prep.Lookahead",
+            default=0,
+            is_bool=False,
+        ))
+
+    @cached_property
+    def reuse_template(self) -> bool:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="Reuse.Template",
+            default=False,
+            is_bool=True,
+        )
+
+    @cached_property
+    def trace_render(self) -> bool:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="Trace.Render",
+            default=False,
+            is_bool=True,
+        )
+
+    @cached_property
+    def profile_com(self) -> bool:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="Profile.COM",
+            default=False,
+            is_bool=True,
+        )
+
+    def __init__(self, layout):
+
+        super().__init__(layout)
+        self.rules_fit = None  # fit_text's size and bounds queries, when the rules text needed fitting
+
+        # Pick up whatever got prepared while the last card rendered, then queue the next ones
+        prep_pipeline.pipeline.depth = self.prep_lookahead
+        self.prep = prep_pipeline.pipeline.get(layout.filename, self.art_prep)
+        prep_pipeline.pipeline.schedule(layout.filename, self.art_prep)
+
+        if self.trace_render:
+            render_trace.tracer.start_card(self, layout.name, os.path.join(con.cwd, "out", "trace"))
+        else:
+            render_trace.tracer.disable()
+        if self.profile_com:
+            com_profile.profiler.enable()
+        else:
+            com_profile.profiler.disable()
+
+    def load_template(self):
+        if not self.reuse_template:
+            return super().load_template()
+        # Same template as the last card, roll it back instead of opening the PSD again
+        file = os.path.join(con.cwd, "templates", f"{self.template_file_name}.psd")
+        doc = template_docs.docs.revert(file)
+        if doc is None:
+            super().load_template()
+            doc = app.activeDocument
+            template_docs.docs.keep(file, doc)
+        self.docref = doc
+
+    def reset(self):
+        # A kept template stays open for the next card to revert
+        if self.reuse_template and template_docs.docs.holds(self.docref):
+            return
+        super().reset()
+
+    def post_execute(self):
+        if prep_pipeline.pipeline.depth:
+            print(prep_pipeline.pipeline.report())
+        if self.reuse_template:
+            print(template_docs.docs.report())
+        if self.profile_com:
+            print(com_profile.profiler.report())
+            print(f"Layer index saved {tools.layers.saved} COM calls")
+            print(f"Batched {tools.batch.queued} actions into {tools.batch.sent} scripts")
+            if self.rules_fit:
+                print(f"Rules text fit at {self.rules_fit['size']}pt in {self.rules_fit['queries']} bounds queries")
+            com_profile.profiler.reset()
+        tools.layers.saved = 0
+        tools.batch.queued = tools.batch.sent = 0
+        if self.do_move_art:
+            art_archive.archive.add(self.layout)
+            if art_archive.archive.failures:
+                console.update(art_archive.archive.report())
+
+
+class FullArtModularTemplate(ModularTemplateMixin, temp.StarterTemplate):
+    """
+    Created by preshtildeath.
+    Expands the textbox based on how much oracle text a card has.
+    Also expanding this template to service other card types.
+    """
+
+    template_file_name = "preshtildeath/fullart-modular"
+    template_suffix = "Full Mod"
+
     @cached_property
     def hollow_mana(self) -> bool:
         return cfg.get_setting(
@@ -96,6 +207,15 @@ class FullArtModularTemplate(temp.StarterTemplate):
             is_bool=True,
         )
 
+    @cached_property
+    def rules_layout(self) -> Optional[text_layout.TextLayout]:
+        return text_layout.get_layout(
+            con.font_rules_text,
+            con.font_mana,
+            con.symbols,
+            self.docref.resolution,
+        )
+
     @cached_property
     def text_layers_group(self) -> Optional[LayerSet]:
         return tools.get_layer_set("Text and Icons", doc=self.docref)
@@ -172,8 +292,8 @@ class FullArtModularTemplate(temp.StarterTemplate):
             target = "Art Frame"
 
         ### LETS JUST TEST THE STRETCH AND FILL METHOD
-        with Image.open(self.layout.filename) as im:
-            im_ratio = im.height / im.width
+        info = self.prep.get("info") or art_info.art_info(self.layout.filename)
+        im_ratio = info["height"] / info["width"]
         art_layer = tools.get_layer("Art Frame", self.ref_group)
         l, t, r, b = art_layer.bounds
         w, h = r-l, b-t
@@ -183,18 +303,16 @@ class FullArtModularTemplate(temp.StarterTemplate):
         return tools.get_layer(target, self.ref_group)
 
     def get_file_name(self):
-        path_txt = tools.filename_append(
+        # Held with an empty file until the jpg is saved over it, reset gives it back if that never happens
+        self.out_file = tools.names.reserve(
                     f"{self.layout.name} ({self.template_suffix}).jpg",
-                    os.path.join(con.cwd, "out")
+                    os.path.join(con.cwd, "out"),
                     )
-        return os.path.splitext(os.path.basename(path_txt))[0]
+        return os.path.splitext(os.path.basename(self.out_file))[0]
 
     def load_artwork(self):
         doc_dpi = self.docref.resolution
-        with Image.open(self.layout.filename) as im:
-            if "dpi" in im.info.keys():
-                img_dpi = im.info["dpi"][0]
-            else: img_dpi = 72
+        img_dpi = (self.prep.get("info") or art_info.art_info(self.layout.filename))["dpi"]
         self.art_layer = tools.place_image(
             layer=self.art_layer,
             file=self.layout.filename,
@@ -212,6 +330,12 @@ class FullArtModularTemplate(temp.StarterTemplate):
     
     def collector_info(self): pass
 
+    def reset(self):
+        if self.out_file:
+            tools.names.release(self.out_file)
+            self.out_file = None
+        super().reset()
+
     def __init__(self, layout):
 
         app.preferences.interpolation = ps.ResampleMethod.BicubicAutomatic
@@ -220,10 +344,7 @@ class FullArtModularTemplate(temp.StarterTemplate):
 
         super().__init__(layout)
 
-        filename = os.path.splitext(os.path.basename(layout.filename))[0]
-        if filename.rfind("[") < filename.rfind("]"):
-            self.set = filename[filename.rfind("[")+1 : filename.rfind("]")].upper()
-        else: self.set = layout.set
+        self.set = self.prep.get("set") or set_symbols.set_from_filename(layout.filename) or layout.set
 
         # Check config
         if self.hollow_mana:
@@ -244,6 +365,7 @@ class FullArtModularTemplate(temp.StarterTemplate):
             self.is_planeswalker = False
         if not hasattr(self, "is_basic"):
             self.is_basic = False
+        self.out_file = None  # Name reserved in out/ by get_file_name
 
 
     def enable_frame_layers(self):
@@ -257,48 +379,48 @@ class FullArtModularTemplate(temp.StarterTemplate):
 
         console.update("Turning on our frame elements...")
 
-        # Twins and p/t box
-        tools.get_layer(self.layout.twins, "Name", doc=self.docref).visible = True
-        tools.get_layer(self.layout.twins, "Type", doc=self.docref).visible = True
-        self.pt_layer.visible = self.is_creature
-
-        # Pinlines & Textbox
-        if len(self.layout.pinlines) != 2:
-            tools.get_layer(self.layout.pinlines, "Pinlines", doc=self.docref).visible = True
-            tools.get_layer(self.layout.pinlines, "Textbox", doc=self.docref).visible = True
-        else:
-            tools.wubrg_layer_sort(self.layout.pinlines, "Pinlines", doc=self.docref)
-            tools.wubrg_layer_sort(self.layout.pinlines, "Textbox", doc=self.docref)
-        tools.get_layer(
-            "Side Pinlines", "Masked", "Pinlines", doc=self.docref
-        ).visible = self.side_pins
-
-        # Legendary crown
-        if self.is_legendary:
-            style = "Legendary" if self.side_pins else "Floating"
-            self.crown_layer.visible = True
-            self.title_ref = tools.get_layer(style, self.ref_group)
-            if not bool(self.is_land or self.is_planeswalker or self.is_borderless):
-                tools.get_layer("Crown Mask", "Mask Wearer", "Border", doc=self.docref).visible = True
-        else:
-            self.title_ref = tools.get_layer("Title", self.ref_group)
-
-        # Eldrazi formatting?
-        if self.layout.is_colorless:
-            # Devoid formatting?
-            if self.layout.pinlines != self.layout.twins:
-                self.layout.pinlines = "Land"
-            else:
-                self.layout.pinlines = "Land"
-                self.layout.twins = "Land"
-            tools.get_layer(self.layout.twins, "Border", doc=self.docref).visible = True
+        # Visibility only from here to the land border, so it all goes out in one batch
+        with tools.batch:
+            # Twins and p/t box
+            tools.set_visible(True, self.layout.twins, "Name", doc=self.docref)
+            tools.set_visible(True, self.layout.twins, "Type", doc=self.docref)
+            tools.batch.visible(self.pt_layer, self.is_creature)
 
-        # Nyx Formatting
-        if self.layout.is_nyx:
+            # Pinlines & Textbox
             if len(self.layout.pinlines) != 2:
-                tools.get_layer(f"Nyx {self.layout.pinlines}", "Border", doc=self.docref).visible = True
+                tools.set_visible(True, self.layout.pinlines, "Pinlines", doc=self.docref)
+                tools.set_visible(True, self.layout.pinlines, "Textbox", doc=self.docref)
+            else:
+                tools.wubrg_layer_sort(self.layout.pinlines, "Pinlines", doc=self.docref)
+                tools.wubrg_layer_sort(self.layout.pinlines, "Textbox", doc=self.docref)
+            tools.set_visible(self.side_pins, "Side Pinlines", "Masked", "Pinlines", doc=self.docref)
+
+            # Legendary crown
+            if self.is_legendary:
+                style = "Legendary" if self.side_pins else "Floating"
+                tools.batch.visible(self.crown_layer, True)
+                self.title_ref = tools.get_layer(style, self.ref_group)
+                if not bool(self.is_land or self.is_planeswalker or self.is_borderless):
+                    tools.set_visible(True, "Crown Mask", "Mask Wearer", "Border", doc=self.docref)
             else:
-                tools.wubrg_layer_sort(self.layout.pinlines, "Border", doc=self.docref, prefix="Nyx ")
+                self.title_ref = tools.get_layer("Title", self.ref_group)
+
+            # Eldrazi formatting?
+            if self.layout.is_colorless:
+                # Devoid formatting?
+                if self.layout.pinlines != self.layout.twins:
+                    self.layout.pinlines = "Land"
+                else:
+                    self.layout.pinlines = "Land"
+                    self.layout.twins = "Land"
+                tools.set_visible(True, self.layout.twins, "Border", doc=self.docref)
+
+            # Nyx Formatting
+            if self.layout.is_nyx:
+                if len(self.layout.pinlines) != 2:
+                    tools.set_visible(True, f"Nyx {self.layout.pinlines}", "Border", doc=self.docref)
+                else:
+                    tools.wubrg_layer_sort(self.layout.pinlines, "Border", doc=self.docref, prefix="Nyx ")
 
         # Give the lands a sexy transparent border
         if self.is_land and not self.is_borderless:
@@ -387,19 +509,26 @@ class FullArtModularTemplate(temp.StarterTemplate):
         console.update("Shifting text and frame...")
 
         # Pre-size down our text based on default size
-        txtbx_h = tools.bounds_height(self.ref_layer_textbox.bounds)
-        txt_h = tools.bounds_height(self.text_layer_rules.bounds)
+        pad = 20
+        txtbx = self.ref_layer_textbox.bounds
+        txtbx_h = tools.bounds_height(txtbx)
+        txtbx_w = txtbx[2] - txtbx[0] - pad*2
         presize = self.text_layer_rules.textItem.size
+        layout = self.rules_layout
+        if layout:
+            txt_h = layout.height(self.layout.oracle_text, presize, txtbx_w)
+        else:
+            txt_h = tools.bounds_height(self.text_layer_rules.bounds)
         # anywhere between 6.5 and 9 based on height of text layer
         size_adjust = 6.5 + max(2.5 * (((txtbx_h - txt_h) / txtbx_h) ** 2), 0)
 
         if presize != size_adjust:
             self.text_layer_rules.textItem.size = size_adjust
             self.text_layer_rules.textItem.leading = size_adjust
+        # One real read to check the prediction against
         txt_h = tools.bounds_height(self.text_layer_rules.bounds)
 
         # Establish how much we are shifting down everything
-        pad = 20
         modifier = txtbx_h-txt_h-pad*2
         if modifier < 0: modifier = 0
         if len(self.layout.oracle_text) == 0: 
@@ -429,7 +558,7 @@ class FullArtModularTemplate(temp.StarterTemplate):
 
         # Let's make sure it fits, both vertically and the right bound.
         if self.layout.oracle_text:
-            tools.fit_text(self.text_layer_rules, self.ref_layer_textbox, padding=pad, post_frame=False)
+            self.rules_fit = tools.fit_text(self.text_layer_rules, self.ref_layer_textbox, padding=pad, post_frame=False)
             tools.frame(
                 self.text_layer_rules,
                 self.ref_layer_textbox,
@@ -457,19 +586,12 @@ class FullArtModularTemplate(temp.StarterTemplate):
             tools.get_layer("Normal", "Mask Wearer", "Border", doc=self.docref).visible = False
         psd.content_fill_empty_area(self.art_layer)
 
-        tools.select_nonblank_pixels(tools.get_layer("Name", "Mask Wearer", "Name", doc=self.docref))
-        tools.select_nonblank_pixels(tools.get_layer("Mask Wearer", "Type", doc=self.docref), "Add ")
-        tools.select_nonblank_pixels(tools.get_layer("Base", "Textbox", doc=self.docref), "Add ")
-        crt_tools.lens_blur(24, 1, 224, 1)
-        self.docref.selection.deselect()
-
-    def post_execute(self):
-        if self.do_move_art:
-            console.update("Moving art file...")
-            moved = tools.move_art(self.layout)
-            if isinstance(moved, Exception):
-                console.update(f"Could not move art file: {moved}")
-
+        with tools.batch:
+            tools.select_nonblank_pixels(tools.get_layer("Name", "Mask Wearer", "Name", doc=self.docref))
+            tools.select_nonblank_pixels(tools.get_layer("Mask Wearer", "Type", doc=self.docref), "Add ")
+            tools.select_nonblank_pixels(tools.get_layer("Base", "Textbox", doc=self.docref), "Add ")
+            crt_tools.lens_blur(24, 1, 224, 1)
+            tools.deselect()
 
 class FullArtTextlessTemplate(FullArtModularTemplate):
     # Useful for textless duals.
@@ -594,6 +716,7 @@ class PWFullArtModularTemplate(FullArtModularTemplate):
         centered = False
         self.badge = []
         self.rules_text = []
+        self.abilities = []  # (text, activated) for each ability, for the layout solver
         loyalty_set = tools.get_layer_set("Loyalty", "PW", doc=self.docref)
         pw_layers = {
             "plus": tools.get_layer("Plus", loyalty_set),
@@ -672,6 +795,7 @@ class PWFullArtModularTemplate(FullArtModularTemplate):
                     tools.pw_ability_shift(self.rules_text[-1])
 
             self.rules_text[-1].visible = True
+            self.abilities += [(ability_text, self.badge[-1] is not None)]
             self.tx_layers += [
                 txt_layers.FormattedTextField(
                     layer=self.rules_text[-1],
@@ -698,54 +822,69 @@ class PWFullArtModularTemplate(FullArtModularTemplate):
         overlay = tools.get_layer("Overlay", "Textbox", doc=self.docref)
         overlay.visible = True
 
-        black, white = tools.rgbcolor(0,0,0), tools.rgbcolor(255,255,255)
-
-        left, right = self.ref_layer_textbox.bounds[0], self.ref_layer_textbox.bounds[2]
-        txtbx_h = tools.bounds_height(self.ref_layer_textbox.bounds)
-        txt_h = sum(tools.bounds_height(rule.bounds)+40 for rule in self.rules_text)-40
-
-        size_adjust = max(
-            round(self.rules_text[0].textItem.size - 2 * ((txt_h / txtbx_h) ** 2), 1),
-            6.4
-        )
-        
-        # going from bottom to top
-        for i, layer in reversed(list(enumerate(self.rules_text))):
+        box = self.ref_layer_textbox.bounds
+        size = self.rules_text[0].textItem.size
+
+        # Predict the stacked height to pick the font size, rather than render and measure it
+        layout = self.rules_layout
+        if layout:
+            width = box[2] - box[0] - pw_layout.PAD * 2
+            txt_h = pw_layout.text_height([
+                layout.height(text, size, width - (pw_layout.BADGE_INDENT if activated else 0))
+                for text, activated in self.abilities
+            ])
+        else:
+            txt_h = pw_layout.text_height([tools.bounds_height(rule.bounds) for rule in self.rules_text])
+        size_adjust = pw_layout.size_adjust(size, txt_h, tools.bounds_height(box))
+        for layer in self.rules_text:
             layer.textItem.size = size_adjust
             layer.textItem.leading = size_adjust
-            overlay_height = tools.bounds_height(layer.bounds)+40
-            self.docref.activeLayer = overlay
-            if layer == self.rules_text[-1]:
-                bottom = self.ref_layer_textbox.bounds[3]
-                delta = bottom-layer.bounds[3]-20
-                tools.creature_text_path_shift(layer, delta)
-                delta = overlay_height-(tools.bounds_height(layer.bounds)+40)
-                if delta < 0:
-                    tools.creature_text_path_shift(layer, delta)
-                    overlay_height -= delta
-            else:
-                bottom = top
-            top = bottom - overlay_height
-            self.docref.selection.select(
-                [[left, top], [right, top], [right, bottom], [left, bottom]]
-            )
-            self.docref.selection.fill(black if i % 2 == 0 else white)
-            if self.badge[i]:
-                psd.align_vertical(self.badge[i])
-            self.docref.selection.deselect()
-
-            # Add divider
-            if i > 0:
-                divider = tools.get_layer("Divider", "Loyalty", "PW", doc=self.docref).duplicate()
-                divider.visible = True
-                tools.select_nonblank_pixels(divider)
-                div_top = self.docref.selection.bounds[1]
-                self.docref.selection.deselect()
-                divider.translate(0, (top - 2) - div_top)
 
-            layer.translate(0, top+20-layer.bounds[1])
-
-        delta = self.rules_text[0].bounds[1]-self.ref_layer_textbox.bounds[1]-30
+        # Sit the last ability on the bottom of the textbox, taking it back if that squeezed the text
+        last = self.rules_text[-1]
+        last_bounds = last.bounds
+        tools.creature_text_path_shift(last, box[3] - last_bounds[3] - pw_layout.PAD)
+        bounds = [layer.bounds for layer in self.rules_text]
+        squeeze = tools.bounds_height(last_bounds) - tools.bounds_height(bounds[-1])
+        if squeeze < 0:
+            tools.creature_text_path_shift(last, squeeze)
+            bounds[-1] = last.bounds
+
+        plan = pw_layout.solve([tools.bounds_height(b) for b in bounds], box)
+
+        # Every band in two fills, white under the lot then the black ones over it
+        self.docref.activeLayer = overlay
+        selection = self.docref.selection
+        l, t, r, b = plan["span"]
+        selection.select([[l, t], [r, t], [r, b], [l, b]])
+        selection.fill(tools.rgbcolor(255, 255, 255))
+        for i, (l, t, r, b) in enumerate(plan["black"]):
+            selection.select(
+                [[l, t], [r, t], [r, b], [l, b]],
+                ps.SelectionType.ExtendSelection if i else ps.SelectionType.ReplaceSelection,
+            )
+        selection.fill(tools.rgbcolor(0, 0, 0))
+        selection.deselect()
+
+        # Dividers are copies of one layer, so its top only gets measured once
+        divider = tools.get_layer("Divider", "Loyalty", "PW", doc=self.docref)
+        tools.select_nonblank_pixels(divider)
+        div_top = selection.bounds[1]
+        selection.deselect()
+        divider.visible = True
+        # The copies are all "Divider copy", nothing looks them up, so the layer index can stay as it is
+        for top in plan["dividers"]:
+            divider.duplicate().translate(0, top - div_top)
+        divider.visible = False
+
+        for layer, top, b in zip(self.rules_text, plan["text_tops"], bounds):
+            layer.translate(0, top - b[1])
+        for badge, center in zip(self.badge, plan["badges"]):
+            if badge:
+                b = badge.bounds
+                badge.translate(0, center - (b[1] + b[3]) / 2)
+
+        delta = plan["stretch"]
         tools.layer_vert_stretch(self.ref_layer_textbox, delta)
         tools.layer_vert_stretch(self.art_reference, -delta/2, "top")
         self.text_layer_type.translate(0, delta)
@@ -770,7 +909,7 @@ class PWTransformFullArtTemplate(PWFullArtModularTemplate):
         super().basic_text_layers()
 
 
-class PixelModularTemplate(temp.StarterTemplate):
+class PixelModularTemplate(ModularTemplateMixin, temp.StarterTemplate):
     """
     Expandable pixel-art template
     100dpi start, then can blow up to 800dpi with the CRT filter
@@ -778,6 +917,7 @@ class PixelModularTemplate(temp.StarterTemplate):
 
     template_file_name = "preshtildeath/pixel-template"
     template_suffix = "PXL Mod"
+    art_prep = None  # prepare_art settings from the last card, for the prep pipeline
 
     @cached_property
     def do_crt_filter(self) -> bool:
@@ -789,28 +929,64 @@ class PixelModularTemplate(temp.StarterTemplate):
         )
 
     @cached_property
-    def invert_mana(self) -> bool:
+    def crt_offline(self) -> bool:
         return cfg.get_setting(
             section="GENERAL",
-            key="Invert.Mana",
+            key="CRT.Offline",
+            default=True,
+            is_bool=True,
+        )
+
+    @cached_property
+    def crt_batch(self) -> bool:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="CRT.Batch",
             default=False,
             is_bool=True,
         )
 
     @cached_property
-    def symbol_bg(self) -> bool:
+    def crt_memory(self) -> int:
+        return int(cfg.get_setting(
+            section="GENERAL",
+            key="CRT.Memory",
+            default=1024,
+            is_bool=False,
+        ))
+
+    @cached_property
+    def art_palette(self) -> str:
         return cfg.get_setting(
             section="GENERAL",
-            key="Symbol.BG",
-            default=True,
+            key="Art.Palette",
+            default="adaptive",
+            is_bool=False,
+        )
+
+    @cached_property
+    def art_dither(self) -> str:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="Art.Dither",
+            default="bayer",
+            is_bool=False,
+        )
+
+    @cached_property
+    def invert_mana(self) -> bool:
+        return cfg.get_setting(
+            section="GENERAL",
+            key="Invert.Mana",
+            default=False,
             is_bool=True,
         )
 
     @cached_property
-    def do_move_art(self) -> bool:
+    def symbol_bg(self) -> bool:
         return cfg.get_setting(
             section="GENERAL",
-            key="Move.Art",
+            key="Symbol.BG",
             default=True,
             is_bool=True,
         )
@@ -820,6 +996,11 @@ class PixelModularTemplate(temp.StarterTemplate):
     def collector_info(self):
         pass
 
+    def reset(self):
+        # In case the render stopped before the prepared art got placed
+        prep_pipeline.pipeline.discard(self.prep)
+        super().reset()
+
     def __init__(self, layout):
 
         # Setup some parameters
@@ -1024,30 +1205,59 @@ class PixelModularTemplate(temp.StarterTemplate):
 
         # Establish size to scale down to and resize
         ref_w, ref_h = r-l, b-t
-        # Switch to new doc, resize and dither
-        art_doc = app.open(self.layout.filename)
-        scale = 100 * max(ref_w / art_doc.width, ref_h / art_doc.height)
-        if scale < 50:
-            crt_tools.img_resize(art_doc, scale, scale)
-            crt_tools.index_color(16, "adaptive")
-        # Copy/paste into template doc, then align with art reference
-        art_doc.selection.selectAll()
-        art_doc.selection.copy()
-        art_doc.close(ps.SaveOptions.DoNotSaveChanges)
-        self.docref.activeLayer = self.art_layer
-        self.docref.paste()
+        info = self.prep.get("info") or art_info.art_info(self.layout.filename)
+        scale = 100 * max(ref_w / info["width"], ref_h / info["height"])
+        doc_dpi = self.docref.resolution
+        art_prep = {
+            "size": (round(ref_w), round(ref_h)),
+            "palette": self.art_palette,
+            "method": self.art_dither,
+            "dpi": doc_dpi,
+        }
+        PixelModularTemplate.art_prep = art_prep
+        if self.prep.get("pixel") == art_prep:
+            art_file, percent = self.prep["pixel_art"], 100
+        elif scale < 50:
+            # Shrink and index offline, only the small bitmap goes into Photoshop
+            art_file = os.path.join(tempfile.gettempdir(), f"pixel_art_{os.getpid()}.png")
+            size = pixel_art.cover_size((info["width"], info["height"]), (round(ref_w), round(ref_h)))
+            pixel_art.prepare_art(
+                self.layout.filename,
+                art_file,
+                size,
+                palette=self.art_palette,
+                method=self.art_dither,
+                dpi=doc_dpi,
+            )
+            percent = 100
+        else:
+            art_file, percent = self.layout.filename, 100 * info["dpi"] / doc_dpi
+        # Place into template doc, then align with art reference
+        self.art_layer = tools.place_image(self.art_layer, art_file, percent)
+        self.art_layer.rasterize(ps.RasterizeType.EntireLayer)
+        if art_file != self.layout.filename:
+            os.remove(art_file)
+        # Placed or not, the prepared PNG isn't needed any more
+        prep_pipeline.pipeline.discard(self.prep)
         tools.frame(self.art_layer, [l, t, r, b], resize=False)
 
-        # Blow up to 800dpi, and do the CRT filter if config says to
-        crt_tools.blow_up(filter=self.do_crt_filter)
-
-    def post_execute(self):
-        if self.do_move_art:
-            console.update("Moving art file...")
-            moved = tools.move_art(self.layout)
-            if isinstance(moved, Exception):
-                console.update(f"Could not move art file: {moved}")
+        # Leave the 100dpi render for crt_batch.py to filter across all cores
+        if self.do_crt_filter and self.crt_batch:
+            console.update("Queueing render for the CRT batch...")
+            queue_path = os.path.join(con.cwd, "out", "crt_queue")
+            os.makedirs(queue_path, exist_ok=True)
+            crt_tools.queue_render(
+                self.docref,
+                tools.names.reserve(f"{self.layout.name} ({self.template_suffix}).png", queue_path),
+            )
+            return
 
+        # Blow up to 800dpi, and do the CRT filter if config says to
+        crt_tools.blow_up(
+            filter=self.do_crt_filter,
+            offline=self.crt_offline,
+            max_memory=self.crt_memory or None,
+        )
 
 class UniversesBeyond(temp.NormalTemplate):
     """
@@ -0,0 +1,5 @@
+import os.path as path
+import sys
+
+# Plugin modules import each other flat, the way Proxyshop loads them
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
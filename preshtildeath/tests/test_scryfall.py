@@ -0,0 +1,65 @@
+import json
+import os.path as path
+
+import pytest
+
+pytest.importorskip("requests")
+
+import fake_scryfall
+import scryfall
+
+
+@pytest.fixture
+def server():
+    server = fake_scryfall.FakeScryfall().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_for(server) -> scryfall.ScryfallClient:
+    return scryfall.ScryfallClient(api=server.url, svgs=server.url, backoff=0)
+
+
+def test_retries_after_503(server):
+    server.fail_every = 2
+    client = client_for(server)
+    assert client.get_set("neo")["code"] == "neo"
+    # Second request gets the 503, the retry goes through
+    assert client.get_set("dmu")["code"] == "dmu"
+    assert server.requests == 3
+
+
+def test_not_modified_keeps_cached_svg(server, tmp_path):
+    client = client_for(server)
+    file = str(tmp_path / "NEO.svg")
+    assert client.fetch_svg(client.svg_uri("NEO"), file)
+    with open(file, "r") as fp:
+        svg = fp.read()
+    with open(f"{file}.meta", "r") as fp:
+        meta = json.load(fp)
+    assert meta["etag"]
+
+    assert not client.fetch_svg(client.svg_uri("NEO"), file, fix=lambda text: "changed", refresh=True)
+    assert server.requests == 2
+    with open(file, "r") as fp:
+        assert fp.read() == svg
+    with open(f"{file}.meta", "r") as fp:
+        assert json.load(fp) == meta
+
+
+def test_unknown_set_is_only_asked_once(server):
+    client = client_for(server)
+    for _ in range(3):
+        with pytest.raises(scryfall.UnknownSet):
+            client.get_set("ZZZ")
+    assert server.requests == 1
+
+
+def test_conflux_maps_to_con(server, tmp_path):
+    client = client_for(server)
+    key, svg_uri = client.icon_key("con")
+    assert key == "CONFLUX"
+    assert path.basename(svg_uri.split("?")[0]) == "con.svg"
+    assert client.svg_uri("CONFLUX") == f"{server.url}/sets/con.svg"
+    assert client.fetch_svg(client.svg_uri(key), str(tmp_path / "CONFLUX.svg"))
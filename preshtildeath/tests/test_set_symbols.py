@@ -0,0 +1,43 @@
+import os
+import os.path as path
+
+import pytest
+
+import set_symbols
+
+FIXTURES = path.join(path.dirname(__file__), "fixtures", "set_symbols")
+ICONS = sorted(f for f in os.listdir(FIXTURES) if f.endswith(".svg") and not f.endswith(".golden.svg"))
+
+
+@pytest.mark.parametrize("icon", ICONS)
+def test_normalize_svg_matches_golden(icon):
+    with open(path.join(FIXTURES, icon), "r") as fp:
+        svg = fp.read()
+    with open(path.join(FIXTURES, icon[:-4] + ".golden.svg"), "r") as fp:
+        golden = fp.read().rstrip("\n")
+    assert set_symbols.normalize_svg(svg) == golden
+
+
+@pytest.mark.parametrize("d, expected", [
+    # Packed arc flags, lower and upper case
+    ("a14 14 0 011.5 28", "a 14 14 0 0 1 1.5 28"),
+    ("A8 8 0 10.01 0", "A 8 8 0 1 0 .01 0"),
+    # Exponents and signs running into each other
+    ("M1e1,2E-1L.5-.5l-1.25e+1.75", "M 1e1 2E-1 L .5 -.5 l -1.25e+1 .75"),
+    # Implicit repeats keep counting arc arguments in sevens
+    ("a2 2 0 001 1 2 2 0 011 1", "a 2 2 0 0 0 1 1 2 2 0 0 1 1 1"),
+    ("M0 0 4 0 4 4z", "M 0 0 4 0 4 4 z"),
+])
+def test_normalize_path(d, expected):
+    assert set_symbols.normalize_path(d) == expected
+
+
+def test_normalize_path_is_idempotent():
+    with open(path.join(FIXTURES, "CONFLUX.golden.svg"), "r") as fp:
+        golden = fp.read().rstrip("\n")
+    assert set_symbols.normalize_svg(golden) == golden
+
+
+def test_normalize_path_rejects_garbage():
+    with pytest.raises(ValueError):
+        set_symbols.normalize_path("M0 0L#")
@@ -0,0 +1,138 @@
+"""
+PRESHTILDEATH TEXT LAYOUT
+Offline text measuring with fontTools, to size text before Photoshop ever renders it.
+"""
+import os
+import re
+from functools import lru_cache
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+FONT_DIRS = [
+    os.path.join(os.path.dirname(__file__), "fonts"),
+    os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+    os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts"),
+    os.path.expanduser("~/Library/Fonts"),
+    "/usr/share/fonts",
+]
+SYMBOL = re.compile(r"(\{[^}]*\})")
+
+
+@lru_cache(maxsize=None)
+def font_index() -> dict:
+    """ Map postscript, full and family names to font files, bundled fonts win. """
+    index = {}
+    for folder in FONT_DIRS:
+        if not os.path.isdir(folder):
+            continue
+        for root, _, files in os.walk(folder):
+            for f in files:
+                if os.path.splitext(f)[1].lower() not in (".ttf", ".otf"):
+                    continue
+                file = os.path.join(root, f)
+                try:
+                    names = TTFont(file, lazy=True)["name"]
+                except Exception:
+                    continue
+                for name_id in (6, 4, 1):
+                    name = names.getDebugName(name_id)
+                    if name and name.lower() not in index:
+                        index[name.lower()] = file
+    return index
+
+
+class FontMetrics:
+    """ Glyph advances and vertical metrics for one font file. """
+    def __init__(self, file: str):
+        font = TTFont(file, lazy=True)
+        hmtx = font["hmtx"].metrics
+        self.upm = font["head"].unitsPerEm
+        self.advances = {chr(c): hmtx[g][0] for c, g in font.getBestCmap().items()}
+        self.default = hmtx[".notdef"][0] if ".notdef" in hmtx else self.upm // 2
+        hhea = font["hhea"]
+        self.height = (hhea.ascent - hhea.descent) / self.upm
+
+    def width(self, text: str, px: float) -> float:
+        """ Advance width of text at px pixels per em. """
+        return sum(self.advances.get(c, self.default) for c in text) * px / self.upm
+
+
+@lru_cache(maxsize=None)
+def load_font(name: str):
+    """ FontMetrics from a file path or an installed font name, None if it can't be found. """
+    if TTFont is None or not name:
+        return None
+    file = name if os.path.isfile(name) else font_index().get(name.lower())
+    return FontMetrics(file) if file else None
+
+
+class TextLayout:
+    """
+    Greedy word wrap of oracle text, mana symbols measured in the symbol font.
+    Sizes are in points like textItem.size, everything else is in document pixels.
+    """
+    def __init__(self, font: FontMetrics, symbol_font: FontMetrics=None, symbols: dict=None, dpi: float=800, paragraph_gap: float=0.5):
+        self.font = font
+        self.symbol_font = symbol_font or font
+        self.symbols = symbols or {}
+        self.dpi = dpi
+        self.paragraph_gap = paragraph_gap  # Extra lines between paragraphs, same guess as dirty_text_scale
+
+    def px(self, size: float) -> float:
+        return size * self.dpi / 72
+
+    def word_width(self, word: str, px: float) -> float:
+        width = 0
+        for i, part in enumerate(SYMBOL.split(word)):
+            if i % 2:
+                width += self.symbol_font.width(self.symbols.get(part, part), px)
+            else:
+                width += self.font.width(part, px)
+        return width
+
+    def wrap(self, text: str, size: float, width: float) -> list:
+        """ Lines for each paragraph at this size and box width. """
+        px = self.px(size)
+        space = self.font.width(" ", px)
+        paragraphs = []
+        for paragraph in text.split("\n"):
+            lines, line, line_w = [], [], 0
+            for word in paragraph.split():
+                word_w = self.word_width(word, px)
+                if line and line_w + space + word_w > width:
+                    lines += [" ".join(line)]
+                    line, line_w = [], 0
+                line_w += (space if line else 0) + word_w
+                line += [word]
+            paragraphs += [lines + [" ".join(line)]]
+        return paragraphs
+
+    def line_count(self, text: str, size: float, width: float) -> int:
+        return sum(len(p) for p in self.wrap(text, size, width))
+
+    def height(self, text: str, size: float, width: float, leading: float=None) -> float:
+        """ Predicted pixel height of the rendered text, top of the first line to the bottom of the last. """
+        if not text:
+            return 0
+        paragraphs = self.wrap(text, size, width)
+        lead = self.px(leading or size)
+        lines = sum(len(p) for p in paragraphs)
+        gaps = (len(paragraphs) - 1) * self.paragraph_gap
+        return (lines - 1 + gaps) * lead + self.font.height * self.px(size)
+
+    def fit(self, text: str, width: float, height: float, size: float, min_size: float=4, step: float=0.2) -> float:
+        """ Largest size, stepping down from size, where the text fits the box. Leading follows the size. """
+        while size > min_size and self.height(text, size, width) > height:
+            size = round(size - step, 2)
+        return max(size, min_size)
+
+
+def get_layout(font: str, symbol_font: str=None, symbols: dict=None, dpi: float=800):
+    """ TextLayout for the named fonts, None if fontTools or the fonts aren't available. """
+    metrics = load_font(font)
+    if not metrics:
+        return None
+    return TextLayout(metrics, load_font(symbol_font), symbols, dpi)
@@ -6,18 +6,207 @@ import math
 import os
 import os.path as path
 import re
+import threading
 
 import photoshop.api as ps
 from photoshop.api._artlayer import ArtLayer
 from photoshop.api._layerSet import LayerSet
 from photoshop.api._document import Document
 import proxyshop.helpers as psd
-import requests
 from proxyshop.settings import Config
 
+import action_batch
+import scryfall
+import set_symbols
+
 app = ps.Application()
 cid = app.charIDToTypeID
 sid = app.stringIDToTypeID
+batch = action_batch.ActionBatch(app)
+
+class LayerIndex:
+    """
+    Name paths to layer IDs for each open document, read with one descriptor call.
+    Helpers that add, rename, move or remove layers update the map instead of dropping it.
+    Lookups start from the deepest group already fetched, so a read never selects anything.
+    Paths run outermost group first, e.g. ("Pinlines", "Masked", "Legendary Crown").
+    """
+    def __init__(self):
+        self.docs = {}
+        self.saved = 0  # COM calls skipped, against two per group hop (collection + getByName)
+
+    def read_tree(self, doc_id: int) -> dict|None:
+        """ {(path, is_set): layer ID} for the whole document, None if Photoshop won't say. """
+        ref = ps.ActionReference()
+        ref.putProperty(sid("property"), sid("json"))
+        ref.putIdentifier(sid("document"), doc_id)
+        dsc = ps.ActionDescriptor()
+        dsc.putReference(sid("null"), ref)
+        for key in ("expandSmartObjects", "getTextStyles", "getPathData", "imageInfo", "compInfo"):
+            dsc.putBoolean(sid(key), False)
+        dsc.putBoolean(sid("layerInfo"), True)
+        try:
+            tree = json.loads(app.executeAction(sid("get"), dsc, ps.DialogModes.DisplayNoDialogs).getString(sid("json")))
+        except Exception as e:
+            print(e)
+            return None
+        ids = {}
+        def walk(layers, parent=()):
+            for layer in layers:
+                path = parent + (layer["name"],)
+                is_set = layer.get("type") == "layerSection"
+                # getByName takes the topmost match, so does this
+                ids.setdefault((path, is_set), layer["id"])
+                if is_set:
+                    walk(layer.get("layers", []), path)
+        walk(tree.get("layers", []))
+        return ids
+
+    def entry(self, doc) -> dict:
+        doc_id = doc.id
+        if doc_id not in self.docs:
+            ids = self.read_tree(doc_id)
+            self.docs[doc_id] = {
+                "ids": ids,
+                "keys": {v: k for k, v in ids.items()} if ids is not None else {},
+                "layers": {},  # Layer ID: layer object, for layers already fetched
+            }
+        return self.docs[doc_id]
+
+    def layer_id(self, path: tuple, is_set: bool=False, doc=None) -> int|None:
+        """ Layer ID for a name path without touching the layer itself. """
+        ids = self.entry(doc or app.activeDocument)["ids"]
+        return ids.get((tuple(path), is_set)) if ids is not None else None
+
+    def find(self, path: tuple, is_set: bool, doc) -> ArtLayer|LayerSet|None:
+        entry = self.entry(doc)
+        path = tuple(path)
+        layer_id = (entry["ids"] or {}).get((path, is_set))
+        if layer_id is None:
+            # Not a name the index knows, walk it like getByName always did
+            return self.walk(entry, doc, path, is_set, 0)
+        if layer_id in entry["layers"]:
+            self.saved += 2 * len(path)
+            return entry["layers"][layer_id]
+        # Deepest group on the path we already hold
+        depth = len(path) - 1
+        while depth and entry["ids"].get((path[:depth], True)) not in entry["layers"]:
+            depth -= 1
+        layer = self.walk(entry, doc, path, is_set, depth)
+        if layer is not None:
+            entry["layers"][layer_id] = layer
+        return layer
+
+    def walk(self, entry, doc, path, is_set, depth):
+        """ getByName down from the group depth levels in, keeping the groups passed through. """
+        self.saved += 2 * depth
+        parent = entry["layers"][entry["ids"][(path[:depth], True)]] if depth else doc
+        for i in range(depth, len(path)):
+            last = i == len(path) - 1
+            group = parent.artLayers if last and not is_set else parent.layerSets
+            try:
+                parent = group.getByName(path[i])
+            except Exception as e:
+                print(e)
+                return None
+            group_id = (entry["ids"] or {}).get((path[:i+1], True))
+            if not last and group_id is not None:
+                entry["layers"][group_id] = parent
+        return parent
+
+    def known(self, doc) -> dict|None:
+        """ The document's entry if it's been read, without reading it. """
+        entry = self.docs.get(doc.id)
+        return entry if entry and entry["ids"] is not None else None
+
+    def put(self, entry, key: tuple, layer_id: int, above: int=None):
+        """
+        Point a path at a layer. Another layer with the same path only loses it if
+        the new one is known to sit above it, otherwise the path is dropped and walked next time.
+        """
+        current = entry["ids"].get(key)
+        if current is None or current == layer_id or current == above:
+            entry["ids"][key] = layer_id
+            entry["keys"][layer_id] = key
+        else:
+            del entry["ids"][key]
+            entry["keys"].pop(current, None)
+            entry["keys"].pop(layer_id, None)
+
+    def add(self, doc, layer, sibling_id: int, name: str=None, is_set: bool=False):
+        """ Note a layer made just above sibling_id, in the same group. """
+        entry = self.known(doc)
+        if entry is None:
+            return
+        sibling = entry["keys"].get(sibling_id)
+        if sibling is None:
+            self.invalidate(doc)
+            return
+        layer_id = layer.id
+        entry["layers"][layer_id] = layer
+        self.put(entry, (sibling[0][:-1] + (name or layer.name,), is_set), layer_id, above=sibling_id)
+
+    def rename(self, doc, layer, name: str):
+        """ Note a layer's new name, call after setting it. """
+        self.repath(doc, layer.id, lambda path: path[:-1] + (name,))
+
+    def move(self, doc, layer_id: int, group_id: int):
+        """ Note a layer moved to the top of another group. """
+        entry = self.known(doc)
+        group = entry and entry["keys"].get(group_id)
+        if group is None:
+            self.invalidate(doc)
+            return
+        self.repath(doc, layer_id, lambda path: group[0] + path[-1:])
+
+    def repath(self, doc, layer_id: int, new_path):
+        """ Change a layer's path, and the paths of everything inside it. """
+        entry = self.known(doc)
+        if entry is None:
+            return
+        old = entry["keys"].get(layer_id)
+        if old is None:
+            self.invalidate(doc)
+            return
+        new = new_path(old[0])
+        for key in self.inside(entry, old):
+            moved = entry["ids"].pop(key)
+            entry["keys"].pop(moved, None)
+            self.put(entry, (new + key[0][len(old[0]):], key[1]), moved)
+
+    @staticmethod
+    def inside(entry, key: tuple) -> list:
+        """ A layer's key, plus the keys of everything under it if it's a group. """
+        path, is_set = key
+        return [
+            k for k in entry["ids"]
+            if k == key or is_set and len(k[0]) > len(path) and k[0][:len(path)] == path
+        ]
+
+    def remove(self, doc, layer_id: int):
+        """ Note a layer deleted or merged away, along with anything inside it. """
+        entry = self.known(doc)
+        if entry is None:
+            return
+        old = entry["keys"].get(layer_id)
+        if old is None:
+            entry["layers"].pop(layer_id, None)
+            return
+        for key in self.inside(entry, old):
+            gone = entry["ids"].pop(key)
+            entry["keys"].pop(gone, None)
+            entry["layers"].pop(gone, None)
+
+    def invalidate(self, doc=None):
+        """ Forget a document so it gets read again, or all of them with no doc. """
+        if doc is None:
+            self.docs.clear()
+        else:
+            self.docs.pop(doc.id, None)
+
+
+layers = LayerIndex()
+
 
 def get_layer(name: str, *args: str|LayerSet, **kwargs: Document) -> ArtLayer:
     """
@@ -28,7 +217,9 @@ def get_layer(name: str, *args: str|LayerSet, **kwargs: Document) -> ArtLayer:
         doc: The parent document. If not provided, defaults to activeDocument.
     """
     doc = kwargs.get("doc", app.activeDocument)
-    layer_set = get_layer_set(*args, doc=doc) if args else doc
+    if not any(isinstance(a, LayerSet) for a in args):
+        return layers.find((*reversed(args), name), False, doc)
+    layer_set = get_layer_set(*args, doc=doc)
     try:
         return layer_set.artLayers.getByName(name)
     except Exception as e:
@@ -46,7 +237,9 @@ def get_layer_set(name: str|LayerSet, *args: str|LayerSet, **kwargs: Document) -
     if isinstance(name, LayerSet):
         return name
     doc = kwargs.get("doc", app.activeDocument)
-    layer_set = get_layer_set(*args, doc=doc) if args else doc
+    if not any(isinstance(a, LayerSet) for a in args):
+        return layers.find((*reversed(args), name), True, doc)
+    layer_set = get_layer_set(*args, doc=doc)
     try:
         return layer_set.layerSets.getByName(name)
     except Exception as e:
@@ -104,30 +297,6 @@ def move_to(layer, x, y):
     layer.translate(x-layer.bounds[0], y-layer.bounds[1])
 
 
-def move_art(layout):
-    # Set up paths and determine file extension
-    work_path = os.path.dirname(layout.filename)
-    new_name = path.basename(layout.filename)
-    layout_type = layout.card_class
-
-    if "finished" in work_path:
-        return False
-    elif layout_type != "NormalLayout":
-        fin_path = os.path.join(work_path, "finished", layout_type)
-    else:
-        fin_path = os.path.join(work_path, "finished")
-
-    if not os.path.exists(fin_path):
-        os.mkdir(fin_path)
-
-    new_file = filename_append(os.path.join(fin_path, new_name), fin_path)
-    try:
-        os.replace(layout.filename, new_file)
-        return new_file
-    except Exception as e:
-        return e
-
-
 def frame(layer, ref, horiz="middle", vert="middle", resize=True, outside=True, resample="bicubicAutomatic"):
     """
     layer: The layer that will be moved and resized.
@@ -197,92 +366,53 @@ def rgbcolor(r: int, g: int, b: int):
 def get_expansion(layer, rarity: str, ref_layer, set_code: str):
     """ Find and open the set symbol SVG and pop it into our document. """
 
-    # Start nice and clean
-    white = rgbcolor(255, 255, 255)
     set_code = set_code.upper()
-    svg_folder = path.join(path.dirname(__file__), "assets", "Set Symbols")
+    svg_folder = set_symbols.SVG_FOLDER
     if not path.exists(svg_folder):
         os.mkdir(svg_folder)
 
-    # Open up our JSON file if it exists.
-    set_path = path.join(svg_folder, "set_svg.json")
-    if path.exists(set_path):
-        with open(set_path, "r") as set_fp:
-            set_json = json.load(set_fp)
-    else:
-        set_json = {}
-
-    # Iterate JSON looking for a match.
-    key = [k for k, v in set_json.items() if set_code in v]
-    if key:
-        key = key[0]
-        svg_uri = (
-            f"https://svgs.scryfall.io/sets/{key.lower()}.svg"
-        )
+    # Check the set index, or ask Scryfall.
+    key = set_symbols.index.get(set_code)
+    if not key:
+        key, svg_uri = scryfall.client.icon_key(set_code)
+        set_symbols.index.add(set_code, key)
     else:
-        scry_json = requests.get(f"https://api.scryfall.com/sets/{set_code.lower()}", timeout=5).json()
-        svg_uri = scry_json["icon_svg_uri"]
-        key = path.splitext(path.basename(svg_uri))[0].upper()
-        if key == "CON":
-            key = "CONFLUX"
-        set_json[key] = set_json[key] + [set_code] if key in set_json.keys() else [set_code]
-
-    # Look for our local SVG, or fetch the SVG from Scryfall.
+        svg_uri = scryfall.client.svg_uri(key)
+
+    # Look for our local SVG, or fetch the SVG from Scryfall and fix path data for photoshop.
     svg_path = path.join(svg_folder, f"{key}.svg")
-    if not path.exists(svg_path):
-        scry_svg = requests.get(svg_uri, timeout=5).text
-        """
-        Fix path data for photoshop.
-        This might need a lot of massaging.
-        """
-        front = r"(\s?-?((\d+(\.\d+)?)|(\.\d+)))((,|\s)?(-?((\d+(\.\d+)?)|(\.\d+)))){2}(,|\s)+"
-        back = r"[01](,|\s)?[01](,|\s)?((,|\s)?(-?((\d+(\.\d+)?)|(\.\d+)))){2}"
-        full = rf"a({front}{back})+"
-        for arc in re.finditer(full, scry_svg):
-            for arc_args in re.finditer(front+back, arc.group()):
-                astr = arc_args.group()
-                for arg in re.finditer(front, arc_args.group()):
-                    f = arg.span()[1]+1
-                    scry_svg = scry_svg.replace(astr, astr[:f]+" "+astr[f:f+1]+" "+astr[f+1:])
-        scry_svg = re.sub(r"\s+", " ", scry_svg)
-        # Save our fixed file
-        with open(svg_path, "w") as svg_file:
-            svg_file.write(scry_svg)
-
-    # Format our JSON for readability, keeping the values one line.
-    with open(set_path, "w") as file:
-        file.write(
-            json.dumps(set_json)
-            .replace("{", "{\n\t")
-            .replace("], ", "],\n\t")
-            .replace("]}", "]\n}")
-        )
+    scryfall.client.fetch_svg(svg_uri, svg_path, fix=set_symbols.normalize_svg)
 
+    # Rasterize into the atlas the first time we see this set at this size.
     max_size = bounds_height(ref_layer.bounds)
+    symbol_png, outline_png = set_symbols.atlas_paths(key, max_size)
     doc = app.activeDocument
-    doc.activeLayer = layer
-    svg_open(svg_path, max_size)
-    new_doc = app.activeDocument
-    new_doc.selection.selectAll()
-    new_doc.selection.copy()
-    new_doc.close(ps.SaveOptions.DoNotSaveChanges)
-    doc.paste()
-
+    if not path.exists(symbol_png):
+        os.makedirs(set_symbols.ATLAS_FOLDER, exist_ok=True)
+        new_doc = svg_open(svg_path, max_size)
+        new_doc.saveAs(symbol_png, ps.PNGSaveOptions(), True)
+        new_doc.close(ps.SaveOptions.DoNotSaveChanges)
+        app.activeDocument = doc
+    if not path.exists(outline_png):
+        set_symbols.make_outline(symbol_png, outline_png)
+
+    # Place the symbol over the template's empty layer, which it takes the place and name of.
     # Align verticle center, horizontal right.
+    name = layer.name
+    placeholder, layer = layer, place_image(layer, symbol_png)
+    layers.remove(doc, placeholder.id)
+    placeholder.remove()
+    layer.name = name
+    layers.rename(doc, layer, name)
     frame(layer, ref_layer, horiz="right", outside=False, resize=False)
 
-    # Magic Wand non-contiguous outside symbol, then subtract contiguous
-    x, y = layer.bounds[0] - 50, layer.bounds[1] - 50
-    slct = magic_wand_select(layer, x, y, "setd")
-    slct.invert()
-    slct.expand(1)
-
-    # Make a new layer and fill with stroke color
-    fill_layer = add_layer(name="Expansion Mask")
+    # Outline goes underneath, centered on the symbol
+    fill_layer = place_image(layer, outline_png)
+    fill_layer.name = "Expansion Mask"
+    layers.rename(doc, fill_layer, "Expansion Mask")
     fill_layer.moveAfter(layer)
-    slct.fill(white)
-    slct.deselect()
-    
+    frame(fill_layer, layer, resize=False)
+
     layer.link(fill_layer)
 
     # Apply rarity mask if necessary, and center it on symbol.
@@ -294,17 +424,76 @@ def get_expansion(layer, rarity: str, ref_layer, set_code: str):
     return layer
 
 
-def filename_append(file, send_path):
-    """ Check if a file already exists, then adds (x) if it does. """
-    file_name, ext = path.splitext(path.basename(file))  # imagename, .xxx
-    test_name = path.join(send_path, f"{file_name}{ext}")
-    if path.exists(test_name):  # location/imagename.xxx
-        multi = 1
-        test_name = path.join(send_path, f"{file_name} ({multi}){ext}")
-        while path.exists(test_name):  # location/imagename (1).xxx
-            multi += 1
-            test_name = path.join(send_path, f"{file_name} ({multi}){ext}")
-    return test_name  #  returns "location/imagename.xxx" or "location/imagename (x).xxx"
+class NameAllocator:
+    """
+    Picks free "name.ext" / "name (x).ext" file names, scanning each folder once.
+    A name is reserved by creating an empty file with O_EXCL, so renderers
+    sharing a folder never get the same one, whatever their own index thinks.
+    """
+    SUFFIX = re.compile(r"^(.*) \((\d+)\)$")
+
+    def __init__(self):
+        self.folders = {}  # folder: {(stem, ext): taken suffixes, 0 for no suffix}
+        self.reserved = {}  # path: (folder, (stem, ext), suffix), for release
+        self.lock = threading.Lock()  # The art archive reserves from its own thread
+
+    @classmethod
+    def split(cls, name: str) -> tuple:
+        """ "Forest (2).jpg" -> (("forest", ".jpg"), 2), case folded where the OS ignores case. """
+        stem, ext = path.splitext(path.basename(name))
+        match = cls.SUFFIX.match(stem)
+        stem, n = (match[1], int(match[2])) if match else (stem, 0)
+        return (path.normcase(stem), path.normcase(ext)), n
+
+    def index(self, folder: str) -> dict:
+        folder_key = path.normcase(path.abspath(folder))
+        if folder_key not in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            taken = {}
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    key, n = self.split(entry.name)
+                    taken.setdefault(key, set()).add(n)
+            self.folders[folder_key] = taken
+        return self.folders[folder_key]
+
+    def reserve(self, file: str, folder: str) -> str:
+        """ Claim the first free name for file in folder, returns its full path. """
+        stem, ext = path.splitext(path.basename(file))
+        key = (path.normcase(stem), path.normcase(ext))
+        with self.lock:
+            taken = self.index(folder).setdefault(key, set())
+            n = 0
+            while True:
+                while n in taken:
+                    n += 1
+                taken.add(n)
+                name = path.join(folder, f"{stem} ({n}){ext}" if n else f"{stem}{ext}")
+                try:
+                    os.close(os.open(name, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                except FileExistsError:
+                    continue  # Made since the scan, by us or someone else
+                self.reserved[path.normcase(path.abspath(name))] = (folder, key, n)
+                return name
+
+    def release(self, file: str):
+        """
+        Give back a name reserve handed out, if it never got written.
+        Safe to call either way, a file that did get written keeps its name.
+        """
+        with self.lock:
+            entry = self.reserved.pop(path.normcase(path.abspath(file)), None)
+            if entry is None:
+                return
+            folder, key, n = entry
+            if path.exists(file) and path.getsize(file):
+                return
+            self.index(folder)[key].discard(n)
+        if path.exists(file):
+            os.remove(file)
+
+
+names = NameAllocator()
 
 
 def dirty_text_scale(input_text, chars_in_line):
@@ -335,6 +524,8 @@ def layer_vert_stretch(layer, modifier, anchor="bottom", method="nearestNeighbor
 def wubrg_layer_sort(color_pair, layers, doc=None, prefix=""):
     """ Rearranges two color layers in order and applies mask. """
     if doc == None: doc = app.activeDocument
+    # Everything below goes straight to Photoshop, so anything queued before this has to happen first
+    batch.flush()
     print(prefix+color_pair[-2])
     print(prefix+color_pair[-1])
     top = get_layer(str(prefix+color_pair[-2]), layers, doc=doc)
@@ -394,13 +585,13 @@ def channel_select(layer, channel="Msk "):
     - 'Msk ': Mask
     - 'RGB ': Regular
     """
-    ref = ps.ActionReference()
+    ref = batch.ref()
     ref.putEnumerated(cid("Chnl"), cid("Chnl"), cid(channel))
     ref.putIdentifier(sid("layer"), layer.id)
-    desc = ps.ActionDescriptor()
+    desc = batch.desc()
     desc.putReference(cid("null"), ref)
     desc.putBoolean(cid("MkVs"), True)
-    app.executeAction(cid("slct"), desc, 3)
+    batch.execute(cid("slct"), desc, 3)
 
 
 def make_mask(layer):
@@ -414,14 +605,14 @@ def make_mask(layer):
     app.executeAction(cid("Mk  "), desc, ps.DialogModes.DisplayNoDialogs)
 
 def load_rgb_selection():
-    ref = ps.ActionReference()
+    ref = batch.ref()
     ref.putProperty(cid("Chnl"), cid("fsel"))
-    dsc = ps.ActionDescriptor()
+    dsc = batch.desc()
     dsc.putReference(cid("null"), ref)
-    trgt_ref = ps.ActionReference()
+    trgt_ref = batch.ref()
     trgt_ref.putEnumerated(cid("Chnl"), cid("Chnl"), cid("RGB "))
     dsc.putReference(cid("T   "), trgt_ref)
-    app.executeAction(cid("setd"), dsc)
+    batch.execute(cid("setd"), dsc)
 
 
 def magic_wand_select(layer, x, y, style="setd", t=0, a=True, c=True, s=False):
@@ -471,12 +662,12 @@ def select_nonblank_pixels(layer, style="setd"):
     """
     select = cid(style)
     id_chnl = cid("Chnl")
-    ref_selection = ps.ActionReference()
+    ref_selection = batch.ref()
     ref_selection.putProperty(id_chnl, cid("fsel"))
-    ref_trans_enum = ps.ActionReference()
+    ref_trans_enum = batch.ref()
     ref_trans_enum.putEnumerated(id_chnl, id_chnl, cid("Trsp"))
     ref_trans_enum.putIdentifier(sid("layer"), layer.id)
-    dsc = ps.ActionDescriptor()
+    dsc = batch.desc()
     if style == "setd":
         dsc.putReference(cid("null"), ref_selection)
         dsc.putReference(cid("T   "), ref_trans_enum)
@@ -484,7 +675,7 @@ def select_nonblank_pixels(layer, style="setd"):
         prep = {"Add ": "T   ", "Sbtr": "From", "Intr": "With"}
         dsc.putReference(cid(prep[style]), ref_selection)
         dsc.putReference(cid("null"), ref_trans_enum)
-    app.executeAction(select, dsc, ps.DialogModes.DisplayNoDialogs)
+    batch.execute(select, dsc, ps.DialogModes.DisplayNoDialogs)
 
 
 def get_layer_index(layerID):
@@ -509,7 +700,9 @@ def move_inside(fromlayer, layerset):
     try:
         app.executeAction(cid("move"), desc, 3)
     except Exception as err:
+        layers.invalidate(app.activeDocument)
         return err
+    layers.move(app.activeDocument, fromlayer.id, layerset.id)
 
 
 def add_layer(layer=None, name=False):
@@ -524,7 +717,10 @@ def add_layer(layer=None, name=False):
     desc_mk.putObject(cid("Usng"), cid("Lyr "), desc_usng)
     desc_mk.putInteger(cid("LyrI"), get_layer_index(layer.id))
     app.executeAction(cid("Mk  "), desc_mk, ps.DialogModes.DisplayNoDialogs)
-    return app.activeDocument.activeLayer
+    doc = app.activeDocument
+    new_layer = doc.activeLayer
+    layers.add(doc, new_layer, layer.id, name or None)
+    return new_layer
 
 
 def paste_in_place():
@@ -555,14 +751,14 @@ def svg_open(file: str, height: int):
 def layer_styles_visible(layer, visible=True):
     """ Enables or disables target layer styles. """
     show_hide = cid("Shw ") if visible else cid("Hd  ")
-    ref1 = ps.ActionReference()
+    ref1 = batch.ref()
     ref1.putClass(cid("Lefx"))
     ref1.putIdentifier(sid("layer"), int(layer.id))
-    list1 = ps.ActionList()
+    list1 = batch.list()
     list1.putReference(ref1)
-    desc1 = ps.ActionDescriptor()
+    desc1 = batch.desc()
     desc1.putList(cid("null"), list1)
-    app.executeAction(show_hide, desc1, 3)
+    batch.execute(show_hide, desc1, 3)
     
 
 def free_transform(layer, x=0, y=0, w=100, h=100, posit: list=None, resample="bicubicAutomatic"):
@@ -578,17 +774,17 @@ def free_transform(layer, x=0, y=0, w=100, h=100, posit: list=None, resample="bi
     """
 
     active_layer(layer, mkvs=True)
-    ref = ps.ActionReference()
+    ref = batch.ref()
     ref.putIdentifier(sid("layer"), layer.id)
-    dsc_trnf = ps.ActionDescriptor()
+    dsc_trnf = batch.desc()
     dsc_trnf.putReference(cid("null"), ref)
     dsc_trnf.putEnumerated(cid("FTcs"), cid("QCSt"), cid("Qcs0"))
     if posit and isinstance(posit, list|tuple):
-        dsc_pstn = ps.ActionDescriptor()
+        dsc_pstn = batch.desc()
         dsc_pstn.putUnitDouble(cid("Hrzn"), cid("#Pxl"), posit[0])
         dsc_pstn.putUnitDouble(cid("Vrtc"), cid("#Pxl"), posit[1])
         dsc_trnf.putObject(cid("Pstn"), cid("Pnt "), dsc_pstn)
-    dsc_offset = ps.ActionDescriptor()
+    dsc_offset = batch.desc()
     dsc_offset.putUnitDouble(cid("Hrzn"), cid("#Pxl"), x)
     dsc_offset.putUnitDouble(cid("Vrtc"), cid("#Pxl"), y)
     dsc_trnf.putObject(cid("Ofst"), cid("Ofst"), dsc_offset)
@@ -597,7 +793,7 @@ def free_transform(layer, x=0, y=0, w=100, h=100, posit: list=None, resample="bi
     if isinstance(layer, LayerSet):
         dsc_trnf.putBoolean(cid("Lnkd"), True)
     dsc_trnf.putEnumerated(cid("Intr"), cid("Intp"), sid(resample))
-    app.executeAction(cid("Trnf"), dsc_trnf)
+    batch.execute(cid("Trnf"), dsc_trnf)
 
 
 def bounds_nofx(layer) -> list:
@@ -731,22 +927,43 @@ def text_path_shift(layer, modifier, d="top"):
 
     return layer
 
-def fit_text(text_layer, ref_layer, padding:int=False, post_frame:bool=True):
+def fit_text(text_layer, ref_layer, padding:int=False, post_frame:bool=True, tolerance:float=0.2, min_size:float=4) -> dict:
     """
     Resize text in text_layer down until it fits inside ref_layer, with optional padding.
+    Bisects over sizes in steps of tolerance, leading follows the size.
+    Returns the final size and how many bounds queries the fit took.
     """
     txt_b = bounds_nofx(text_layer)
     ref_b = bounds_nofx(ref_layer)
+    queries = 2
     if not padding: padding = txt_b[0]-ref_b[0]
     height = (ref_b[3]-ref_b[1]) - padding*2
     right = ref_b[2]-padding
     txt = text_layer.textItem
-    while txt_b[3]-txt_b[1] > height or txt_b[2] > right:
-        size = txt.size-0.2
-        txt.size = size
-        txt.leading = size
-        txt_b = bounds_nofx(text_layer)
+    start = size = txt.size
+
+    def set_size(new_size):
+        txt.size = new_size
+        txt.leading = new_size
+
+    if txt_b[3]-txt_b[1] > height or txt_b[2] > right:
+        # Step 'lo' is known too big, step 'hi' fits (or is as small as we go)
+        lo, hi = 0, max(math.ceil((start-min_size) / tolerance), 1)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            size = round(start - mid*tolerance, 2)
+            set_size(size)
+            txt_b = bounds_nofx(text_layer)
+            queries += 1
+            if txt_b[3]-txt_b[1] > height or txt_b[2] > right:
+                lo = mid
+            else:
+                hi = mid
+        if size != round(start - hi*tolerance, 2):
+            size = round(start - hi*tolerance, 2)
+            set_size(size)
     if post_frame: frame(text_layer, ref_b, resize=False)
+    return {"size": size, "queries": queries}
 
 
 def fit_text_oneline(text_layer, ref_layer, loc:str="left", padding:int=False, post_frame:bool=False):
@@ -802,20 +1019,50 @@ def place_image(layer, file, percent=None):
         dsc_plc.putUnitDouble(cid("Hght"), cid("#Prc"), percent)
     dsc_plc.putBoolean(cid("AntA"), True)
     app.executeAction(cid("Plc "), dsc_plc, ps.DialogModes.DisplayNoDialogs)
+    doc = app.activeDocument
     if ".svg" in file:
+        # Merged down into the target layer, which keeps its name and ID
         app.executeAction(cid("Mrg2"), ps.ActionDescriptor())
-    return app.activeDocument.activeLayer
+        return doc.activeLayer
+    new_layer = doc.activeLayer
+    layers.add(doc, new_layer, layer.id)
+    return new_layer
 
 
 def active_layer(layer, mkvs=False):
-    desc_slct = ps.ActionDescriptor()
+    desc_slct = batch.desc()
 
-    ref_null = ps.ActionReference()
+    ref_null = batch.ref()
     ref_null.putIdentifier(cid("Lyr "), layer.id)
     desc_slct.putReference(cid("null"), ref_null)
     desc_slct.putBoolean(cid("MkVs"), mkvs)
 
-    app.executeAction(cid("slct"), desc_slct)
+    batch.execute(cid("slct"), desc_slct)
+
+
+def set_visible(visible: bool, name: str, *args: str, **kwargs: Document):
+    """
+    Show or hide a layer by name path, same arguments as get_layer.
+    Goes through the batch, and skips fetching the layer when the index knows its ID.
+    """
+    doc = kwargs.get("doc", app.activeDocument)
+    layer_id = layers.layer_id((*reversed(args), name), doc=doc)
+    if layer_id is None:
+        layer = get_layer(name, *args, doc=doc)
+        if layer is None:
+            return
+        layer_id = layer.id
+    batch.visible(layer_id, visible)
+
+
+def deselect():
+    """ Drop the selection, batch friendly version of doc.selection.deselect(). """
+    ref = batch.ref()
+    ref.putProperty(cid("Chnl"), cid("fsel"))
+    dsc = batch.desc()
+    dsc.putReference(cid("null"), ref)
+    dsc.putEnumerated(cid("T   "), cid("Ordn"), cid("None"))
+    batch.execute(cid("setd"), dsc, ps.DialogModes.DisplayNoDialogs)
 
 
 def dupe_layer(layer, name: str=None, doc=None):
@@ -832,19 +1079,21 @@ def dupe_layer(layer, name: str=None, doc=None):
     # desc_dplc.putList(cid("Idnt"), list_idnt)
 
     app.executeAction(cid("Dplc"), desc_dplc)
-    return doc.activeLayer
+    new_layer = doc.activeLayer
+    layers.add(doc, new_layer, layer.id, name)
+    return new_layer
 
 
 def isolate_layers(layer: ArtLayer|LayerSet):
     """Inverts back to normal if called again with same layer target."""
-    ref = ps.ActionReference()
+    ref = batch.ref()
     ref.putIdentifier(sid("layer"), layer.id)
-    lst = ps.ActionList()
+    lst = batch.list()
     lst.putReference(ref)
-    dsc = ps.ActionDescriptor()
+    dsc = batch.desc()
     dsc.putList(cid("null"), lst)
     dsc.putBoolean(cid("TglO"), True)
-    app.executeAction(cid("Shw "), dsc)
+    batch.execute(cid("Shw "), dsc)
 
 
 def replace_text(layer, find, repl, **kwargs):